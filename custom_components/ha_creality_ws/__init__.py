@@ -28,6 +28,7 @@ from homeassistant.const import (  # type: ignore[import]
 import voluptuous as vol  # type: ignore[import]
 from homeassistant.helpers import config_validation as cv, entity_registry as er, device_registry as dr # type: ignore[import]
 from homeassistant.helpers.aiohttp_client import async_get_clientsession # type: ignore[import]
+from homeassistant.helpers.dispatcher import async_dispatcher_send  # type: ignore[import]
 from homeassistant.components.persistent_notification import async_create as pn_async_create # type: ignore[import]
 
 from .const import (
@@ -37,6 +38,7 @@ from .const import (
     CONF_POWER_SWITCH_ENABLED,
     CONF_CAMERA_MODE,
     CONF_POLLING_RATE,
+    CONF_WRITE_DEBOUNCE,
     CONF_NOTIFY_DEVICE,
     CONF_NOTIFY_COMPLETED,
     CONF_NOTIFY_ERROR,
@@ -46,10 +48,13 @@ from .const import (
     CONF_GO2RTC_PORT,
     DEFAULT_GO2RTC_URL,
     DEFAULT_GO2RTC_PORT,
+    DISCOVERY_CONNECT_TIMEOUT,
+    SIGNAL_NEW_ENTITIES,
 )
-from .coordinator import KCoordinator
+from .capabilities import DeviceCapabilities
+from .coordinator import KCoordinator, async_remove_snapshot
 from .frontend import CrealityCardRegistration
-from .utils import ModelDetection
+from .utils import ModelDetection, parse_model_version
 
 
 
@@ -151,170 +156,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     coord = KCoordinator(hass, host=host, power_switch=effective_power_switch, config_entry_id=entry.entry_id)
 
+    # Capability cache and last-known telemetry, so entities have values before the first frame
+    caps = coord.capabilities
+    await caps.async_load(hass, entry)
+    await coord.async_restore_snapshot()
+
     try:
+        # Connects in the background; setup does not wait for the printer
         await coord.async_start()
-        # If printer is OFF, we intentionally don't wait for connectivity.
-        if not coord.power_is_off():
-            # Initial grace period is ~5 retries (~15-20s). Wait enough to cover it.
-            ok = await coord.wait_first_connect(timeout=15.0)
-            if not ok:
-                _LOGGER.warning("Initial connect not confirmed; will retry in background")
     except Exception as exc:
         await coord.async_stop()
         raise ConfigEntryNotReady(str(exc)) from exc
 
     # Get current integration version
     current_version = await _get_integration_version(hass)
-    cached_version = entry.data.get("_cached_version", "0.0.0")
     
-    # Detect and store device info during initial setup or on version upgrade
-    # This is stored in entry.data which persists across restarts
+    # Re-detect device info on first setup, version upgrade, IP change, or
+    # when max temperatures are missing (caches from older versions)
     should_re_cache = (
-        not entry.data.get("_device_info_cached") or
-        cached_version != current_version or
-        entry.data.get("_last_ip") != host
+        not caps.cached or
+        caps.version != current_version or
+        caps.last_ip != host or
+        caps.max_bed_temp is None or
+        caps.max_nozzle_temp is None
     )
     
     # Store current IP to detect network changes later
-    if entry.data.get("_last_ip") != host:
-        new_data = dict(entry.data)
-        new_data["_last_ip"] = host
-        hass.config_entries.async_update_entry(entry, data=new_data)
-        
-    # Attempt to cache MAC address if not present
-    if not entry.data.get("_cached_mac") and not coord.power_is_off():
-        # In a real scenario, we might query M115 or check network info from the printer
-        # For now, we will rely on upcoming zeroconf updates to populate this if the printer exposes it.
-        # OR: If the coordinator captured it from initial handshake/data?
-        # Creality printers are notoriously shy about their MAC in the JSON payload.
-        pass
-         
-    # Also re-cache if max temperature values are missing (migration from older versions)
-    should_re_cache = should_re_cache or (
-        entry.data.get("_cached_max_bed_temp") is None or
-        entry.data.get("_cached_max_nozzle_temp") is None
-    )
-    
-    # Re-cache if CFS info is missing but cfsConnect is 1
-    if not should_re_cache and coord.data.get("cfsConnect") == 1 and not entry.data.get("_cached_cfs_detected"):
-        should_re_cache = True
+    if caps.last_ip != host:
+        caps.last_ip = host
+        caps.async_save_later()
 
-    if should_re_cache:
+    if should_re_cache and coord.power_is_off():
+        # Printer is off - update version only, keep existing cached data if available
         _LOGGER.info(
-            "Caching device info for %s (cached_version=%s, current_version=%s)",
-            host, cached_version, current_version
+            "Printer is off, updating version only (keeping existing cached data if available)"
         )
-        # Wait a bit longer to ensure we get model info
-        if not coord.power_is_off():
-            ok = await coord.wait_first_connect(timeout=10.0)
-            # After first connect, wait briefly for model fields to appear to reduce flakiness
-            if ok:
-                # Wait for basic fields to confirm model and capabilities
-                await coord.wait_for_fields(["model", "modelVersion", "hostname"], timeout=6.0)
-                
-                # CFS / Telemetry Wait Sequence
-                # If CFS detected, we MUST wait for boxsInfo to populate or sensors won't get created.
-                if coord.data.get("cfsConnect") == 1:
-                    _LOGGER.info("CFS connected; requesting box info and waiting...")
-                    # Request updated info to be sure
-                    await coord.client.request_boxs_info()
-                    # Wait for it to arrive
-                    await coord.wait_for_fields(["boxsInfo"], timeout=5.0)
-                
-                # Opportunistic wait for chamber/feature fields if not yet present
-                # This helps the logic below verify capabilities
-                if "maxBoxTemp" not in coord.data:
-                    # Give a tiny storage for these lazier fields to arrive
-                    await coord.wait_for_fields(["maxBoxTemp", "targetBoxTemp"], timeout=2.0)
-            else:
-                got_fields = False
-            
-            # Always update cache if we have data, even if wait timed out partially
-            if (ok and coord.data):
-                # Store device info in entry data
-                d = coord.data or {}
-                printermodel = ModelDetection(d)
-                model = printermodel.resolved_model() or entry.data.get("_cached_model") or "K by Creality"
-                hostname = d.get("hostname") or entry.data.get("_cached_hostname")
-                model_version = d.get("modelVersion") or entry.data.get("_cached_model_version")
-                
-                new_data = dict(entry.data)
-                new_data["_device_info_cached"] = True
-                new_data["_cached_version"] = current_version
-                new_data["_cached_model"] = model
-                new_data["_cached_hostname"] = hostname
-                new_data["_cached_model_version"] = model_version
-                new_data["_cached_has_light"] = printermodel.has_light
-                # Prefer chamber_* keys; mirror to legacy box_* for back-compat
-                new_data["_cached_has_chamber_sensor"] = printermodel.has_chamber_sensor
-                new_data["_cached_has_chamber_control"] = printermodel.has_chamber_control
-                new_data["_cached_has_box_sensor"] = printermodel.has_box_sensor
-                new_data["_cached_has_box_control"] = printermodel.has_box_control
-                # Feature Promotion: Trust telemetry over model defaults
-                # If printer reports chamber targets/temps, ENABLE capabilities
-                if "targetBoxTemp" in d:
-                    new_data["_cached_has_chamber_control"] = True
-                    new_data["_cached_has_box_control"] = True
-                if "boxTemp" in d or "maxBoxTemp" in d:
-                    new_data["_cached_has_chamber_sensor"] = True
-                    new_data["_cached_has_box_sensor"] = True
-                if "lightSw" in d:
-                    new_data["_cached_has_light"] = True
-                
-                # Cache CFS status
-                new_data["_cached_cfs_detected"] = d.get("cfsConnect") == 1
-                
-                # Cache max temperature values for temperature control limits
-                new_data["_cached_max_bed_temp"] = d.get("maxBedTemp", entry.data.get("_cached_max_bed_temp"))
-                new_data["_cached_max_nozzle_temp"] = d.get("maxNozzleTemp", entry.data.get("_cached_max_nozzle_temp"))
-                # Cache chamber max; mirror to legacy box for back-compat
-                new_data["_cached_max_chamber_temp"] = d.get("maxBoxTemp", entry.data.get("_cached_max_chamber_temp"))
-                new_data["_cached_max_box_temp"] = new_data["_cached_max_chamber_temp"]
-                
-                # Re-detect camera type only if missing (not on every update)
-                cached_camera_type = entry.data.get("_cached_camera_type")
-                cached_camera_type = entry.data.get("_cached_camera_type")
-                if not cached_camera_type:
-                    new_data["_cached_camera_type"] = "webrtc" if (printermodel.is_k2_family or printermodel.supports_webrtc) else (
-                        "mjpeg_optional" if (printermodel.is_k1_se or printermodel.is_ender_v3_family) else "mjpeg"
-                    )
-                    _LOGGER.info("Camera type detected: %s", new_data["_cached_camera_type"])
-                else:
-                    # Keep existing camera type (don't override on updates)
-                    new_data["_cached_camera_type"] = cached_camera_type
-                
-                hass.config_entries.async_update_entry(entry, data=new_data)
-                _LOGGER.info(
-                    "Device info cached: model=%s, camera=%s, version=%s",
-                    model, new_data.get("_cached_camera_type"), current_version
-                )
-                
-                # Migrate go2rtc settings if needed
-                _migrate_go2rtc_settings(hass, entry)
-        else:
-            # Printer is off - update version only, keep existing cached data if available
-            _LOGGER.info(
-                "Printer is off, updating version only (keeping existing cached data if available)"
-            )
-            new_data = dict(entry.data)
-            new_data["_device_info_cached"] = True
-            new_data["_cached_version"] = current_version
-            
-            # Only set defaults if this is first-time setup (no cached model exists)
-            if not new_data.get("_cached_model"):
-                new_data["_cached_model"] = "K by Creality"
-                new_data["_cached_has_light"] = True
-                new_data["_cached_has_chamber_sensor"] = False
-                new_data["_cached_has_chamber_control"] = False
-                # Legacy mirrors
-                new_data["_cached_has_box_sensor"] = False
-                new_data["_cached_has_box_control"] = False
-                new_data["_cached_camera_type"] = "mjpeg"
-            
-            hass.config_entries.async_update_entry(entry, data=new_data)
-            
-            # Migrate go2rtc settings even when printer is off
-            _migrate_go2rtc_settings(hass, entry)
+        caps.set_offline_defaults(current_version)
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coord
     
@@ -376,7 +253,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     except Exception as exc:
         _LOGGER.debug("Legacy entity cleanup skipped: %s", exc)
 
+    # Platforms come up from the cached entry data; live discovery refines it later
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # Runs even while the power switch is off: discovery then completes on power-on
+    entry.async_create_background_task(
+        hass,
+        _async_discover_device_info(hass, entry, coord, current_version, should_re_cache),
+        f"{DOMAIN}-discover-{host}",
+    )
     
     # Register diagnostic service (only once per integration)
     if not hasattr(hass.data[DOMAIN], '_diagnostic_service_registered'):
@@ -390,6 +275,82 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def _async_discover_device_info(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coord: KCoordinator,
+    current_version: str,
+    re_cache: bool,
+) -> None:
+    """Wait for live telemetry, refresh the device cache and announce new entities.
+
+    Runs as a background task so setup never blocks on a slow printer. When
+    done it fires the new-entities signal; platforms then add entities whose
+    capabilities telemetry has confirmed (chamber, light, CFS, camera type).
+    If the printer is off or unreachable, the signal also fires when the
+    connect wait times out (a first setup still gets its default camera) and
+    discovery finishes whenever the printer first connects.
+    """
+    signal = SIGNAL_NEW_ENTITIES.format(entry_id=entry.entry_id)
+    if not await coord.wait_first_connect(timeout=DISCOVERY_CONNECT_TIMEOUT):
+        _LOGGER.warning(
+            "Printer %s not reachable; using cached device info until it connects", coord.client.host
+        )
+        coord.discovery_settled = True
+        async_dispatcher_send(hass, signal)
+        # Power-on or a late first connection; unloading the entry cancels this wait
+        await coord.wait_first_connect(timeout=None)
+
+    # Wait for basic fields to confirm model and capabilities
+    await coord.wait_for_fields(["model", "modelVersion", "hostname"], timeout=6.0)
+
+    # If CFS detected, wait for boxsInfo so its sensors can be created
+    if coord.data.get("cfsConnect") == 1:
+        _LOGGER.info("CFS connected; requesting box info and waiting...")
+        await coord.client.request_boxs_info()
+        await coord.wait_for_fields(["boxsInfo"], timeout=5.0)
+        if not coord.capabilities.cfs_detected:
+            re_cache = True
+
+    # Opportunistic wait for chamber/feature fields if not yet present
+    if "maxBoxTemp" not in coord.data:
+        await coord.wait_for_fields(["maxBoxTemp", "targetBoxTemp"], timeout=2.0)
+
+    if re_cache and coord.data:
+        _LOGGER.info(
+            "Caching device info for %s (cached_version=%s, current_version=%s)",
+            coord.client.host, coord.capabilities.version, current_version
+        )
+        caps = coord.capabilities
+        caps.update_from_telemetry(coord.data, current_version)
+        _LOGGER.info(
+            "Device info cached: model=%s, camera=%s, version=%s",
+            caps.model, caps.camera_type, current_version
+        )
+        _update_device_registry(hass, coord)
+        # Model and limits come from the cache, not telemetry keys: refresh everything
+        coord.async_update_listeners()
+
+    coord.discovery_settled = True
+    async_dispatcher_send(hass, signal)
+
+
+def _update_device_registry(hass: HomeAssistant, coord: KCoordinator) -> None:
+    """Refresh model and versions of an already registered device from the cache."""
+    dev_reg = dr.async_get(hass)
+    device = dev_reg.async_get_device(identifiers={(DOMAIN, coord.client.host)})
+    if device is None:
+        return
+    caps = coord.capabilities
+    hw_ver, sw_ver = parse_model_version(caps.model_version)
+    dev_reg.async_update_device(
+        device.id,
+        model=caps.model or device.model,
+        hw_version=hw_ver or device.hw_version,
+        sw_version=sw_ver or device.sw_version,
+    )
+
+
 async def _register_custom_services(hass: HomeAssistant) -> None:
     """Register custom services for the integration."""
 
@@ -483,6 +444,7 @@ async def _register_diagnostic_service(hass: HomeAssistant) -> None:
                         "power_switch_enabled": cfg_entry.options.get(CONF_POWER_SWITCH_ENABLED),
                         "camera_mode": cfg_entry.options.get(CONF_CAMERA_MODE),
                         "polling_rate": cfg_entry.options.get(CONF_POLLING_RATE),
+                        "write_debounce": cfg_entry.options.get(CONF_WRITE_DEBOUNCE),
                         "notify_device": cfg_entry.options.get(CONF_NOTIFY_DEVICE),
                         "notify_completed": cfg_entry.options.get(CONF_NOTIFY_COMPLETED),
                         "notify_error": cfg_entry.options.get(CONF_NOTIFY_ERROR),
@@ -491,18 +453,7 @@ async def _register_diagnostic_service(hass: HomeAssistant) -> None:
                         "go2rtc_url": cfg_entry.options.get(CONF_GO2RTC_URL),
                         "go2rtc_port": cfg_entry.options.get(CONF_GO2RTC_PORT),
                     } if cfg_entry else {},
-                    "cached": {
-                        "model": cfg_entry.data.get("_cached_model") if cfg_entry else None,
-                        "hostname": cfg_entry.data.get("_cached_hostname") if cfg_entry else None,
-                        "model_version": cfg_entry.data.get("_cached_model_version") if cfg_entry else None,
-                        "camera_type": cfg_entry.data.get("_cached_camera_type") if cfg_entry else None,
-                        "has_light": cfg_entry.data.get("_cached_has_light") if cfg_entry else None,
-                        "has_chamber_sensor": cfg_entry.data.get("_cached_has_chamber_sensor", cfg_entry.data.get("_cached_has_box_sensor")) if cfg_entry else None,
-                        "has_chamber_control": cfg_entry.data.get("_cached_has_chamber_control", cfg_entry.data.get("_cached_has_box_control")) if cfg_entry else None,
-                        "max_bed_temp": cfg_entry.data.get("_cached_max_bed_temp") if cfg_entry else None,
-                        "max_nozzle_temp": cfg_entry.data.get("_cached_max_nozzle_temp") if cfg_entry else None,
-                        "max_chamber_temp": cfg_entry.data.get("_cached_max_chamber_temp", cfg_entry.data.get("_cached_max_box_temp")) if cfg_entry else None,
-                    } if cfg_entry else {},
+                    "cached": coord.capabilities.as_dict(),
                 }
 
                 # WebSocket connection diagnostics
@@ -517,6 +468,18 @@ async def _register_diagnostic_service(hass: HomeAssistant) -> None:
                     "reconnect_count": client.reconnect_count,
                     "msg_count": client.msg_count,
                     "last_error": client.last_error,
+                    "cadence_profile": client.cadence_profile,
+                    "resolved_host": client.resolved_host,
+                    "json_codec": client.codec_name,
+                    "dedupe_hits": client.dedupe_hits,
+                    "dedupe_misses": client.dedupe_misses,
+                    "queue_depth": client.queue_depth,
+                    "queue_max_depth": client.queue_max_depth,
+                    "frames_coalesced": client.frames_coalesced,
+                    "polls_dropped": client.polls_dropped,
+                    "polls_shared": client.polls_shared,
+                    "lane_latency": client.lane_latency,
+                    "command_latency": client.tracker.as_dict(),
                     # Accessing private memeber for debug/diagnostics is acceptable or expose another property?
                     # uptime_start is public in ws_client (lines 66)
                     "uptime_seconds": (time.monotonic() - client.uptime_start) if client.uptime_start > 0 and client.is_connected else 0,
@@ -564,6 +527,8 @@ async def _register_diagnostic_service(hass: HomeAssistant) -> None:
                     "paused_flag": coord.paused_flag(),
                     "pending_pause": coord.pending_pause(),
                     "pending_resume": coord.pending_resume(),
+                    "state_writes": coord.state_writes,
+                    "state_writes_skipped": coord.state_writes_skipped,
                     "last_rx_time": client.last_rx_monotonic(),
                     "ws": ws_diag,
                     "config_entry": entry_meta,
@@ -674,6 +639,11 @@ async def async_monitor_zeroconf_update(hass: HomeAssistant, entry: ConfigEntry,
     if not host:
         return
 
+    # The printer re-announced itself; drop a resolved address that no longer matches
+    coord: KCoordinator | None = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if coord is not None and coord.client.resolved_host != host:
+        coord.client.invalidate_host_cache()
+
     # If we have a MAC address, we can do a robust match
     if mac:
         # Check if the current entry matches this MAC
@@ -687,7 +657,7 @@ async def async_monitor_zeroconf_update(hass: HomeAssistant, entry: ConfigEntry,
                     "Robust IP Update: MAC match (%s) but IP changed from %s to %s. Updating...",
                     mac, current_host, host
                 )
-                hass.config_entries.async_update_entry(entry, data={**entry.data, "host": host, "_last_ip": host})
+                hass.config_entries.async_update_entry(entry, data={**entry.data, "host": host})
                 await hass.config_entries.async_reload(entry.entry_id)
             return
 
@@ -751,6 +721,12 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the persisted telemetry snapshot and capability cache of a removed printer."""
+    await async_remove_snapshot(hass, entry.entry_id)
+    await DeviceCapabilities.for_entry(hass, entry.entry_id).async_clear()
+
+
 async def async_remove_config_entry_device(hass: HomeAssistant, entry: ConfigEntry, device) -> bool:
     """Remove a device from the device registry when requested by the user.
 
@@ -774,20 +750,11 @@ async def async_remove_config_entry_device(hass: HomeAssistant, entry: ConfigEnt
                 break
 
         if host:
-            # Drop all cached_* fields from entry.data
-            new_data = dict(entry.data)
-            removed_keys = []
-            for k in list(new_data.keys()):
-                if k.startswith("_cached_") or k == "_device_info_cached":
-                    removed_keys.append(k)
-                    new_data.pop(k, None)
-            if removed_keys:
-                hass.config_entries.async_update_entry(entry, data=new_data)
-                _LOGGER.info(
-                    "ha_creality_ws: cleared cached data on device removal for host=%s: %s",
-                    host,
-                    ", ".join(sorted(removed_keys)),
-                )
+            # Drop the capability cache (keeping the MAC used to match discoveries)
+            coord: KCoordinator | None = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+            caps = coord.capabilities if coord else DeviceCapabilities.for_entry(hass, entry.entry_id)
+            await caps.async_clear()
+            _LOGGER.info("ha_creality_ws: cleared cached data on device removal for host=%s", host)
     except Exception:
         _LOGGER.exception("ha_creality_ws: cleanup during device removal failed")
     return True
@@ -1,7 +1,6 @@
 """Button entities for Creality 3D printers."""
 from __future__ import annotations
 
-import asyncio
 import logging
 from homeassistant.components.button import ButtonEntity  # type: ignore[import]
 
@@ -25,33 +24,22 @@ class KHomeAllButton(KEntity, ButtonEntity):
     """Button to home all axes."""
     _attr_name = "Home (XY then Z)"
     _attr_icon = "mdi:home-circle"
+    _watch_keys = ()  # stateless; only availability broadcasts matter
 
     def __init__(self, coordinator):
         """Initialize the button."""
         super().__init__(coordinator, self._attr_name, "home_all")
-        self._seq_lock = asyncio.Lock()
 
     async def async_press(self) -> None:
-        async with self._seq_lock:
-            # Ensure WebSocket connection is active before sending commands
-            if not await self.coordinator.ensure_connected():
-                _LOGGER.warning("Cannot execute home command: printer not connected")
-                return
-            await self.coordinator.client.send_set_retry(autohome="X Y")
-            await asyncio.sleep(1.0)
-            await self._wait_until_idle_or_timeout(15.0)
-            await self.coordinator.client.send_set_retry(autohome="Z")
-
-    async def _wait_until_idle_or_timeout(self, timeout: float) -> None:
-        end = asyncio.get_event_loop().time() + timeout
-        while asyncio.get_event_loop().time() < end:
-            if (self.coordinator.data or {}).get("deviceState") != 7:
-                return
-            await asyncio.sleep(0.25)
+        # Restart a dead client task; if the link is still down the command queues
+        if not await self.coordinator.ensure_connected():
+            _LOGGER.warning("Printer not connected; home command will wait for the link")
+        await self.coordinator.request_home()
 
 class _BasePrintButton(KEntity, ButtonEntity):
     """Base class for print control buttons."""
     _attr_icon = "mdi:printer-3d"
+    _watch_keys = ()
 
 class KPrintPauseButton(_BasePrintButton):
     """Button to pause the print."""
@@ -78,16 +66,16 @@ class KPrintStopButton(_BasePrintButton):
         super().__init__(coordinator, "Stop Print", "stop_print")
     async def async_press(self) -> None:
         """Handle the button press."""
-        # Ensure WebSocket connection is active before sending commands
+        # Restart a dead client task; a stop that cannot be sent now is dropped
         if not await self.coordinator.ensure_connected():
-            _LOGGER.warning("Cannot execute stop command: printer not connected")
-            return
-        await self.coordinator.client.send_set_retry(stop=1)
+            _LOGGER.warning("Printer not connected; stop command not sent")
+        await self.coordinator.request_stop()
         # don't force paused flag here; telemetry will reflect idle soon
 
 class KReconnectButton(KEntity, ButtonEntity):
     """Button to force a reconnect."""
     _attr_icon = "mdi:connection"
+    _watch_keys = ()
     def __init__(self, coordinator):
         """Initialize."""
         # Unique ID suffix: reconnect_ws
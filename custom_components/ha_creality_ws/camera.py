@@ -57,7 +57,7 @@ from .const import (
     CONF_GO2RTC_URL,
     CONF_GO2RTC_PORT,
 )
-from .entity import KEntity
+from .entity import KEntity, async_track_new_entities
 
 
 
@@ -91,6 +91,10 @@ class _BaseCamera(KEntity, Camera):
         b"\xff\xda\x00\x0c\x03\x01\x00\x02\x11\x03\x11\x00?\x00\xd2\xcf \xff\xd9"
     )
 
+    # Camera state does not depend on telemetry keys; only broadcasts
+    # (availability/power changes) need to wake it.
+    _watch_keys: tuple[str, ...] = ()
+
     def __init__(self, coordinator, name: str, unique_suffix: str) -> None:
         """Initialize the base camera.
         
@@ -932,38 +936,37 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
         async_add_entities([CrealityMjpegCamera(coord, MJPEG_URL_TEMPLATE.format(host=host))])
         return
 
-    # Use cached camera type from entry data (detected during onboarding)
-    cached_camera_type = entry.data.get("_cached_camera_type", "mjpeg")
-    
-    # WebRTC cameras (K2 family - always present)
-    webrtc_url = WEBRTC_URL_TEMPLATE.format(host=host)
-    if cached_camera_type == "webrtc":
-        _LOGGER.info("ha_creality_ws: using cached WebRTC camera detection for %s", host)
-        async_add_entities([
-            CrealityWebRTCCamera(
-                coord, 
-                webrtc_url, 
-                use_proxy=use_proxy,
-                go2rtc_url=entry.options.get(CONF_GO2RTC_URL),
-                go2rtc_port=entry.options.get(CONF_GO2RTC_PORT),
-            )
-        ])
-        return
-
-    # MJPEG cameras (default or optional)
-    mjpeg_url = MJPEG_URL_TEMPLATE.format(host=host)
-    
-    # Check if camera type is mjpeg_optional (K1 SE, Ender 3 V3 family)
-    if cached_camera_type == "mjpeg_optional":
-        _LOGGER.info("ha_creality_ws: using cached optional camera model, attempting MJPEG for %s", host)
-        try:
-            async_add_entities([CrealityMjpegCamera(coord, mjpeg_url)])
-        except Exception:
-            # Camera is optional for these models, continue without it
-            _LOGGER.info("ha_creality_ws: optional camera not available for %s", host)
-            pass
-        return
-    
-    # Default MJPEG cameras
-    _LOGGER.info("ha_creality_ws: using cached MJPEG camera detection for %s", host)
-    async_add_entities([CrealityMjpegCamera(coord, mjpeg_url)])
+    def _cameras_for(camera_type: str) -> list:
+        # WebRTC cameras (K2 family - always present)
+        if camera_type == "webrtc":
+            _LOGGER.info("ha_creality_ws: using cached WebRTC camera detection for %s", host)
+            return [
+                CrealityWebRTCCamera(
+                    coord, 
+                    WEBRTC_URL_TEMPLATE.format(host=host), 
+                    use_proxy=use_proxy,
+                    go2rtc_url=entry.options.get(CONF_GO2RTC_URL),
+                    go2rtc_port=entry.options.get(CONF_GO2RTC_PORT),
+                )
+            ]
+        # MJPEG cameras: optional (K1 SE, Ender 3 V3 family) or default
+        if camera_type == "mjpeg_optional":
+            _LOGGER.info("ha_creality_ws: using cached optional camera model, attempting MJPEG for %s", host)
+        else:
+            _LOGGER.info("ha_creality_ws: using cached MJPEG camera detection for %s", host)
+        return [CrealityMjpegCamera(coord, MJPEG_URL_TEMPLATE.format(host=host))]
+
+    # Use the cached camera type; on first setup it is only known once
+    # background discovery has seen the model, so add the camera then. If
+    # discovery gives up on an unreachable printer, fall back to MJPEG.
+    added = False
+
+    def _build() -> list:
+        nonlocal added
+        camera_type = coord.capabilities.camera_type or ("mjpeg" if coord.discovery_settled else None)
+        if added or not camera_type:
+            return []
+        added = True
+        return _cameras_for(camera_type)
+
+    async_track_new_entities(hass, entry, async_add_entities, _build)
@@ -0,0 +1,206 @@
+"""Per-printer capability cache: model, feature flags and limits."""
+from __future__ import annotations
+
+import logging
+from typing import Any, Mapping
+
+from homeassistant.helpers.storage import Store  # type: ignore[import]
+
+from .const import CAPABILITY_SAVE_DELAY, CAPABILITY_STORE_VERSION, DOMAIN
+from .utils import ModelDetection
+
+_LOGGER = logging.getLogger(__name__)
+
+# Telemetry field behind each cached max temperature
+MAX_TEMP_FIELDS: dict[str, str] = {
+    "max_nozzle_temp": "maxNozzleTemp",
+    "max_bed_temp": "maxBedTemp",
+    "max_box_temp": "maxBoxTemp",
+}
+
+# Pre-store releases kept this cache in ConfigEntry.data under these keys.
+# ``_cached_mac`` stays there: the config flow matches discoveries on it.
+_LEGACY_KEYS: dict[str, str] = {
+    "_device_info_cached": "cached",
+    "_cached_version": "version",
+    "_last_ip": "last_ip",
+    "_cached_model": "model",
+    "_cached_hostname": "hostname",
+    "_cached_model_version": "model_version",
+    "_cached_has_light": "has_light",
+    "_cached_has_chamber_sensor": "has_chamber_sensor",
+    "_cached_has_chamber_control": "has_chamber_control",
+    "_cached_cfs_detected": "cfs_detected",
+    "_cached_max_bed_temp": "max_bed_temp",
+    "_cached_max_nozzle_temp": "max_nozzle_temp",
+    "_cached_max_chamber_temp": "max_chamber_temp",
+    "_cached_camera_type": "camera_type",
+}
+# Legacy box_* mirrors of the chamber keys, read only as a fallback
+_LEGACY_MIRRORS: dict[str, str] = {
+    "_cached_has_box_sensor": "has_chamber_sensor",
+    "_cached_has_box_control": "has_chamber_control",
+    "_cached_max_box_temp": "max_chamber_temp",
+}
+
+_FIELDS = (
+    "cached",
+    "version",
+    "last_ip",
+    "model",
+    "hostname",
+    "model_version",
+    "has_light",
+    "has_chamber_sensor",
+    "has_chamber_control",
+    "cfs_detected",
+    "max_bed_temp",
+    "max_nozzle_temp",
+    "max_chamber_temp",
+    "camera_type",
+)
+
+
+def _capability_store(hass, entry_id: str) -> Store:
+    return Store(hass, CAPABILITY_STORE_VERSION, f"{DOMAIN}.capabilities.{entry_id}")
+
+
+class DeviceCapabilities:
+    """What a printer is and can do, cached across restarts.
+
+    Loaded once per setup (``async_load``) and then read as plain attributes,
+    so entities never go through the config entries registry. Changes are
+    written with a delayed save to the printer's own Store rather than into
+    ``ConfigEntry.data``, which would save all config entries and fire
+    update listeners on every write.
+    """
+
+    __slots__ = _FIELDS + ("_store",)
+
+    def __init__(self, store: Store | None = None) -> None:
+        self._store = store
+        self._reset()
+
+    def _reset(self) -> None:
+        self.cached: bool = False
+        self.version: str = "0.0.0"
+        self.last_ip: str | None = None
+        self.model: str | None = None
+        self.hostname: str | None = None
+        self.model_version: str | None = None
+        self.has_light: bool = True
+        self.has_chamber_sensor: bool = False
+        self.has_chamber_control: bool = False
+        self.cfs_detected: bool = False
+        self.max_bed_temp: float | None = None
+        self.max_nozzle_temp: float | None = None
+        self.max_chamber_temp: float | None = None
+        self.camera_type: str | None = None
+
+    @classmethod
+    def for_entry(cls, hass, entry_id: str | None) -> DeviceCapabilities:
+        """Return an empty cache bound to the entry's Store (in-memory without an entry)."""
+        return cls(_capability_store(hass, entry_id) if entry_id else None)
+
+    async def async_load(self, hass, entry) -> None:
+        """Load the cache, moving a legacy ``ConfigEntry.data`` cache over once."""
+        saved = None
+        if self._store is not None:
+            try:
+                saved = await self._store.async_load()
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.warning("Capability cache not loaded, rediscovering: %s", exc)
+        if isinstance(saved, dict):
+            self._apply(saved)
+        elif self._migrate(entry.data) and self._store is not None:
+            # Written now: the legacy keys are dropped from the entry right below
+            await self._store.async_save(self.as_dict())
+
+        legacy = [k for k in (*_LEGACY_KEYS, *_LEGACY_MIRRORS) if k in entry.data]
+        if legacy:
+            data = {k: v for k, v in entry.data.items() if k not in legacy}
+            hass.config_entries.async_update_entry(entry, data=data)
+            _LOGGER.debug("Moved %d cached keys out of the config entry", len(legacy))
+
+    def _migrate(self, data: Mapping[str, Any]) -> bool:
+        found: dict[str, Any] = {}
+        for legacy, field in _LEGACY_MIRRORS.items():
+            if data.get(legacy) is not None:
+                found[field] = data[legacy]
+        for legacy, field in _LEGACY_KEYS.items():
+            if data.get(legacy) is not None:
+                found[field] = data[legacy]
+        self._apply(found)
+        return bool(found)
+
+    def _apply(self, values: Mapping[str, Any]) -> None:
+        for field in _FIELDS:
+            if field in values:
+                setattr(self, field, values[field])
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the persisted form (also used for diagnostics)."""
+        return {field: getattr(self, field) for field in _FIELDS}
+
+    def async_save_later(self) -> None:
+        """Persist after CAPABILITY_SAVE_DELAY; repeated calls coalesce in the Store."""
+        if self._store is not None:
+            self._store.async_delay_save(self.as_dict, CAPABILITY_SAVE_DELAY)
+
+    async def async_clear(self) -> None:
+        """Forget everything (memory and disk) so the next discovery starts clean."""
+        self._reset()
+        if self._store is not None:
+            await self._store.async_remove()
+
+    def max_temp(self, key: str, live: Mapping[str, Any] | None = None) -> Any:
+        """Return a max temperature (``MAX_TEMP_FIELDS`` key), cached first then live."""
+        if self.cached:
+            value = self.max_chamber_temp if key == "max_box_temp" else getattr(self, key)
+            if value is not None:
+                return value
+        return (live or {}).get(MAX_TEMP_FIELDS[key])
+
+    def set_offline_defaults(self, version: str) -> None:
+        """Mark the cache current while the printer is off; first setups get safe defaults."""
+        self.cached = True
+        self.version = version
+        if not self.model:
+            self.model = "K by Creality"
+            self.has_light = True
+            self.has_chamber_sensor = False
+            self.has_chamber_control = False
+            self.camera_type = "mjpeg"
+        self.async_save_later()
+
+    def update_from_telemetry(self, d: Mapping[str, Any], version: str) -> None:
+        """Refresh model, capabilities and limits from live telemetry ``d``."""
+        printermodel = ModelDetection(d)
+        self.cached = True
+        self.version = version
+        self.model = printermodel.resolved_model() or self.model or "K by Creality"
+        self.hostname = d.get("hostname") or self.hostname
+        self.model_version = d.get("modelVersion") or self.model_version
+        self.has_light = printermodel.has_light
+        self.has_chamber_sensor = printermodel.has_chamber_sensor
+        self.has_chamber_control = printermodel.has_chamber_control
+        # Feature Promotion: Trust telemetry over model defaults
+        # If printer reports chamber targets/temps, ENABLE capabilities
+        if "targetBoxTemp" in d:
+            self.has_chamber_control = True
+        if "boxTemp" in d or "maxBoxTemp" in d:
+            self.has_chamber_sensor = True
+        if "lightSw" in d:
+            self.has_light = True
+        self.cfs_detected = d.get("cfsConnect") == 1
+        # Max temperatures bound the target controls
+        self.max_bed_temp = d.get("maxBedTemp", self.max_bed_temp)
+        self.max_nozzle_temp = d.get("maxNozzleTemp", self.max_nozzle_temp)
+        self.max_chamber_temp = d.get("maxBoxTemp", self.max_chamber_temp)
+        # Re-detect camera type only if missing (not on every update)
+        if not self.camera_type:
+            self.camera_type = "webrtc" if (printermodel.is_k2_family or printermodel.supports_webrtc) else (
+                "mjpeg_optional" if (printermodel.is_k1_se or printermodel.is_ender_v3_family) else "mjpeg"
+            )
+            _LOGGER.info("Camera type detected: %s", self.camera_type)
+        self.async_save_later()
@@ -0,0 +1,58 @@
+"""JSON codec for the WebSocket hot path (orjson decoding when installed, stdlib otherwise)."""
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Callable, NamedTuple
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = ["JsonCodec", "available_codecs", "get_codec"]
+
+
+class JsonCodec(NamedTuple):
+    """Decoder/encoder pair; ``dumps`` always returns ``str`` (text WS frames)."""
+
+    name: str
+    loads: Callable[[str | bytes], Any]
+    dumps: Callable[[Any], str]
+
+
+def _stdlib_codec() -> JsonCodec:
+    # Default separators: the exact frames the firmware has always received
+    return JsonCodec("json", json.loads, json.dumps)
+
+
+def _orjson_codec() -> JsonCodec | None:
+    try:
+        import orjson  # type: ignore[import]  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    # Incoming frames are the hot path; outgoing commands are few and keep
+    # the stdlib encoding so the wire format never depends on orjson
+    return JsonCodec("orjson", orjson.loads, json.dumps)
+
+
+def available_codecs() -> list[str]:
+    """Return the names of codecs usable in this environment."""
+    names = ["json"]
+    if _orjson_codec() is not None:
+        names.insert(0, "orjson")
+    return names
+
+
+def get_codec(name: str = "auto") -> JsonCodec:
+    """Return the codec called ``name``.
+
+    ``auto`` prefers orjson (bundled with Home Assistant) for decoding and
+    falls back to the stdlib. Asking for an unavailable codec logs and falls back too.
+    """
+    if name in ("auto", "orjson"):
+        codec = _orjson_codec()
+        if codec is not None:
+            return codec
+        if name == "orjson":
+            _LOGGER.warning("orjson requested but not installed; using stdlib json")
+    elif name != "json":
+        _LOGGER.warning("Unknown JSON codec %r; using stdlib json", name)
+    return _stdlib_codec()
@@ -0,0 +1,220 @@
+"""Durable queue for control commands the printer cannot take right now."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable, Mapping, Optional
+
+from .const import COMMAND_QUEUE_TTL, COMMAND_RETRY_MAX, COMMAND_RETRY_MIN
+
+_LOGGER = logging.getLogger(__name__)
+
+Action = Callable[[], Awaitable[Any]]
+Precondition = Callable[[Mapping[str, Any]], bool]
+
+
+class QueuedCommand:
+    """One queued command; see CommandQueue.add."""
+
+    __slots__ = (
+        "name", "action", "precondition", "watch", "expires_at", "on_expire", "attempts", "next_try"
+    )
+
+    def __init__(
+        self,
+        name: str,
+        action: Action,
+        precondition: Precondition,
+        watch: frozenset[str],
+        expires_at: float,
+        on_expire: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.name = name
+        self.action = action
+        self.precondition = precondition
+        self.watch = watch
+        self.expires_at = expires_at
+        self.on_expire = on_expire
+        self.attempts = 0
+        self.next_try = 0.0
+
+
+class CommandQueue:
+    """Hold commands until their precondition holds, then send them in order.
+
+    Commands are keyed by name: queueing a name that is already waiting
+    replaces it (latest wins), so repeated presses or slider moves while the
+    printer is busy send once. Each command names the telemetry keys its
+    precondition depends on; the owner calls ``wants(delta)`` and only
+    kicks a flush when one of those keys changed. Failed sends back off
+    exponentially (COMMAND_RETRY_MIN..COMMAND_RETRY_MAX) on a loop timer,
+    which also carries the queue across a WebSocket outage; the owner calls
+    ``retry_now()`` once the link is back.
+    Commands older than their TTL are dropped. ``on_change`` runs whenever
+    a command is queued or leaves the queue.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        state: Callable[[], Mapping[str, Any]],
+        ttl: float = COMMAND_QUEUE_TTL,
+        on_change: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._loop = loop
+        self._state = state
+        self._ttl = ttl
+        self._on_change = on_change
+        self._entries: dict[str, QueuedCommand] = {}
+        self._watch: frozenset[str] = frozenset()
+        self._task: Optional[asyncio.Task] = None
+        self._rerun = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Diagnostics
+        self.sent = 0
+        self.replaced = 0
+        self.expired = 0
+        self.retries = 0
+
+    def __contains__(self, name: object) -> bool:
+        cmd = self._entries.get(name)  # type: ignore[arg-type]
+        return cmd is not None and self._loop.time() < cmd.expires_at
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def names(self) -> list[str]:
+        """Return the names of queued commands, oldest first."""
+        return list(self._entries)
+
+    def add(
+        self,
+        name: str,
+        action: Action,
+        precondition: Precondition,
+        watch: Iterable[str],
+        ttl: Optional[float] = None,
+        delay: float = 0.0,
+        on_expire: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Queue ``action`` under ``name``, replacing a waiting command of that name.
+
+        ``delay`` holds off the first attempt (e.g. after a send just failed).
+        ``on_expire`` runs if the command is dropped unsent after its TTL.
+        """
+        if self._entries.pop(name, None) is not None:
+            self.replaced += 1
+        now = self._loop.time()
+        expires_at = now + (self._ttl if ttl is None else ttl)
+        cmd = QueuedCommand(name, action, precondition, frozenset(watch), expires_at, on_expire)
+        cmd.next_try = now + delay
+        self._entries[name] = cmd
+        self._rebuild_watch()
+        self._changed()
+        self.kick()
+
+    def discard(self, name: str) -> None:
+        """Drop a waiting command, if any."""
+        if self._entries.pop(name, None) is not None:
+            self._rebuild_watch()
+            self._changed()
+
+    def clear(self) -> None:
+        """Drop everything and stop the retry timer."""
+        had_entries = bool(self._entries)
+        self._entries.clear()
+        self._watch = frozenset()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if had_entries:
+            self._changed()
+
+    def wants(self, keys: Iterable[str]) -> bool:
+        """Return True if a change to ``keys`` may unblock a queued command."""
+        return bool(self._entries) and not self._watch.isdisjoint(keys)
+
+    def kick(self) -> None:
+        """Evaluate the queue soon, off the caller's path."""
+        if not self._entries:
+            return
+        if self._task is not None and not self._task.done():
+            self._rerun = True
+            return
+        self._task = self._loop.create_task(self._flush(), name="K-command-queue")
+
+    def retry_now(self) -> None:
+        """Forget retry backoff (the link is back) and evaluate the queue."""
+        for cmd in self._entries.values():
+            cmd.next_try = 0.0
+        self.kick()
+
+    async def _flush(self) -> None:
+        self._rerun = True
+        while self._rerun:
+            self._rerun = False
+            await self._flush_once()
+        self._arm()
+
+    async def _flush_once(self) -> None:
+        before = len(self._entries)
+        for name, cmd in list(self._entries.items()):
+            if self._entries.get(name) is not cmd:
+                continue  # replaced or discarded while we were sending
+            now = self._loop.time()
+            if now >= cmd.expires_at:
+                del self._entries[name]
+                self.expired += 1
+                _LOGGER.debug("Queued %s expired unsent", name)
+                if cmd.on_expire is not None:
+                    cmd.on_expire()
+                continue
+            if now < cmd.next_try:
+                continue
+            try:
+                ready = cmd.precondition(self._state())
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Precondition for queued %s failed", name)
+                ready = False
+            if not ready:
+                continue
+            try:
+                await cmd.action()
+            except Exception as exc:  # pylint: disable=broad-except
+                cmd.attempts += 1
+                self.retries += 1
+                delay = min(COMMAND_RETRY_MAX, COMMAND_RETRY_MIN * 2 ** (cmd.attempts - 1))
+                cmd.next_try = self._loop.time() + delay
+                _LOGGER.warning("Queued %s failed; retrying in %.0fs. Error: %s", name, delay, exc)
+                continue
+            if self._entries.get(name) is cmd:
+                del self._entries[name]
+            self.sent += 1
+            _LOGGER.debug("Queued %s executed", name)
+        self._rebuild_watch()
+        if len(self._entries) != before:
+            self._changed()
+
+    def _arm(self) -> None:
+        """Wake up for the earliest retry or expiry; state changes come via kick()."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._entries:
+            return
+        now = self._loop.time()
+        at = min(
+            cmd.next_try if cmd.next_try > now else cmd.expires_at
+            for cmd in self._entries.values()
+        )
+        self._timer = self._loop.call_at(at, self.kick)
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change()
+
+    def _rebuild_watch(self) -> None:
+        watch: set[str] = set()
+        for cmd in self._entries.values():
+            watch.update(cmd.watch)
+        self._watch = frozenset(watch)
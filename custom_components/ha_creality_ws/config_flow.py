@@ -32,6 +32,8 @@ from .const import (
     CONF_MINUTES_TO_END_VALUE,
     CONF_POLLING_RATE,
     DEFAULT_POLLING_RATE,
+    CONF_WRITE_DEBOUNCE,
+    DEFAULT_WRITE_DEBOUNCE,
 )
 from .utils import ModelDetection
 
@@ -128,7 +130,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         )
                         self.hass.config_entries.async_update_entry(
                             entry, 
-                            data={**entry.data, CONF_HOST: host, "_last_ip": host}
+                            data={**entry.data, CONF_HOST: host}
                         )
                         self.hass.async_create_task(
                             self.hass.config_entries.async_reload(entry.entry_id)
@@ -278,6 +280,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         notify_minutes_to_end = self._entry.options.get(CONF_NOTIFY_MINUTES_TO_END, False)
         minutes_to_end_value = self._entry.options.get(CONF_MINUTES_TO_END_VALUE, 5)
         polling_rate = self._entry.options.get(CONF_POLLING_RATE, DEFAULT_POLLING_RATE)
+        write_debounce = self._entry.options.get(CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE)
 
         
         # Build list of notify services for the selector
@@ -350,6 +353,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         schema_dict.update({
              vol.Optional(CONF_POLLING_RATE, default=polling_rate): selector.NumberSelector(
                 selector.NumberSelectorConfig(min=0, max=60, mode=selector.NumberSelectorMode.BOX, unit_of_measurement="sec")
+            ),
+             vol.Optional(CONF_WRITE_DEBOUNCE, default=write_debounce): selector.NumberSelector(
+                selector.NumberSelectorConfig(min=0, max=5, step=0.1, mode=selector.NumberSelectorMode.BOX, unit_of_measurement="sec")
             ),
              vol.Optional(CONF_NOTIFY_DEVICE, default=notify_device or vol.UNDEFINED): selector.SelectSelector(
                 selector.SelectSelectorConfig(
@@ -38,6 +38,78 @@ RETRY_MAX_BACKOFF = 300.0
 RETRY_BACKOFF_MULTIPLIER = 1.8
 HEARTBEAT_SECS = 10.0
 PROBE_ON_SILENCE_SECS = 10.0
+# Frames buffered between the WS reader and the consumer before coalescing
+FRAME_QUEUE_MAX = 64
+# Background GETs/probes allowed to wait in the writer's poll lane (oldest dropped)
+POLL_LANE_MAX = 8
+# Set commands issued within this window (seconds) go out together
+SET_COALESCE_WINDOW = 0.05
+# Set params the firmware accepts together in one {"method":"set"} frame;
+# anything else is pipelined as separate frames. Only add verified keys.
+SET_MERGEABLE_KEYS = frozenset({"setFeedratePct", "setFlowratePct"})
+
+# Command tracking: seconds a set command may take to show up in telemetry
+# before it counts as unconfirmed, and latency samples kept per command type
+COMMAND_ACK_TIMEOUT = 10.0
+COMMAND_LATENCY_SAMPLES = 50
+
+# Command queue: seconds a queued control command stays valid, and the
+# retry backoff range after a failed send
+COMMAND_QUEUE_TTL = 300.0
+# Stop and homing: a motion command sent late is worse than one not sent
+COMMAND_MOTION_TTL = 30.0
+COMMAND_RETRY_MIN = 1.0
+COMMAND_RETRY_MAX = 30.0
+
+# Seconds an optimistic control value is shown before telemetry must confirm it
+OPTIMISTIC_TTL = 15.0
+# Listener key woken when the command queue or the cadence profile changes
+CONTROL_STATE_KEY = "control:state"
+
+# Dispatcher signal (format with entry_id) telling platforms to add entities
+# that telemetry has just confirmed (CFS boxes, chamber, light, camera)
+SIGNAL_NEW_ENTITIES = DOMAIN + "_new_entities_{entry_id}"
+# Seconds background discovery waits for the first connection before
+# platforms fall back to defaults (discovery still completes on connect)
+DISCOVERY_CONNECT_TIMEOUT = 30.0
+
+# Last-known telemetry snapshot (HA storage) for warm starts: storage version,
+# delay that coalesces snapshot writes, and how long restored values are
+# shown without a live connection
+SNAPSHOT_STORE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60.0
+RESTORE_GRACE_SECS = 120.0
+
+# Device capability cache (HA storage, one file per printer) and the delay
+# that coalesces its writes
+CAPABILITY_STORE_VERSION = 1
+CAPABILITY_SAVE_DELAY = 10.0
+
+# Host name resolution cache (seconds)
+RESOLVE_POSITIVE_TTL = 300.0
+RESOLVE_NEGATIVE_TTL = 30.0
+RESOLVE_TIMEOUT = 5.0
+# JSON codec for WS frames: "auto" (orjson if installed), "orjson" or "json"
+JSON_CODEC = "auto"
+
+# ---- Periodic GET cadence profiles ----
+# Seconds between each GET per printer activity; None disables the request.
+CADENCE_PRINTING = "printing"
+CADENCE_BUSY = "busy"          # homing / self-test
+CADENCE_PAUSED = "paused"
+CADENCE_IDLE = "idle"
+CADENCE_STANDBY = "standby"    # idle for STANDBY_AFTER_SECS
+CADENCE_PROFILES: dict[str, dict[str, float | None]] = {
+    CADENCE_PRINTING: {"ReqPrinterPara": 5.0, "reqPrintObjects": 2.0, "boxsInfo": 300.0},
+    CADENCE_BUSY: {"ReqPrinterPara": 2.0, "reqPrintObjects": None, "boxsInfo": 300.0},
+    CADENCE_PAUSED: {"ReqPrinterPara": 5.0, "reqPrintObjects": 10.0, "boxsInfo": 300.0},
+    CADENCE_IDLE: {"ReqPrinterPara": 5.0, "reqPrintObjects": None, "boxsInfo": 300.0},
+    # Near-silent: the heartbeat still probes a quiet connection; CFS humidity refreshes hourly
+    CADENCE_STANDBY: {"ReqPrinterPara": None, "reqPrintObjects": None, "boxsInfo": 3600.0},
+}
+# Used until the coordinator has seen enough telemetry to pick a profile
+DEFAULT_CADENCE = CADENCE_PRINTING
+STANDBY_AFTER_SECS = 600
 
 # go2rtc defaults
 DEFAULT_GO2RTC_URL = "localhost"
@@ -53,6 +125,10 @@ CONF_MINUTES_TO_END_VALUE = "minutes_to_end_value"
 CONF_POLLING_RATE = "polling_rate"
 DEFAULT_POLLING_RATE = 0  # Real-time
 
+# Quiet period (seconds) before the final slider value is written; 0 = every change
+CONF_WRITE_DEBOUNCE = "write_debounce"
+DEFAULT_WRITE_DEBOUNCE = 0.5
+
 # Moonraker defaults
 MR_PORT = 7125
 MR_POLL_INTERVAL = 30
@@ -3,15 +3,37 @@ from __future__ import annotations
 import logging
 import asyncio
 import json
-from typing import Any, Iterable
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Iterable, Mapping
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator  # type: ignore[import]
 from homeassistant.helpers.aiohttp_client import async_get_clientsession  # type: ignore[import]
 from homeassistant.helpers.dispatcher import async_dispatcher_send  # type: ignore[import]
+from homeassistant.helpers.storage import Store  # type: ignore[import]
 from .ws_client import KClient
+from .capabilities import DeviceCapabilities
+from .command_queue import CommandQueue
+from .telemetry import CfsDiff, DerivedValues, TelemetrySnapshot
+from .tracker import command_stats_key
 from .utils import ModelDetection
 from .const import (
     DOMAIN,
     STALE_AFTER_SECS,
+    CADENCE_BUSY,
+    CADENCE_IDLE,
+    CADENCE_PAUSED,
+    CADENCE_PRINTING,
+    CADENCE_STANDBY,
+    STANDBY_AFTER_SECS,
+    COMMAND_MOTION_TTL,
+    COMMAND_QUEUE_TTL,
+    COMMAND_RETRY_MIN,
+    CONTROL_STATE_KEY,
+    OPTIMISTIC_TTL,
+    SIGNAL_NEW_ENTITIES,
+    SNAPSHOT_STORE_VERSION,
+    SNAPSHOT_SAVE_DELAY,
+    RESTORE_GRACE_SECS,
     CONF_NOTIFY_DEVICE,
     CONF_NOTIFY_COMPLETED,
     CONF_NOTIFY_ERROR,
@@ -19,6 +41,8 @@ from .const import (
     CONF_MINUTES_TO_END_VALUE,
     CONF_POLLING_RATE,
     DEFAULT_POLLING_RATE,
+    CONF_WRITE_DEBOUNCE,
+    DEFAULT_WRITE_DEBOUNCE,
     MR_PORT,
     MR_POLL_INTERVAL,
     MR_POLL_TIMEOUT,
@@ -27,6 +51,38 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# Telemetry keys that can move the printer between cadence profiles
+_CADENCE_KEYS = frozenset({
+    "state", "deviceState", "printFileName", "printProgress", "dProgress",
+    "withSelfTest", "pause", "paused", "isPaused",
+})
+
+# Telemetry keys that decide whether the printer can take a control command
+_READY_KEYS = frozenset({"deviceState", "withSelfTest"})
+
+
+# Fast-moving values that are meaningless after a restart; kept out of snapshots
+_SNAPSHOT_SKIP_KEYS = frozenset({"curPosition", "realTimeFlow", "realTimeSpeed"})
+
+
+def _snapshot_store(hass, entry_id: str) -> Store:
+    return Store(hass, SNAPSHOT_STORE_VERSION, f"{DOMAIN}.snapshot.{entry_id}")
+
+
+async def async_remove_snapshot(hass, entry_id: str) -> None:
+    """Delete the persisted telemetry snapshot of a removed config entry."""
+    await _snapshot_store(hass, entry_id).async_remove()
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    """Compare a written value with its telemetry echo (numbers may come back as floats)."""
+    if a == b:
+        return True
+    try:
+        return abs(float(a) - float(b)) < 0.5
+    except (TypeError, ValueError):
+        return False
+
 
 class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
     """Coordinator to manage connection and data for the printer."""
@@ -35,12 +91,35 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
     ):
         super().__init__(hass, _LOGGER, name=f"{DOMAIN}@{host}", update_interval=None)
         self.client = KClient(host, self._handle_message)
-        self.data: dict[str, Any] = {}
+        self.client.on_commands_expired = self._handle_expired_commands
+        # Merged telemetry as sent (plain dict); data.numbers holds typed hot fields
+        self.data: TelemetrySnapshot = TelemetrySnapshot()
+        # Position, progress, error code... memoized until their source keys change
+        self.derived = DerivedValues(lambda: self.data)
         self._paused_flag = False
         self._last_avail = False
         self._power_switch_entity: str | None = (power_switch or "").strip() or None
-        self._pending_pause = False
-        self._pending_resume = False
+        # Optimistic overlay: key -> (value, loop time it lapses); never written to data
+        self._optimistic: dict[str, tuple[Any, float]] = {}
+        self._optimistic_timer: asyncio.TimerHandle | None = None
+        # Last-known telemetry persisted for warm starts (see async_restore_snapshot)
+        self._snapshot_store: Store | None = (
+            _snapshot_store(hass, config_entry_id) if config_entry_id else None
+        )
+        self._snapshot_pending = False
+        # Model, feature flags and limits; loaded in setup, read by entities
+        self.capabilities = DeviceCapabilities.for_entry(hass, config_entry_id)
+        # Set once background discovery finished or gave up waiting for the printer
+        self.discovery_settled = False
+        # Loop time until which restored (not yet live) data is shown; 0 once live
+        self._restored_until = 0.0
+        self.restored_at: float | None = None
+        # wait_for_fields() waiters: (missing keys, future) resolved from the merge step
+        self._field_waiters: list[tuple[set[str], asyncio.Future[None]]] = []
+        # Control commands waiting for the printer (reconnecting, homing, wrong state)
+        self._commands = CommandQueue(hass.loop, lambda: self.data, on_change=self._control_state_changed)
+        # client.reconnect_count of the connection the last frame came from
+        self._connection_seen = 0
         self._last_power_off: bool = False
         self._config_entry_id: str | None = config_entry_id  # Will be set after entry is created
         
@@ -51,7 +130,22 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         self._notify_minutes_to_end = False
         self._minutes_to_end_value = 5
         self._polling_rate = DEFAULT_POLLING_RATE
+        self.write_debounce: float = DEFAULT_WRITE_DEBOUNCE
         self._last_update_ts = 0.0
+        self._frame_version = 0
+
+        # Key-scoped listeners: telemetry key -> callbacks woken when it changes
+        self._key_listeners: dict[str, set[Callable[[], None]]] = {}
+        self._keyed_callbacks: dict[Callable[[], None], frozenset[str]] = {}
+        # Keys changed since listeners were last notified (survives throttling)
+        self._pending_keys: set[str] = set()
+        # Entity state writes made vs. skipped as unchanged (see KEntity), and
+        # full broadcasts, which always write
+        self.state_writes = 0
+        self.state_writes_skipped = 0
+        self.broadcast_count = 0
+        # Loop time the printer went idle (None while active); drives standby
+        self._idle_since: float | None = None
         
         # Notification state tracking
         self._last_print_state = None
@@ -93,6 +187,7 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         self._notify_minutes_to_end = options.get(CONF_NOTIFY_MINUTES_TO_END, False)
         self._minutes_to_end_value = options.get(CONF_MINUTES_TO_END_VALUE, 5)
         self._polling_rate = options.get(CONF_POLLING_RATE, DEFAULT_POLLING_RATE)
+        self.write_debounce = float(options.get(CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE))
         
         # Pass polling rate to client if relevant, or handle here
         _LOGGER.debug(
@@ -163,10 +258,12 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         
     async def async_stop(self) -> None:
         """Stop the WebSocket connection."""
+        self._commands.clear()
+        self.clear_optimistic()
         await self.client.stop()
         
-    async def wait_first_connect(self, timeout: float = 5.0) -> bool:
-        """Wait for the first successful connection."""
+    async def wait_first_connect(self, timeout: float | None = 5.0) -> bool:
+        """Wait for the first successful connection (forever when timeout is None)."""
         return await self.client.wait_first_connect(timeout=timeout)
     
     async def wait_for_fields(self, fields: Iterable[str], timeout: float = 6.0) -> bool:
@@ -179,21 +276,32 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         Returns:
             True if all fields were observed before timeout, False otherwise.
         """
+        missing = {str(f) for f in fields} - (self.data or {}).keys()
+        if not missing:
+            return True
+        # Resolved by _handle_message on the frame that delivers the last key
+        waiter = (missing, self.hass.loop.create_future())
+        self._field_waiters.append(waiter)
         try:
-            end = self.hass.loop.time() + max(0.0, float(timeout))
-            needed = {str(f) for f in fields}
-            # Fast path check
-            if needed.issubset((self.data or {}).keys()):
-                return True
-            # Poll lightly; on_message updates self.data frequently when streaming starts
-            while self.hass.loop.time() < end:
-                if needed.issubset((self.data or {}).keys()):
-                    return True
-                await asyncio.sleep(0.2)
-        except Exception:
+            await asyncio.wait_for(waiter[1], timeout=max(0.0, float(timeout)))
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except Exception:  # pylint: disable=broad-except
             # Never raise from a helper wait; just indicate timeout/False.
-            pass
-        return False
+            return False
+        finally:
+            if waiter in self._field_waiters:
+                self._field_waiters.remove(waiter)
+
+    def _wake_field_waiters(self, payload: dict[str, Any]) -> None:
+        """Resolve wait_for_fields() callers whose last missing key just arrived."""
+        for missing, fut in self._field_waiters:
+            if missing.isdisjoint(payload):
+                continue
+            missing.difference_update(payload)
+            if not missing and not fut.done():
+                fut.set_result(None)
         
     async def async_handle_power_change(self) -> None:
         """Start/stop WS client when the power switch toggles."""
@@ -207,6 +315,8 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         
         if now_off and not was_off:
             _LOGGER.info("Power OFF detected; stopping WebSocket client")
+            self._commands.clear()
+            self.clear_optimistic()
             await self.client.stop()
             self._last_power_off = True
         elif not now_off and was_off:
@@ -228,12 +338,177 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         # Pass the callable itself (no parens); the loop invokes it safely.
         self.hass.loop.call_soon_threadsafe(self.async_update_listeners)
 
+    # -------- Key-scoped listeners --------
+    def async_add_key_listener(
+        self, keys: Iterable[str], update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Register a callback that is woken only when one of ``keys`` changes.
+
+        Key-scoped callbacks still receive full broadcasts from
+        async_update_listeners (availability, power, pause flag).
+
+        Returns:
+            Callable that removes the listener.
+        """
+        watched = frozenset(keys)
+        self._keyed_callbacks[update_callback] = watched
+        for key in watched:
+            self._key_listeners.setdefault(key, set()).add(update_callback)
+
+        def _remove() -> None:
+            self._keyed_callbacks.pop(update_callback, None)
+            for key in watched:
+                cbs = self._key_listeners.get(key)
+                if cbs is not None:
+                    cbs.discard(update_callback)
+                    if not cbs:
+                        del self._key_listeners[key]
+
+        return _remove
+
+    def async_update_listeners(self) -> None:
+        """Broadcast to every listener, including key-scoped ones."""
+        self.broadcast_count += 1
+        super().async_update_listeners()
+        for update_callback in list(self._keyed_callbacks):
+            update_callback()
+
+    def async_update_key_listeners(self, keys: Iterable[str]) -> None:
+        """Wake the key-scoped listeners of changed ``keys``.
+
+        Catch-all listeners are left alone; they only hear broadcasts from
+        async_update_listeners (availability, power, pause flag).
+        """
+        woken: set[Callable[[], None]] = set()
+        for key in keys:
+            cbs = self._key_listeners.get(key)
+            if cbs:
+                woken.update(cbs)
+        for update_callback in woken:
+            update_callback()
+
+    def _control_state_changed(self) -> None:
+        """Refresh entities showing the command queue or cadence profile."""
+        self.async_update_key_listeners((CONTROL_STATE_KEY,))
+
+    def _handle_expired_commands(self, commands: set[str]) -> None:
+        """Refresh latency sensors of commands the printer never confirmed."""
+        self.async_update_key_listeners(command_stats_key(c) for c in commands)
+
+    # -------- Optimistic overlay --------
+    def get_value(self, key: str, default: Any = None) -> Any:
+        """Return the optimistic value for ``key`` if one is pending, else telemetry."""
+        pending = self._optimistic.get(key)
+        if pending is not None:
+            return pending[0]
+        return self.data.get(key, default)
+
+    def set_optimistic(self, values: dict[str, Any], ttl: float = OPTIMISTIC_TTL) -> None:
+        """Show ``values`` before telemetry confirms them.
+
+        Each value is dropped when telemetry reports it (confirmed) or when
+        ``ttl`` lapses without that (rolled back to telemetry). Only listeners
+        of the given keys are woken.
+        """
+        expires = self.hass.loop.time() + ttl
+        for key, value in values.items():
+            self._optimistic[key] = (value, expires)
+        self._arm_optimistic_timer()
+        self.async_update_key_listeners(values)
+
+    def clear_optimistic(self, keys: Iterable[str] | None = None) -> None:
+        """Roll back pending optimistic values (all when ``keys`` is None)."""
+        if keys is None:
+            keys = list(self._optimistic)
+        dropped = [k for k in keys if self._optimistic.pop(k, None) is not None]
+        if not self._optimistic and self._optimistic_timer is not None:
+            self._optimistic_timer.cancel()
+            self._optimistic_timer = None
+        if dropped:
+            self.async_update_key_listeners(dropped)
+
+    def _reconcile_optimistic(self, payload: dict[str, Any]) -> None:
+        """Drop optimistic values that telemetry now confirms.
+
+        A differing value is not a rollback by itself: the printer may still
+        echo the old target before it applies the command. The TTL decides.
+        """
+        for key in [k for k in self._optimistic if k in payload]:
+            if _same_value(self._optimistic[key][0], payload[key]):
+                del self._optimistic[key]
+
+    def _expire_optimistic(self) -> None:
+        self._optimistic_timer = None
+        now = self.hass.loop.time()
+        expired = [k for k, (_, at) in self._optimistic.items() if at <= now]
+        for key in expired:
+            del self._optimistic[key]
+        if expired:
+            _LOGGER.debug("Optimistic values not confirmed in time, rolled back: %s", expired)
+            self.async_update_key_listeners(expired)
+        self._arm_optimistic_timer()
+
+    def _arm_optimistic_timer(self) -> None:
+        if self._optimistic_timer is not None:
+            self._optimistic_timer.cancel()
+            self._optimistic_timer = None
+        if self._optimistic:
+            at = min(at for _, at in self._optimistic.values())
+            self._optimistic_timer = self.hass.loop.call_at(at, self._expire_optimistic)
+
+    # -------- Snapshot persistence --------
+    async def async_restore_snapshot(self) -> bool:
+        """Seed data from the last persisted snapshot before the first connect.
+
+        Restored values are stale: entities show them (instead of zeros) for
+        up to RESTORE_GRACE_SECS or until the first live frame, and live
+        frames overwrite them key by key.
+        """
+        if self._snapshot_store is None or self.data:
+            return False
+        try:
+            saved = await self._snapshot_store.async_load()
+        except Exception as exc:  # pylint: disable=broad-except
+            _LOGGER.debug("Telemetry snapshot not restored: %s", exc)
+            return False
+        if not isinstance(saved, dict) or not isinstance(saved.get("data"), dict):
+            return False
+        self.data.update(saved["data"])
+        self.derived.invalidate()
+        self.restored_at = saved.get("saved_at")
+        self._restored_until = self.hass.loop.time() + RESTORE_GRACE_SECS
+        _LOGGER.debug("Restored %d telemetry keys from snapshot", len(saved["data"]))
+        return True
+
+    def showing_restored(self) -> bool:
+        """Return True while restored snapshot data stands in for live telemetry."""
+        return self._restored_until > 0 and self.hass.loop.time() < self._restored_until
+
+    def _schedule_snapshot_save(self) -> None:
+        # One pending delayed save at a time: re-arming on every frame would
+        # postpone the write forever while telemetry streams
+        if self._snapshot_store is None or self._snapshot_pending:
+            return
+        self._snapshot_pending = True
+        self._snapshot_store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+
+    def _snapshot_data(self) -> dict[str, Any]:
+        """Build the snapshot; Store serializes and writes it in the executor."""
+        self._snapshot_pending = False
+        return {
+            "saved_at": time.time(),
+            "data": {k: v for k, v in self.data.items() if k not in _SNAPSHOT_SKIP_KEYS},
+        }
+
     def check_stale(self) -> None:
         """Called by periodic timer; may run off the event loop."""
-        now_avail = self.available
+        now_avail = self.available or self.showing_restored()
         if now_avail != getattr(self, "_last_avail", None):
             self._last_avail = now_avail
             self._notify_listeners_threadsafe()
+        # Idle -> standby is time-driven, not telemetry-driven
+        if self._idle_since is not None and self.client.cadence_profile == CADENCE_IDLE:
+            self.hass.loop.call_soon_threadsafe(self._update_cadence_profile)
 
     @property
     def available(self) -> bool:
@@ -250,10 +525,14 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         return self._paused_flag
 
     def pending_pause(self) -> bool:
-        return bool(self._pending_pause)
+        return "pause" in self._commands
 
     def pending_resume(self) -> bool:
-        return bool(self._pending_resume)
+        return "resume" in self._commands
+
+    def queued_commands(self) -> list[str]:
+        """Return the names of control commands waiting to be sent."""
+        return self._commands.names()
 
     # -------- State helpers --------
     def _is_busy_homing(self) -> bool:
@@ -262,15 +541,39 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
     def _has_active_job(self) -> bool:
         """Check if a print job is active."""
-        d = self.data or {}
-        fname = (d.get("printFileName") or "").strip()
-        prog = d.get("printProgress", d.get("dProgress"))
-        return bool(fname) and prog is not None
+        return self.derived.has_job
 
     def _is_printing(self) -> bool:
         """Check if printer is actively printing (has job, not paused, not homing)."""
         return self._has_active_job() and not self._paused_flag and not self._is_busy_homing()
 
+    def _printer_ready(self, d: Mapping[str, Any]) -> bool:
+        """Default command precondition: not homing and not self-testing."""
+        return d.get("deviceState") != 7 and not 1 <= (d.get("withSelfTest") or 0) <= 99
+
+    def _select_cadence_profile(self) -> str:
+        """Pick the periodic GET cadence profile for the current telemetry."""
+        d = self.data or {}
+        if self._is_busy_homing() or self.derived.self_testing:
+            return CADENCE_BUSY
+        if self._has_active_job() and self.derived.progress_pct < 100 and d.get("state") != 4:
+            return CADENCE_PAUSED if self._paused_flag else CADENCE_PRINTING
+        now = self.hass.loop.time()
+        if self._idle_since is None:
+            self._idle_since = now
+        if now - self._idle_since >= STANDBY_AFTER_SECS:
+            return CADENCE_STANDBY
+        return CADENCE_IDLE
+
+    def _update_cadence_profile(self) -> None:
+        """Apply the selected cadence profile to the client."""
+        profile = self._select_cadence_profile()
+        if profile not in (CADENCE_IDLE, CADENCE_STANDBY):
+            self._idle_since = None
+        if profile != self.client.cadence_profile:
+            self.client.set_cadence_profile(profile)
+            self._control_state_changed()
+
     def _recompute_paused_from_telemetry(self) -> None:
         """Update paused state from telemetry data."""
         d = self.data or {}
@@ -280,52 +583,178 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         self.mark_paused(telem_paused)
 
     # -------- Queued actions --------
-    async def request_pause(self) -> None:
-        """Pause now if printable; otherwise queue until printable."""
-        if self._is_printing():
+    async def request_command(
+        self,
+        name: str,
+        params: dict[str, Any] | None = None,
+        *,
+        action: Callable[[], Awaitable[Any]] | None = None,
+        precondition: Callable[[Mapping[str, Any]], bool] | None = None,
+        watch: Iterable[str] = _READY_KEYS,
+        coalesce: bool = False,
+        ttl: float | None = None,
+        delay: float = 0.0,
+        optimistic: dict[str, Any] | None = None,
+    ) -> bool:
+        """Send a control command now if the printer can take it, else queue it.
+
+        Args:
+            name: Queue key; a newer command with the same name replaces a
+                waiting one.
+            params: Set params, sent with send_set_retry (or
+                send_set_coalesced when ``coalesce`` and sent right away).
+            action: Coroutine factory to run instead of ``params``.
+            precondition: Predicate on telemetry; defaults to "not homing or
+                self-testing".
+            watch: Telemetry keys the precondition depends on.
+            ttl: Seconds the command may wait in the queue (COMMAND_QUEUE_TTL
+                by default).
+            delay: Queue without trying now, first attempt after ``delay``.
+            optimistic: Telemetry values to show before the printer confirms
+                them (see set_optimistic). Held while the command is queued,
+                rolled back if it expires there.
+
+        Returns:
+            True if sent immediately, False if queued (or dropped because the
+            printer is powered off).
+        """
+        if self.power_is_off():
+            _LOGGER.warning("Cannot send %s: printer power is off", name)
+            return False
+        if action is None:
+            send = self.client.send_set_coalesced if coalesce else self.client.send_set_retry
+            action = partial(send, **(params or {}))
+            queued = partial(self.client.send_set_retry, **(params or {}))
+        else:
+            queued = action
+        precondition = precondition or self._printer_ready
+        if delay > 0:
+            self._queue_command(name, queued, precondition, watch, ttl, delay, optimistic)
+            return False
+        if precondition(self.data or {}):
+            if optimistic:
+                self.set_optimistic(optimistic)
             try:
-                await self.client.send_set_retry(pause=1)
-                _LOGGER.debug("Pause sent immediately")
-            except Exception as exc:
-                self._pending_pause = True
-                _LOGGER.warning("Pause send failed; queued. Error: %s", exc)
+                await action()
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.warning("%s send failed; queued. Error: %s", name, exc)
+                self._queue_command(
+                    name, queued, precondition, watch, ttl, COMMAND_RETRY_MIN, optimistic
+                )
+                return False
+            else:
+                self._commands.discard(name)
+                _LOGGER.debug("%s sent immediately", name)
+                return True
         else:
-            self._pending_pause = True
-            _LOGGER.debug("Pause queued (not in printable state)")
+            _LOGGER.debug("%s queued (printer not ready)", name)
+        self._queue_command(name, queued, precondition, watch, ttl, 0.0, optimistic)
+        return False
+
+    def _queue_command(
+        self,
+        name: str,
+        action: Callable[[], Awaitable[Any]],
+        precondition: Callable[[Mapping[str, Any]], bool],
+        watch: Iterable[str],
+        ttl: float | None,
+        delay: float,
+        optimistic: dict[str, Any] | None,
+    ) -> None:
+        if not optimistic:
+            self._commands.add(name, action, precondition, watch, ttl, delay)
+            return
+        values = dict(optimistic)
+
+        async def _send_then_confirm() -> None:
+            await action()
+            # Sent at last: telemetry now has the usual OPTIMISTIC_TTL to confirm
+            self.set_optimistic(values)
+
+        # Keep the overlay for as long as the command may wait, not OPTIMISTIC_TTL
+        self.set_optimistic(values, ttl=COMMAND_QUEUE_TTL if ttl is None else ttl)
+        self._commands.add(
+            name, _send_then_confirm, precondition, watch, ttl, delay,
+            on_expire=partial(self.clear_optimistic, list(values)),
+        )
+
+    async def request_pause(self) -> None:
+        """Pause now if printable; otherwise queue until printable."""
+        await self.request_command(
+            "pause", {"pause": 1}, precondition=lambda _d: self._is_printing(), watch=_CADENCE_KEYS
+        )
 
     async def request_resume(self) -> None:
         """Resume now if telemetry shows paused; otherwise queue until paused shows up."""
-        if self._paused_flag:
-            try:
-                await self.client.send_set_retry(pause=0)
-                _LOGGER.debug("Resume sent immediately")
-            except Exception as exc:
-                self._pending_resume = True
-                _LOGGER.warning("Resume send failed; queued. Error: %s", exc)
-        else:
-            self._pending_resume = True
-            _LOGGER.debug("Resume queued (not in paused state)")
+        await self.request_command(
+            "resume", {"pause": 0}, precondition=lambda _d: self._paused_flag, watch=_CADENCE_KEYS
+        )
 
-    async def _flush_pending(self) -> None:
-        """Attempt to execute any queued actions when state allows (called on every telemetry frame)."""
-        if self._pending_pause and self._is_printing():
-            try:
-                await self.client.send_set_retry(pause=1)
-                self._pending_pause = False
-                _LOGGER.debug("Queued pause executed")
-            except Exception as exc:
-                _LOGGER.warning("Queued pause failed; will retry. Error: %s", exc)
+    async def request_stop(self) -> bool:
+        """Stop now whatever the printer is doing; never queued.
+
+        A stop that cannot go out right away is dropped and logged: fired
+        later it could hit the next job.
+
+        Returns:
+            True if the stop was sent.
+        """
+        self._commands.discard("stop")
+        if self.power_is_off() or not self.client.is_connected:
+            _LOGGER.warning("Cannot send stop: printer not connected")
+            return False
+        try:
+            await self.client.send_set_retry(stop=1)
+        except Exception as exc:  # pylint: disable=broad-except
+            _LOGGER.warning("Stop send failed: %s", exc)
+            return False
+        return True
+
+    def _can_home(self, d: Mapping[str, Any]) -> bool:
+        """Homing precondition: printer ready and not printing or paused.
+
+        A finished job keeps printFileName set, so this looks at ``state``
+        rather than at whether a job is loaded.
+        """
+        return self._printer_ready(d) and d.get("state") not in (1, 5)
+
+    async def request_home(self) -> None:
+        """Home X/Y, then Z once the printer has left the homing state.
+
+        Z is a second queue entry rather than a wait inside the first, so the
+        queue is never blocked while the printer homes.
+        """
+
+        async def _home_xy() -> None:
+            await self.client.send_set_retry(autohome="X Y")
+            # Give deviceState a moment to report homing before Z is considered
+            await self.request_command(
+                "autohome_z", {"autohome": "Z"}, precondition=self._can_home,
+                watch=_CADENCE_KEYS, ttl=COMMAND_MOTION_TTL, delay=1.0,
+            )
+
+        self._commands.discard("autohome_z")
+        await self.request_command(
+            "autohome", action=_home_xy, precondition=self._can_home,
+            watch=_CADENCE_KEYS, ttl=COMMAND_MOTION_TTL,
+        )
+
+    @property
+    def frame_version(self) -> int:
+        """Return the client frame version of the last applied delta."""
+        return self._frame_version
+
+    async def _handle_message(self, payload: dict[str, Any], version: int = 0) -> None:
+        """Handle incoming WebSocket telemetry data.
+
+        Args:
+            payload: Only the telemetry keys whose value changed since the
+                previous frame (not the full accumulated state).
+            version: Monotonically increasing frame version from the client.
+        """
+        if version:
+            self._frame_version = version
 
-        if self._pending_resume and self._paused_flag:
-            try:
-                await self.client.send_set_retry(pause=0)
-                self._pending_resume = False
-                _LOGGER.debug("Queued resume executed")
-            except Exception as exc:
-                _LOGGER.warning("Queued resume failed; will retry. Error: %s", exc)
-
-    async def _handle_message(self, payload: dict[str, Any]) -> None:
-        """Handle incoming WebSocket telemetry data."""
         # Suppress broken targetBoxTemp:0 from K2 Base port 9999
         if self._is_k2_base is None:
             self._is_k2_base = ModelDetection(payload).is_k2_base
@@ -333,15 +762,31 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         if (payload.get("targetBoxTemp") == 0) and self._is_k2_base:
             payload.pop("targetBoxTemp")
 
-        # Check if boxsInfo is present and we haven't discovered CFS entities yet
-        had_cfs = "boxsInfo" in self.data
+        # CFS layout before this frame, to diff a boxsInfo refresh against
+        old_cfs = self.derived.cfs if "boxsInfo" in payload else None
+        # Live again after going stale, or the first live frame over restored
+        # data: availability moved, so this frame is broadcast to everyone
+        resumed = not self._last_avail or self._restored_until > 0
         self.data.update(payload)
+        self.derived.invalidate(payload)
+        if self._optimistic:
+            self._reconcile_optimistic(payload)
+        if self._field_waiters:
+            self._wake_field_waiters(payload)
+        # Live telemetry from here on; restored values are overwritten as keys arrive
+        self._restored_until = 0.0
+        self._schedule_snapshot_save()
         has_cfs = "boxsInfo" in self.data
-        
-        if has_cfs and not had_cfs:
-            _LOGGER.info("CFS detected in telemetry (first time), triggering dynamic discovery")
-            _LOGGER.debug("CFS Raw Data: %s", json.dumps(payload.get("boxsInfo"), default=str))
-            async_dispatcher_send(self.hass, f"{DOMAIN}_new_entities_{self._config_entry_id}")
+
+        # Only boxes/slots that changed wake their entities; new ones trigger discovery
+        cfs_changes: set[str] = set()
+        if old_cfs is not None:
+            diff = CfsDiff(old_cfs, self.derived.cfs)
+            cfs_changes = diff.changed
+            if diff.structural:
+                _LOGGER.info("CFS layout changed in telemetry, triggering dynamic discovery")
+                _LOGGER.debug("CFS Raw Data: %s", json.dumps(payload.get("boxsInfo"), default=str))
+                async_dispatcher_send(self.hass, SIGNAL_NEW_ENTITIES.format(entry_id=self._config_entry_id))
         
         # Log if CFS is connected but we are missing boxsInfo
         if payload.get("cfsConnect") == 1 and not has_cfs:
@@ -351,12 +796,16 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
 
         self._recompute_paused_from_telemetry()
+        if not _CADENCE_KEYS.isdisjoint(payload):
+            self._update_cadence_profile()
         
-        # Try queued actions if state allows
-        try:
-            await self._flush_pending()
-        except Exception:  # pylint: disable=broad-except
-            _LOGGER.exception("flush_pending failed")
+        # Re-check queued commands only when their precondition keys moved,
+        # and retry failed sends as soon as a new connection delivers a frame
+        if self.client.reconnect_count != self._connection_seen:
+            self._connection_seen = self.client.reconnect_count
+            self._commands.retry_now()
+        elif self._commands.wants(payload):
+            self._commands.kick()
 
         # --- Notifications ---
         await self._check_notifications(payload)
@@ -370,13 +819,20 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         
         # --- Conditional Throttling (printing only) ---
         # Always update immediately when NOT printing; throttle entity updates only when printing
+        self._pending_keys.update(payload)
+        self._pending_keys.update(cfs_changes)
         now = self.hass.loop.time()
-        if self._polling_rate > 0 and self._is_printing():
+        if not resumed and self._polling_rate > 0 and self._is_printing():
             if (now - self._last_update_ts) < self._polling_rate:
                 return  # Skip listener update to reduce CPU usage while printing
         
         self._last_update_ts = now
-        self.async_update_listeners()
+        changed, self._pending_keys = self._pending_keys, set()
+        if resumed:
+            self._last_avail = True
+            self.async_update_listeners()
+        else:
+            self.async_update_key_listeners(changed)
 
     async def _check_notifications(self, _payload: dict[str, Any]):
         """Check logic for sending notifications."""
@@ -385,7 +841,6 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
         d = self.data or {}
         fname = d.get("printFileName")
-        progress = d.get("printProgress") or d.get("dProgress")
         
         # Check if we started a new print (filename changed)
         # Store last filename in instance to compare
@@ -400,11 +855,8 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             return
 
         # 1) Completion
-        try:
-            prog_val = int(progress) if progress is not None else 0
-        except (ValueError, TypeError):
-            prog_val = 0
-            
+        prog_val = self.derived.progress_pct
+
         if self._notify_completed:
             # If progress is 100% OR state is specific for completion?
             # Using progress >= 100 is most reliable according to sensor logic
@@ -414,14 +866,9 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
         # 2) Error
         if self._notify_error:
-            err = d.get("err", {})
-            try:
-                code = int(err.get("errcode", 0))
-            except (ValueError, TypeError):
-                code = 0
-                
+            code = self.derived.error_code
             if code != 0 and code != self._last_error_code:
-                key = err.get("key", 0)
+                key = (d.get("err") or {}).get("key", 0)
                 msg = f"Printer Error {code} (Key: {key}) occurred during '{fname}'"
                 await self._send_notification(msg)
             
@@ -507,7 +954,7 @@ class KCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                         if self.data.get("targetBoxTemp") != target:
                             _LOGGER.debug("Updated targetBoxTemp from Moonraker: %s", target)
                             self.data["targetBoxTemp"] = target
-                            self.async_update_listeners()
+                            self.async_update_key_listeners(("targetBoxTemp",))
         except Exception as e:
             # Moonraker might be disabled or port 7125 blocked; fail silently but log debug
             _LOGGER.debug("Failed to poll Moonraker for extras: %s", e)
@@ -1,15 +1,109 @@
 from __future__ import annotations
+import logging
+from typing import Any, Awaitable, Callable
+
+from homeassistant.core import callback #type: ignore[import]
+from homeassistant.helpers.debounce import Debouncer #type: ignore[import]
+from homeassistant.helpers.dispatcher import async_dispatcher_connect #type: ignore[import]
 from homeassistant.helpers.entity import DeviceInfo #type: ignore[import]
-from homeassistant.helpers.update_coordinator import CoordinatorEntity #type: ignore[import]
+from homeassistant.helpers.update_coordinator import BaseCoordinatorEntity, CoordinatorEntity #type: ignore[import]
 
-from .const import DOMAIN, MFR, MODEL
+from .const import DOMAIN, MFR, MODEL, SIGNAL_NEW_ENTITIES
 from .utils import parse_model_version
 
+_LOGGER = logging.getLogger(__name__)
+
+
+def async_track_new_entities(
+    hass: Any, entry: Any, async_add_entities: Callable[[list], None], build: Callable[[], list]
+) -> None:
+    """Add ``build()``'s entities now and again on every new-entities signal.
+
+    ``build`` is re-run after background discovery confirms capabilities and
+    must return only entities it has not returned before.
+    """
+
+    @callback
+    def _add() -> None:
+        ents = build()
+        if ents:
+            async_add_entities(ents)
+
+    _add()
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_NEW_ENTITIES.format(entry_id=entry.entry_id), _add)
+    )
+
+
+class DebouncedWrite:
+    """Leading + trailing edge write debouncer for slider-driven entities.
+
+    The first change is written at once; changes during the following
+    ``cooldown`` only update the pending value, and the last one is written
+    when the period ends. ``pending`` holds the value to show optimistically.
+    A failed write is logged and abandoned: unless a newer value is waiting,
+    nothing is pending any more and ``on_failed`` is called.
+    """
+
+    def __init__(
+        self,
+        hass,
+        cooldown: float,
+        write: Callable[[Any], Awaitable[None]],
+        on_failed: Callable[[], None] | None = None,
+    ) -> None:
+        self._write = write
+        self._on_failed = on_failed
+        self._value: Any = None
+        self._sent: Any = None
+        self._debouncer: Debouncer | None = None
+        if cooldown > 0:
+            self._debouncer = Debouncer(
+                hass, _LOGGER, cooldown=cooldown, immediate=True, function=self._flush
+            )
+
+    @property
+    def pending(self) -> Any:
+        """Return the requested value until it has been written, else None."""
+        return self._value if self._value != self._sent else None
+
+    async def async_write(self, value: Any) -> None:
+        self._value = value
+        if self._debouncer is None:
+            await self._flush()
+            return
+        await self._debouncer.async_call()
+
+    async def _flush(self) -> None:
+        value = self._value
+        try:
+            await self._write(value)
+        except Exception as exc:  # pylint: disable=broad-except
+            # Not re-raised: the trailing call runs from the Debouncer's timer
+            _LOGGER.warning("Write of %s failed: %s", value, exc)
+            # A newer value queued meanwhile stays pending for the trailing write
+            if self._value == value:
+                self._value = self._sent
+                if self._on_failed is not None:
+                    self._on_failed()
+            return
+        self._sent = value
+
+    def async_cancel(self) -> None:
+        if self._debouncer is not None:
+            self._debouncer.async_cancel()
+
 
 class KEntity(CoordinatorEntity):
     """Base entity for Creality K-series over WebSocket."""
 
     _attr_has_entity_name = True
+    # Telemetry keys this entity renders: it is woken when one of them
+    # changes and on coordinator-wide broadcasts (availability, power,
+    # pause). None listens to those broadcasts only.
+    _watch_keys: tuple[str, ...] | None = None
+    # Inputs of the last coordinator-driven write; see _state_inputs()
+    _last_inputs: tuple[Any, ...] | None = None
 
     def __init__(self, coordinator, name: str, unique_id: str):
         super().__init__(coordinator)
@@ -17,13 +111,58 @@ class KEntity(CoordinatorEntity):
         self._attr_unique_id = f"{coordinator.client._host}-{unique_id}"
         self._host = coordinator.client._host
 
+    async def async_added_to_hass(self) -> None:
+        if self._watch_keys is None:
+            await super().async_added_to_hass()
+            return
+        # Skip BaseCoordinatorEntity's catch-all listener and subscribe per key instead
+        await super(BaseCoordinatorEntity, self).async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_key_listener(
+                self._watch_keys, self._handle_coordinator_update
+            )
+        )
+
+    def _state_inputs(self) -> tuple[Any, ...] | None:
+        """Return what this entity renders from, or None to write on every update.
+
+        Cheap by design (no state or attribute properties are evaluated): the
+        broadcast count, so availability, power and pause changes always
+        write, plus availability and the watched values with any optimistic
+        overlay. Everything published (state, attributes, icon) must follow
+        from these; entities that read anything else extend the tuple.
+        """
+        if self._watch_keys is None:
+            return None
+        coord = self.coordinator
+        return (coord.broadcast_count, self.available, *map(coord.get_value, self._watch_keys))
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # Skipping writes whose inputs are unchanged spares the state machine,
+        # recorder and frontend fan-out
+        inputs = self._state_inputs()
+        if inputs is not None and inputs == self._last_inputs:
+            self.coordinator.state_writes_skipped += 1
+            return
+        super().async_write_ha_state()
+        self._last_inputs = inputs
+        self.coordinator.state_writes += 1
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        # Writes outside the coordinator path (optimistic values, registry
+        # updates) are not input-driven, so the next update always writes.
+        self._last_inputs = None
+        super().async_write_ha_state()
+
     @property
     def available(self) -> bool:
         # If power switch is configured and OFF, entity is unavailable.
         if self.coordinator.power_is_off():
             return False
             
-        return self.coordinator.available
+        return self.coordinator.available or self.coordinator.showing_restored()
 
     # Helper used by sensors to decide zeroing
     def _should_zero(self) -> bool:
@@ -32,66 +171,22 @@ class KEntity(CoordinatorEntity):
         """
         coord = self.coordinator
         # Returns True if connection is lost OR if the power switch is off.
-        return (not coord.available) or coord.power_is_off()
+        # Restored snapshot data counts as present until live frames take over.
+        if coord.power_is_off():
+            return True
+        return not (coord.available or coord.showing_restored())
     
-    def _get_cached_device_info(self) -> dict | None:
-        """
-        Get cached device info from config entry (model, hostname, modelVersion).
-        Returns None if not available.
-        """
-        try:
-            entry_id = getattr(self.coordinator, '_config_entry_id', None)
-            if entry_id:
-                entry_obj = self.coordinator.hass.config_entries.async_get_entry(entry_id)
-                if entry_obj and entry_obj.data.get("_device_info_cached"):
-                    return {
-                        "model": entry_obj.data.get("_cached_model"),
-                        "hostname": entry_obj.data.get("_cached_hostname"),
-                        "modelVersion": entry_obj.data.get("_cached_model_version"),
-                    }
-        except Exception:
-            pass
-        return None
-
-    def _get_cached_max_temps(self) -> dict[str, float | None]:
-        """
-        Get cached max temperature values from config entry.
-    Returns dict with max_bed_temp, max_nozzle_temp, max_box_temp keys.
-        Falls back to live data if cached values are not available.
-        """
-        try:
-            entry_id = getattr(self.coordinator, '_config_entry_id', None)
-            if entry_id:
-                entry_obj = self.coordinator.hass.config_entries.async_get_entry(entry_id)
-                if entry_obj and entry_obj.data.get("_device_info_cached"):
-                    return {
-                        "max_bed_temp": entry_obj.data.get("_cached_max_bed_temp"),
-                        "max_nozzle_temp": entry_obj.data.get("_cached_max_nozzle_temp"),
-                        # Prefer new chamber cache, fallback to legacy box cache
-                        "max_box_temp": entry_obj.data.get("_cached_max_chamber_temp", entry_obj.data.get("_cached_max_box_temp")),
-                    }
-        except Exception:
-            pass
-        
-        # Fallback to live data if cached values are not available
-        d = self.coordinator.data or {}
-        return {
-            "max_bed_temp": d.get("maxBedTemp"),
-            "max_nozzle_temp": d.get("maxNozzleTemp"),
-            "max_box_temp": d.get("maxBoxTemp"),
-        }
-
     @property
     def device_info(self) -> DeviceInfo:
-        # First try to get cached device info from entry
-        cached_info = self._get_cached_device_info()
-        if cached_info and cached_info.get("model"):
-            hw_ver, sw_ver = parse_model_version(cached_info.get("modelVersion"))
+        # First try the cached device info
+        caps = self.coordinator.capabilities
+        if caps.cached and caps.model:
+            hw_ver, sw_ver = parse_model_version(caps.model_version)
             return DeviceInfo(
                 identifiers={(DOMAIN, self._host)},
                 manufacturer=MFR,
-                model=cached_info.get("model"),
-                name=cached_info.get("hostname") or f"{cached_info.get('model')} (Creality)",
+                model=caps.model,
+                name=caps.hostname or f"{caps.model} (Creality)",
                 configuration_url=f"http://{self._host}/",
                 hw_version=hw_ver,
                 sw_version=sw_ver,
@@ -114,3 +209,49 @@ class KEntity(CoordinatorEntity):
             hw_version=hw_ver,
             sw_version=sw_ver,
         )
+
+
+class KDebouncedWriteEntity(KEntity):
+    """KEntity for slider-style controls: debounced writes with an optimistic value.
+
+    Subclasses implement _async_write_value() and call _async_debounced_write();
+    native getters should prefer ``self._optimistic`` when it is not None.
+    """
+
+    _optimistic: Any = None
+    _writer: DebouncedWrite | None = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._writer = DebouncedWrite(
+            self.hass, self.coordinator.write_debounce, self._async_write_value,
+            self._async_write_failed,
+        )
+        self.async_on_remove(self._writer.async_cancel)
+
+    async def _async_write_value(self, value: Any) -> None:
+        raise NotImplementedError
+
+    @callback
+    def _async_write_failed(self) -> None:
+        # Show telemetry again instead of a value that never reached the printer
+        self._optimistic = None
+        self.async_write_ha_state()
+
+    async def _async_debounced_write(self, value: Any) -> None:
+        self._optimistic = value
+        self.async_write_ha_state()
+        if self._writer is None:
+            await self._async_write_value(value)
+            return
+        await self._writer.async_write(value)
+
+    def _state_inputs(self) -> tuple[Any, ...] | None:
+        inputs = super()._state_inputs()
+        return None if inputs is None else (*inputs, self._optimistic)
+
+    def _handle_coordinator_update(self) -> None:
+        # Telemetry takes over again once no trailing write is outstanding
+        if self._writer is None or self._writer.pending is None:
+            self._optimistic = None
+        super()._handle_coordinator_update()
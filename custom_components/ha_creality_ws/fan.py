@@ -7,7 +7,7 @@ except Exception:  # fallback for older cores
     ATTR_PERCENTAGE = "percentage"  # type: ignore[assignment]
 
 from .const import DOMAIN
-from .entity import KEntity
+from .entity import KDebouncedWriteEntity
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
@@ -22,7 +22,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async_add_entities(ents)
 
 
-class _KFanEntity(KEntity, FanEntity):
+class _KFanEntity(KDebouncedWriteEntity, FanEntity):
     """A simple percentage-based fan mapped to M106 Px Syyy."""
 
     _attr_supported_features = (
@@ -37,6 +37,7 @@ class _KFanEntity(KEntity, FanEntity):
         super().__init__(coordinator, name, uid)
         self._read_field = read_field
         self._channel = int(channel)
+        self._watch_keys = (read_field,)
 
     # Availability is controlled by base KEntity (always available, but may zero)
 
@@ -54,17 +55,18 @@ class _KFanEntity(KEntity, FanEntity):
     def percentage(self) -> int | None:
         if self._should_zero():
             return 0
-        v = self.coordinator.data.get(self._read_field)
-        try:
-            return int(round(float(v))) if v is not None else 0
-        except (TypeError, ValueError):
-            return 0
+        if self._optimistic is not None:
+            return int(self._optimistic)
+        v = self.coordinator.data.numbers.get(self._read_field)
+        return int(round(v)) if v is not None else 0
 
     async def async_set_percentage(self, percentage: int) -> None:
-        pct = max(0, min(100, int(round(percentage))))
+        await self._async_debounced_write(max(0, min(100, int(round(percentage)))))
+
+    async def _async_write_value(self, pct: int) -> None:
         s_val = int(round(255 * (pct / 100.0)))
         cmd = f"M106 P{self._channel} S{s_val}"
-        await self.coordinator.client.send_set_retry(gcodeCmd=cmd)
+        await self.coordinator.request_command(f"fan{self._channel}", {"gcodeCmd": cmd}, coalesce=True)
 
     async def async_turn_on(self, *args, **kwargs) -> None:  # type: ignore[override]
         """Turn on the fan, honoring provided percentage across HA versions.
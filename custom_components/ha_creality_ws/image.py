@@ -46,6 +46,7 @@ class CurrentPrintPreviewImage(KEntity, ImageEntity):
 
     _attr_name = "Current Print Preview"
     _attr_content_type = "image/png"
+    _watch_keys = ("state", "printFileName", "printProgress", "dProgress", "withSelfTest")
 
     def __init__(self, coordinator):
         KEntity.__init__(self, coordinator, self._attr_name, "current_print_preview")
@@ -65,12 +66,7 @@ class CurrentPrintPreviewImage(KEntity, ImageEntity):
         fname = (d.get("printFileName") or "").strip()
         if not fname:
             return False
-        prog = d.get("printProgress", d.get("dProgress"))
-        try:
-            prog = int(prog) if prog is not None else -1
-        except Exception:
-            prog = -1
-        if prog >= 100:
+        if self.coordinator.derived.progress_pct >= 100:
             return True
         if d.get("withSelfTest"):
             return True
@@ -3,22 +3,23 @@ from __future__ import annotations
 from homeassistant.components.light import LightEntity, ColorMode  # type: ignore[import]
 
 from .const import DOMAIN
-from .entity import KEntity
+from .entity import KEntity, async_track_new_entities
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
     coord = hass.data[DOMAIN][entry.entry_id]
+    added = False
 
-    # Only expose if model supports light or if live data shows the field
-    has_light = entry.data.get("_cached_has_light", True)
-    if not has_light and "lightSw" in (coord.data or {}):
-        has_light = True
+    def _build() -> list:
+        nonlocal added
+        # Only expose if model supports light or if live data shows the field
+        has_light = coord.capabilities.has_light or "lightSw" in (coord.data or {})
+        if added or not has_light:
+            return []
+        added = True
+        return [_KLight(coord)]
 
-    if not has_light:
-        async_add_entities([])
-        return
-
-    async_add_entities([_KLight(coord)])
+    async_track_new_entities(hass, entry, async_add_entities, _build)
 
 
 class _KLight(KEntity, LightEntity):
@@ -29,6 +30,7 @@ class _KLight(KEntity, LightEntity):
 
     # Native light entity should be enabled by default
     _attr_entity_registry_enabled_default = True
+    _watch_keys = ("lightSw",)
 
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator, self._attr_name, "light")
@@ -41,7 +43,7 @@ class _KLight(KEntity, LightEntity):
         return bool(val) if val is not None else False
 
     async def async_turn_on(self, **kwargs):
-        await self.coordinator.client.send_set_retry(lightSw=1)
+        await self.coordinator.request_command("lightSw", {"lightSw": 1})
 
     async def async_turn_off(self, **kwargs):
-        await self.coordinator.client.send_set_retry(lightSw=0)
+        await self.coordinator.request_command("lightSw", {"lightSw": 0})
@@ -12,7 +12,7 @@ except Exception:  # older cores
 
 from homeassistant.helpers import entity_registry as er  # type: ignore[import]
 from .const import DOMAIN
-from .entity import KEntity
+from .entity import KDebouncedWriteEntity, KEntity, async_track_new_entities
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the number entities."""
@@ -24,11 +24,6 @@ async def async_setup_entry(hass, entry, async_add_entities):
     ents.append(NozzleTargetNumber(coord))
     ents.append(BedTargetNumber(coord, bed_index=0))
     
-    # Chamber temperature control (K2 Pro/Plus only)
-    has_box_control = entry.data.get("_cached_has_chamber_control", entry.data.get("_cached_has_box_control", False))
-    if coord.data.get("maxBoxTemp") and has_box_control:
-        ents.append(BoxTargetNumber(coord))
-    
     # Fan controls (legacy). Only create if entity already exists to avoid duplicates with native fan platform.
     reg = er.async_get(hass)
     host = coord.client._host
@@ -45,9 +40,23 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     async_add_entities(ents)
 
+    # Chamber temperature control (K2 Pro/Plus only); discovery may confirm it after setup
+    box_added = False
+
+    def _build_box_control() -> list:
+        nonlocal box_added
+        caps = coord.capabilities
+        max_box = coord.data.get("maxBoxTemp") or caps.max_chamber_temp
+        if box_added or not (max_box and caps.has_chamber_control):
+            return []
+        box_added = True
+        return [BoxTargetNumber(coord)]
+
+    async_track_new_entities(hass, entry, async_add_entities, _build_box_control)
+
 
 # ---------- Unified speed+flow percent ----------
-class PrintTuningPercent(KEntity, NumberEntity):
+class PrintTuningPercent(KDebouncedWriteEntity, NumberEntity):
     """
     One control for both speed and flow.
     Writes: setFeedratePct=value and setFlowratePct=value.
@@ -60,6 +69,7 @@ class PrintTuningPercent(KEntity, NumberEntity):
     _attr_native_min_value = 1.0
     _attr_native_max_value = 1000.0
     _attr_native_step = 1.0
+    _watch_keys = ("curFeedratePct", "curFlowratePct")
 
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator, self._attr_name, "print_tuning_pct")
@@ -69,6 +79,8 @@ class PrintTuningPercent(KEntity, NumberEntity):
         """Return the current value."""
         if self._should_zero():
             return None
+        if self._optimistic is not None:
+            return float(self._optimistic)
         d = self.coordinator.data
         v = d.get("curFeedratePct")
         if v is None:
@@ -81,9 +93,13 @@ class PrintTuningPercent(KEntity, NumberEntity):
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
         v = int(max(self._attr_native_min_value, min(self._attr_native_max_value, round(value))))
-        # Write BOTH, keep them in lockstep
-        await self.coordinator.client.send_set_retry(setFeedratePct=v)
-        await self.coordinator.client.send_set_retry(setFlowratePct=v)
+        await self._async_debounced_write(v)
+
+    async def _async_write_value(self, v: int) -> None:
+        # Write BOTH, keep them in lockstep (one frame where the firmware allows)
+        async with self.coordinator.client.set_batch() as batch:
+            batch.set(setFeedratePct=v)
+            batch.set(setFlowratePct=v)
 
 
 # ---------- Temperature targets (BOX inputs) ----------
@@ -96,17 +112,18 @@ class NozzleTargetNumber(KEntity, NumberEntity):
     _attr_native_min_value = 0.0
     _attr_native_step = 1.0
 
+    _watch_keys = ("targetNozzleTemp",)
+
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator, self._attr_name, "nozzle_target")
         # Use cached max temperature value with fallback to live data
-        max_temps = self._get_cached_max_temps()
-        max_nozzle_temp = max_temps.get("max_nozzle_temp")
+        max_nozzle_temp = coordinator.capabilities.max_temp("max_nozzle_temp", coordinator.data)
         self._attr_native_max_value = float(max_nozzle_temp) if max_nozzle_temp is not None else 300.0
     @property
     def native_value(self) -> float | None:
         if self._should_zero():
             return None
-        v = self.coordinator.data.get("targetNozzleTemp")
+        v = self.coordinator.get_value("targetNozzleTemp")
         try:
             return float(v) if v is not None else None
         except (TypeError, ValueError):
@@ -119,10 +136,10 @@ class NozzleTargetNumber(KEntity, NumberEntity):
         if max_v is not None:
             v = min(int(max_v), v)
         
-        self.coordinator.data["targetNozzleTemp"] = v
-        self.coordinator.async_update_listeners()
-        
-        await self.coordinator.client.send_set_retry(nozzleTempControl=v)
+        await self.coordinator.request_command(
+            "nozzleTempControl", {"nozzleTempControl": v}, coalesce=True,
+            optimistic={"targetNozzleTemp": v},
+        )
 
 
 class BedTargetNumber(KEntity, NumberEntity):
@@ -137,16 +154,16 @@ class BedTargetNumber(KEntity, NumberEntity):
     def __init__(self, coordinator, bed_index: int = 0) -> None:
         super().__init__(coordinator, self._attr_name, f"bed_target_{bed_index}")
         self._idx = int(bed_index)
+        self._watch_keys = (f"targetBedTemp{self._idx}",)
         # Use cached max temperature value with fallback to live data
-        max_temps = self._get_cached_max_temps()
-        max_bed_temp = max_temps.get("max_bed_temp")
+        max_bed_temp = coordinator.capabilities.max_temp("max_bed_temp", coordinator.data)
         self._attr_native_max_value = float(max_bed_temp) if max_bed_temp is not None else 100.0
 
     @property
     def native_value(self) -> float | None:
         if self._should_zero():
             return None
-        v = self.coordinator.data.get(f"targetBedTemp{self._idx}")
+        v = self.coordinator.get_value(f"targetBedTemp{self._idx}")
         try:
             return float(v) if v is not None else None
         except (TypeError, ValueError):
@@ -159,10 +176,10 @@ class BedTargetNumber(KEntity, NumberEntity):
         if max_v is not None:
             v = min(int(max_v), v)
         
-        self.coordinator.data[f"targetBedTemp{self._idx}"] = v
-        self.coordinator.async_update_listeners()
-        
-        await self.coordinator.client.send_set_retry(bedTempControl={"num": self._idx, "val": v})
+        await self.coordinator.request_command(
+            f"bedTempControl{self._idx}", {"bedTempControl": {"num": self._idx, "val": v}}, coalesce=True,
+            optimistic={f"targetBedTemp{self._idx}": v},
+        )
 
 
 class BoxTargetNumber(KEntity, NumberEntity):
@@ -174,11 +191,12 @@ class BoxTargetNumber(KEntity, NumberEntity):
     _attr_native_min_value = 0.0
     _attr_native_step = 1.0
 
+    _watch_keys = ("targetBoxTemp",)
+
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator, self._attr_name, "box_target")
         # Use cached max temperature value with fallback to live data
-        max_temps = self._get_cached_max_temps()
-        max_box_temp = max_temps.get("max_box_temp")
+        max_box_temp = coordinator.capabilities.max_temp("max_box_temp", coordinator.data)
         
         # Handle printers without heated chamber (maxBoxTemp is None)
         if max_box_temp is None:
@@ -193,7 +211,7 @@ class BoxTargetNumber(KEntity, NumberEntity):
     def native_value(self) -> float | None:
         if self._should_zero():
             return None
-        v = self.coordinator.data.get("targetBoxTemp")
+        v = self.coordinator.get_value("targetBoxTemp")
         try:
             return float(v) if v is not None else None
         except (TypeError, ValueError):
@@ -207,15 +225,13 @@ class BoxTargetNumber(KEntity, NumberEntity):
         if max_v is not None:
             v = min(int(max_v), v)
         
-        # Optimistic update
-        self.coordinator.data["targetBoxTemp"] = v
-        self.coordinator.async_update_listeners()
-
-        await self.coordinator.client.send_set_retry(boxTempControl=v)
+        await self.coordinator.request_command(
+            "boxTempControl", {"boxTempControl": v}, coalesce=True, optimistic={"targetBoxTemp": v}
+        )
 
 
 # ---------- Fan percent via M106 (0%→off) ----------
-class _FanPctNumber(KEntity, NumberEntity):
+class _FanPctNumber(KDebouncedWriteEntity, NumberEntity):
     # Legacy fan controls; native fan platform replaces these. Keep disabled by default for new setups.
     _attr_entity_registry_enabled_default = False
     _attr_native_unit_of_measurement = UNIT_PERCENT
@@ -228,11 +244,14 @@ class _FanPctNumber(KEntity, NumberEntity):
         super().__init__(coordinator, name, uid)
         self._read_field = read_field
         self._channel = int(channel)
+        self._watch_keys = (read_field,)
 
     @property
     def native_value(self) -> float | None:
         if self._should_zero():
             return None
+        if self._optimistic is not None:
+            return float(self._optimistic)
         v = self.coordinator.data.get(self._read_field)
         try:
             return float(v) if v is not None else None
@@ -240,7 +259,9 @@ class _FanPctNumber(KEntity, NumberEntity):
             return None
 
     async def async_set_native_value(self, value: float) -> None:
-        pct = max(0, min(100, int(round(value))))
+        await self._async_debounced_write(max(0, min(100, int(round(value)))))
+
+    async def _async_write_value(self, pct: int) -> None:
         s_val = int(round(255 * (pct / 100.0)))
         cmd = f"M106 P{self._channel} S{s_val}"  # 0 → fan off
-        await self.coordinator.client.send_set_retry(gcodeCmd=cmd)
+        await self.coordinator.request_command(f"fan{self._channel}", {"gcodeCmd": cmd}, coalesce=True)
@@ -0,0 +1,108 @@
+"""Non-blocking, TTL-cached host name resolution for the WebSocket URL."""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from typing import Optional
+
+from .const import RESOLVE_NEGATIVE_TTL, RESOLVE_POSITIVE_TTL, RESOLVE_TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class HostResolver:
+    """Resolve one printer host to an IPv4 address without blocking the loop.
+
+    Lookups run through loop.getaddrinfo (executor backed) with a timeout.
+    Successful results are cached for RESOLVE_POSITIVE_TTL seconds, failures
+    for RESOLVE_NEGATIVE_TTL so a powered-off printer on a ``.local`` name
+    does not trigger a fresh mDNS timeout on every reconnect attempt.
+    Concurrent callers share a single in-flight lookup.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        positive_ttl: float = RESOLVE_POSITIVE_TTL,
+        negative_ttl: float = RESOLVE_NEGATIVE_TTL,
+        timeout: float = RESOLVE_TIMEOUT,
+    ) -> None:
+        self._host = host
+        self._literal = _is_ip_literal(host)
+        self._positive_ttl = positive_ttl
+        self._negative_ttl = negative_ttl
+        self._timeout = timeout
+        self._address: Optional[str] = None
+        self._expires = 0.0
+        self._inflight: Optional[asyncio.Future[str]] = None
+        # Diagnostics
+        self.lookups = 0
+        self.failures = 0
+
+    @property
+    def host(self) -> str:
+        """Return the configured host name or address."""
+        return self._host
+
+    def cached(self) -> str:
+        """Return the last resolved address, or the host itself when unknown."""
+        if self._literal:
+            return self._host
+        return self._address or self._host
+
+    def invalidate(self, *, keep_failures: bool = False) -> None:
+        """Drop the cached result so the next resolve() queries again.
+
+        Args:
+            keep_failures: Keep a cached failure (negative entry) so repeated
+                connect errors do not re-run slow lookups before it expires.
+        """
+        if keep_failures and self._address is None:
+            return
+        self._address = None
+        self._expires = 0.0
+
+    async def resolve(self) -> str:
+        """Return an address to connect to; falls back to the host on failure."""
+        if self._literal:
+            return self._host
+        if time.monotonic() < self._expires:
+            return self._address or self._host
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._lookup())
+        fut = self._inflight
+        try:
+            return await asyncio.shield(fut)
+        finally:
+            if fut.done() and self._inflight is fut:
+                self._inflight = None
+
+    async def _lookup(self) -> str:
+        loop = asyncio.get_running_loop()
+        self.lookups += 1
+        try:
+            infos = await asyncio.wait_for(
+                loop.getaddrinfo(self._host, None, family=socket.AF_INET, type=socket.SOCK_STREAM),
+                timeout=self._timeout,
+            )
+            address = str(infos[0][4][0])
+        except (OSError, asyncio.TimeoutError, IndexError) as exc:
+            self.failures += 1
+            _LOGGER.debug("Resolve %s failed: %s", self._host, exc)
+            self._address = None
+            self._expires = time.monotonic() + self._negative_ttl
+            return self._host
+        self._address = address
+        self._expires = time.monotonic() + self._positive_ttl
+        return address
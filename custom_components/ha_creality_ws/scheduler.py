@@ -0,0 +1,184 @@
+"""Shared deadline scheduler for periodic WebSocket requests."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import weakref
+from typing import Awaitable, Callable, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+JobCallback = Callable[[], Awaitable[None]]
+
+# One scheduler per event loop, shared by every KClient running on it
+_SCHEDULERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, DeadlineScheduler]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class ScheduledJob:
+    """Handle for a periodic job registered with a DeadlineScheduler."""
+
+    __slots__ = ("name", "interval", "callback", "deadline", "running", "_scheduler", "_token")
+
+    def __init__(
+        self,
+        scheduler: DeadlineScheduler,
+        name: str,
+        interval: float | None,
+        callback: JobCallback,
+    ) -> None:
+        self.name = name
+        self.interval: float | None = interval
+        self.callback = callback
+        self.deadline = 0.0
+        self.running = False
+        self._scheduler: Optional[DeadlineScheduler] = scheduler
+        # Sequence number of the live heap entry; older entries are stale
+        self._token = -1
+
+    @property
+    def active(self) -> bool:
+        """Return True while the job is registered with its scheduler."""
+        return self._scheduler is not None
+
+    def set_interval(self, interval: float | None) -> None:
+        """Change the cadence; None parks the job until a cadence is set again.
+
+        The next run keeps its phase (last run + new interval, or now if
+        that is already past). A parked job resumes immediately.
+        """
+        sched = self._scheduler
+        if sched is None or interval == self.interval:
+            return
+        if interval is None:
+            self.interval = None
+            self._token = -1
+            return
+        now = sched.time()
+        if self.interval is None:
+            deadline = now
+        else:
+            deadline = max(now, self.deadline - self.interval + interval)
+        self.interval = interval
+        sched._push(self, deadline)  # pylint: disable=protected-access
+
+    def cancel(self) -> None:
+        """Stop the job; its pending heap entry is discarded lazily."""
+        self._scheduler = None
+        self._token = -1
+
+
+class DeadlineScheduler:
+    """Run periodic jobs from one timer armed for the earliest deadline.
+
+    Jobs live in a min-heap keyed by their next deadline. A single loop
+    timer (call_at) fires exactly when the head is due, so idle printers
+    cost no wakeups between requests, however many clients share it.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._heap: list[tuple[float, int, ScheduledJob]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at = 0.0
+        # Running job tasks; the loop only keeps weak references to tasks
+        self._tasks: set[asyncio.Task] = set()
+        # Diagnostics
+        self.wakeups = 0
+        self.fired = 0
+        self.failed = 0
+
+    def time(self) -> float:
+        """Return the loop clock used for deadlines."""
+        return self._loop.time()
+
+    def schedule(
+        self, name: str, interval: float | None, callback: JobCallback, delay: float = 0.0
+    ) -> ScheduledJob:
+        """Register a periodic job; the first run is due after ``delay`` seconds.
+
+        A job registered with ``interval=None`` stays parked until
+        ScheduledJob.set_interval gives it a cadence.
+        """
+        job = ScheduledJob(self, name, interval, callback)
+        if interval is not None:
+            self._push(job, self._loop.time() + max(0.0, delay))
+        return job
+
+    def _push(self, job: ScheduledJob, deadline: float) -> None:
+        job.deadline = deadline
+        job._token = next(self._seq)  # pylint: disable=protected-access
+        heapq.heappush(self._heap, (deadline, job._token, job))  # pylint: disable=protected-access
+        if self._timer is None or deadline < self._timer_at:
+            self._arm()
+
+    def _arm(self) -> None:
+        """(Re)arm the loop timer for the earliest live deadline."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        heap = self._heap
+        # Discard entries belonging to cancelled or rescheduled jobs
+        while heap and heap[0][1] != heap[0][2]._token:  # pylint: disable=protected-access
+            heapq.heappop(heap)
+        if heap:
+            self._timer_at = heap[0][0]
+            self._timer = self._loop.call_at(self._timer_at, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self.wakeups += 1
+        now = self._loop.time()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, token, job = heapq.heappop(heap)
+            if token != job._token:  # pylint: disable=protected-access
+                continue
+            # Next deadline is relative to now so a slow send cannot cause a burst
+            self._push_quiet(job, now + (job.interval or 0.0))
+            if job.running:
+                continue
+            self.fired += 1
+            task = self._loop.create_task(self._run(job), name=f"K-sched-{job.name}")
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+        self._arm()
+
+    def _push_quiet(self, job: ScheduledJob, deadline: float) -> None:
+        """Push without re-arming; used while draining due entries."""
+        job.deadline = deadline
+        job._token = next(self._seq)  # pylint: disable=protected-access
+        heapq.heappush(self._heap, (deadline, job._token, job))  # pylint: disable=protected-access
+
+    async def _run(self, job: ScheduledJob) -> None:
+        job.running = True
+        try:
+            await job.callback()
+        finally:
+            job.running = False
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            self.failed += 1
+            _LOGGER.warning("Scheduled job %s failed: %s", task.get_name(), exc)
+
+    def __len__(self) -> int:
+        return sum(1 for _, token, job in self._heap if token == job._token)  # pylint: disable=protected-access
+
+
+def get_scheduler(loop: asyncio.AbstractEventLoop | None = None) -> DeadlineScheduler:
+    """Return the scheduler shared by all clients on ``loop`` (default: running loop)."""
+    loop = loop or asyncio.get_running_loop()
+    sched = _SCHEDULERS.get(loop)
+    if sched is None:
+        sched = DeadlineScheduler(loop)
+        _SCHEDULERS[loop] = sched
+    return sched
@@ -1,9 +1,8 @@
 """Sensor entities for Creality 3D printers."""
 from __future__ import annotations
 import logging
-import json
-from typing import Any, Callable
-from .utils import parse_position as _parse_position, safe_float as _safe_float
+from typing import Any, Callable, Mapping
+from .utils import safe_float as _safe_float
 
 from homeassistant.components.sensor import (  # type: ignore[import]
     SensorEntity,
@@ -11,9 +10,11 @@ from homeassistant.components.sensor import (  # type: ignore[import]
     SensorStateClass,
 )
 from homeassistant.helpers.entity import EntityCategory  # type: ignore[import]
-from homeassistant.helpers.dispatcher import async_dispatcher_connect # type: ignore[import]
-from .entity import KEntity
-from .const import DOMAIN
+from .entity import KEntity, async_track_new_entities
+from .capabilities import MAX_TEMP_FIELDS
+from .const import CONTROL_STATE_KEY, DOMAIN
+from .telemetry import CFS_EXTERNAL_KEY, CfsDiff, CfsIndex, cfs_box_key, cfs_slot_key
+from .tracker import TRACKED_COMMANDS, command_stats_key
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -32,6 +33,7 @@ try:
     U_MM = ULen.MILLIMETERS
     U_CM = ULen.CENTIMETERS
     U_S = UTime.SECONDS
+    U_MS = UTime.MILLISECONDS
 except ImportError:  # older cores fallback (keep compat with older HA constants)
     from homeassistant.const import ( #type: ignore[import]
         TEMP_CELSIUS as U_C,
@@ -39,6 +41,7 @@ except ImportError:  # older cores fallback (keep compat with older HA constants
         LENGTH_CENTIMETERS as U_CM,
         PERCENTAGE as U_PERCENT,
         TIME_SECONDS as U_S,
+        TIME_MILLISECONDS as U_MS,
     )
     U_RPM = "rpm"
 
@@ -51,7 +54,7 @@ except ImportError:  # older cores fallback (keep compat with older HA constants
 def _attr_dict(*pairs: tuple[str, Any]) -> dict[str, Any]:
     return {k: v for (k, v) in pairs if v is not None}
 
-# position parsing moved to utils.parse_position
+# position parsing lives in telemetry.DerivedValues (utils.parse_position)
 
 
 # ----------------- dynamic “simple field” sensors -----------------
@@ -193,6 +196,14 @@ SPECS: list[dict[str, Any]] = [
     },
 ]
 
+# Telemetry keys behind the computed "__*__" fields (for key-scoped updates)
+_SPECIAL_FIELD_KEYS: dict[str, tuple[str, ...]] = {
+    "__pos_x__": ("curPosition",),
+    "__pos_y__": ("curPosition",),
+    "__pos_z__": ("curPosition",),
+    "__progress__": ("printProgress", "dProgress"),
+}
+
 # ----------------- dynamic "mapped" sensors -----------------
 MAPPED_SPECS: list[dict[str, Any]] = [
     {
@@ -208,6 +219,114 @@ MAPPED_SPECS: list[dict[str, Any]] = [
 ]
 
 
+# ----------------- compiled spec accessors -----------------
+# SPECS/MAPPED_SPECS are turned into plain callables once per entity at
+# setup, so the per-update path does no field-name branching.
+
+ValueAccessor = Callable[[Any], Any]
+AttrsAccessor = Callable[[Any], dict[str, Any]]
+
+_POSITION_INDEX = {"__pos_x__": 0, "__pos_y__": 1, "__pos_z__": 2}
+
+
+def _compile_value(field: str) -> ValueAccessor:
+    """Return ``coordinator -> value`` for a spec field."""
+    if field == "model":
+        # System entity (model) uses the capability cache; live data only as fallback
+        def _model(coord) -> Any:
+            caps = coord.capabilities
+            if caps.cached and caps.model:
+                return caps.model
+            d = coord.data
+            return d.get(field) if d else None
+        return _model
+    if field in _POSITION_INDEX:
+        idx = _POSITION_INDEX[field]
+        return lambda coord: coord.derived.position[idx]
+    if field == "__progress__":
+        return lambda coord: coord.derived.progress
+    return lambda coord: coord.data.get(field)
+
+
+def _compile_zero(field: str, unit: Any) -> Any:
+    """Return the value shown while the printer is off or unreachable."""
+    if field in ("TotalLayer", "layer"):
+        return 0
+    if unit is None and field not in _SPECIAL_FIELD_KEYS:
+        return None
+    return 0
+
+
+class _KeyRecorder(dict):
+    """Empty telemetry stand-in that records the keys an attrs builder reads."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.read: dict[str, None] = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self.read[key] = None
+        return default
+
+
+def _attr_keys(spec: dict[str, Any]) -> tuple[str, ...]:
+    """Return the telemetry keys a spec's attrs builder reads.
+
+    The builder runs once against an empty recorder, so it must read
+    every key it depends on through ``d.get()`` unconditionally.
+    """
+    build = spec.get("attrs")
+    if build is None:
+        return ()
+    recorder = _KeyRecorder()
+    build(recorder)
+    return tuple(recorder.read)
+
+
+def _compile_attrs(spec: dict[str, Any], keys: tuple[str, ...]) -> AttrsAccessor:
+    """Return ``coordinator -> attributes``, reusing the last dict while ``keys`` are unchanged."""
+    build: Callable[[dict[str, Any]], dict[str, Any]] | None = spec.get("attrs")
+    model = spec["field"] == "model"
+    if not keys and not model:
+        empty: dict[str, Any] = {}
+        return lambda coord: empty
+
+    last_inputs: tuple[Any, ...] | None = None
+    last: dict[str, Any] = {}
+
+    def _attrs(coord) -> dict[str, Any]:
+        nonlocal last_inputs, last
+        caps = coord.capabilities
+        if model and caps.cached:
+            inputs: tuple[Any, ...] = (True, caps.hostname, caps.model_version)
+        else:
+            d = coord.data
+            inputs = (False,) + tuple(d.get(k) for k in keys)
+        if inputs == last_inputs:
+            return last
+        if inputs[0]:
+            # System entity (model) reports the cached hostname/version
+            last = {k: v for k, v in (("hostname", caps.hostname), ("modelVersion", caps.model_version)) if v}
+        else:
+            last = build(coord.data) if build else {}
+        last_inputs = inputs
+        return last
+
+    return _attrs
+
+
+def _compile_mapping(mapping: dict[int, str]) -> Callable[[Any], str]:
+    """Return ``raw value -> label`` for a mapped sensor."""
+    def _label(raw: Any) -> str:
+        if raw is None:
+            return "Unknown"
+        try:
+            return mapping.get(int(raw), str(raw))
+        except (ValueError, TypeError):
+            return str(raw)
+    return _label
+
+
 class KSimpleFieldSensor(KEntity, SensorEntity):
     """Generic sensor bound to one telemetry field or a special computed field."""
 
@@ -217,65 +336,34 @@ class KSimpleFieldSensor(KEntity, SensorEntity):
         self._attr_device_class = spec.get("device_class")
         self._attr_native_unit_of_measurement = spec.get("unit")
         self._attr_state_class = spec.get("state_class")
-        self._get_attrs: Callable[[dict[str, Any]], dict[str, Any]] = spec.get("attrs") or (lambda d: {})
+        attr_keys = _attr_keys(spec)
+        self._watch_keys = _SPECIAL_FIELD_KEYS.get(self._field, (self._field,)) + attr_keys
+        # Compiled accessors (see _compile_value/_compile_attrs)
+        self._value: ValueAccessor = _compile_value(self._field)
+        self._attrs: AttrsAccessor = _compile_attrs(spec, attr_keys)
+        self._zero = _compile_zero(self._field, self._attr_native_unit_of_measurement)
+        # System entity (model) shows cached info: always available, never zeroed
+        self._is_system = self._field == "model"
 
     @property
     def available(self) -> bool:
-        # System entity (model) is always available if we have cached info
-        if self._field == "model":
+        if self._is_system:
             return True
         return super().available
 
     def _zero_value(self):
         """Return appropriate zero value for offline/off state."""
-        if self._field in ("TotalLayer", "layer"):
-            return 0
-        if self._attr_native_unit_of_measurement is None and self._field not in ("__pos_x__", "__pos_y__", "__pos_z__", "__progress__"):
-            return None
-        return 0
+        return self._zero
 
     @property
     def native_value(self):
-        # System entity (model) uses cached data from config entry, never live data
-        if self._field == "model":
-            cached_info = self._get_cached_device_info()
-            if cached_info and cached_info.get("model"):
-                return cached_info.get("model")
-            # Fallback to current data if no cached model
-            d = self.coordinator.data
-            return d.get(self._field) if d else None
-        
-        d = self.coordinator.data
-        
-        # System entity should not be zeroed when printer is off - it shows cached info
-        if self._should_zero() and self._field != "model":
-            return self._zero_value()
-
-        # Position parsing (computed from curPosition string)
-        if self._field in ("__pos_x__", "__pos_y__", "__pos_z__"):
-            x, y, z = _parse_position(d)
-            return {"__pos_x__": x, "__pos_y__": y, "__pos_z__": z}[self._field]
-
-        # Print progress
-        if self._field == "__progress__":
-            return d.get("printProgress") or d.get("dProgress")
-
-        return d.get(self._field)
+        if not self._is_system and self._should_zero():
+            return self._zero
+        return self._value(self.coordinator)
 
     @property
     def extra_state_attributes(self):
-        # System entity (model) uses cached data from config entry, never live data
-        if self._field == "model":
-            cached_info = self._get_cached_device_info()
-            if cached_info:
-                d = {}
-                if cached_info.get("hostname"):
-                    d["hostname"] = cached_info.get("hostname")
-                if cached_info.get("modelVersion"):
-                    d["modelVersion"] = cached_info.get("modelVersion")
-                return d
-        
-        return self._get_attrs(self.coordinator.data)
+        return self._attrs(self.coordinator)
 
 
 class KMappedSensor(KEntity, SensorEntity):
@@ -286,7 +374,8 @@ class KMappedSensor(KEntity, SensorEntity):
     def __init__(self, coordinator, spec: dict[str, Any]):
         super().__init__(coordinator, spec["name"], spec["uid"])
         self._field: str = spec["field"]
-        self._mapping: dict[int, str] = spec.get("mapping", {})
+        self._label = _compile_mapping(spec.get("mapping", {}))
+        self._watch_keys = (self._field,)
         if spec.get("icon"):
             self._attr_icon = spec["icon"]
 
@@ -294,25 +383,16 @@ class KMappedSensor(KEntity, SensorEntity):
     def native_value(self) -> str | None:
         if self._should_zero():
             return "Unknown"
-            
-        d = self.coordinator.data
-        if not d:
-            return "Unknown"
-            
-        raw = d.get(self._field)
-        if raw is None:
-            return "Unknown"
-            
-        try:
-            val = int(raw)
-            return self._mapping.get(val, str(raw))
-        except (ValueError, TypeError):
-            return str(raw)
+        return self._label(self.coordinator.data.get(self._field))
 
 
 class PrintStatusSensor(KEntity, SensorEntity):
     _attr_name = "Print Status"
     _attr_icon = "mdi:printer-3d"
+    _watch_keys = (
+        "err", "withSelfTest", "state", "printFileName", "printProgress", "dProgress",
+        "printJobTime", "printLeftTime", "usedMaterialLength", "realTimeFlow",
+    )
 
     def __init__(self, coordinator):
         super().__init__(coordinator, self._attr_name, "print_status")
@@ -330,22 +410,17 @@ class PrintStatusSensor(KEntity, SensorEntity):
         # If we get here, the printer is ON and CONNECTED.
         # Now, determine the operational state.
         d = self.coordinator.data or {}
+        derived = self.coordinator.derived
 
-        if d.get("err", {}).get("errcode", 0) != 0:
+        if derived.error_code != 0:
             return "error"
 
-        if 1 <= d.get("withSelfTest", 0) <= 99:
+        if derived.self_testing:
             return "self-testing"
 
         st = d.get("state")
         fname = d.get("printFileName") or ""
-        progress = d.get("printProgress") or d.get("dProgress")
-
-        # Ensure progress is a number before comparing
-        try:
-            progress = int(progress) if progress is not None else -1
-        except (ValueError, TypeError):
-            progress = -1
+        progress = derived.progress_pct
 
         if fname:
             if progress >= 100:
@@ -367,7 +442,7 @@ class PrintStatusSensor(KEntity, SensorEntity):
         d = self.coordinator.data or {}
         attrs = {
             "file": d.get("printFileName") or "",
-            "progress": d.get("printProgress") or d.get("dProgress"),
+            "progress": self.coordinator.derived.progress,
             "job_time_s": d.get("printJobTime"),
             "left_time_s": d.get("printLeftTime"),
             "used_material_mm": d.get("usedMaterialLength"),
@@ -376,7 +451,7 @@ class PrintStatusSensor(KEntity, SensorEntity):
             "state_raw": d.get("state"),
             "err": d.get("err"),
         }
-        err_code = d.get("err", {}).get("errcode", 0)
+        err_code = self.coordinator.derived.error_code
         if err_code != 0:
             attrs["error_code"] = err_code
             # The error message mapping function is not yet implemented, so it remains commented out.
@@ -392,6 +467,8 @@ class UsedMaterialLengthSensor(KEntity, SensorEntity):
     _attr_device_class = SensorDeviceClass.DISTANCE
     _attr_state_class = SensorStateClass.MEASUREMENT
 
+    _watch_keys = ("usedMaterialLength",)
+
     def __init__(self, coordinator):
         super().__init__(coordinator, self._attr_name, "used_material_length")
 
@@ -399,12 +476,8 @@ class UsedMaterialLengthSensor(KEntity, SensorEntity):
     def native_value(self) -> float | None:
         if self._should_zero():
             return 0.0
-        v = self.coordinator.data.get("usedMaterialLength")
-        try:
-            mm = float(v)
-            return round(mm / 10.0, 2)
-        except (TypeError, ValueError):
-            return None
+        mm = self.coordinator.data.numbers.get("usedMaterialLength")
+        return round(mm / 10.0, 2) if mm is not None else None
 
 class PrintJobTimeSensor(KEntity, SensorEntity):
     _attr_name = "Print Job Time"
@@ -413,6 +486,8 @@ class PrintJobTimeSensor(KEntity, SensorEntity):
     _attr_device_class = SensorDeviceClass.DURATION
     _attr_state_class = SensorStateClass.MEASUREMENT
 
+    _watch_keys = ("printJobTime",)
+
     def __init__(self, coordinator):
         super().__init__(coordinator, self._attr_name, "print_job_time")
 
@@ -420,11 +495,8 @@ class PrintJobTimeSensor(KEntity, SensorEntity):
     def native_value(self) -> int | None:
         if self._should_zero():
             return 0
-        v = self.coordinator.data.get("printJobTime")
-        try:
-            return int(v) if v is not None else None
-        except (TypeError, ValueError):
-            return None
+        v = self.coordinator.data.numbers.get("printJobTime")
+        return int(v) if v is not None else None
 
 class PrintLeftTimeSensor(KEntity, SensorEntity):
     _attr_name = "Print Time Left"
@@ -433,6 +505,8 @@ class PrintLeftTimeSensor(KEntity, SensorEntity):
     _attr_device_class = SensorDeviceClass.DURATION
     _attr_state_class = SensorStateClass.MEASUREMENT
 
+    _watch_keys = ("printLeftTime",)
+
     def __init__(self, coordinator):
         super().__init__(coordinator, self._attr_name, "print_left_time")
 
@@ -440,11 +514,8 @@ class PrintLeftTimeSensor(KEntity, SensorEntity):
     def native_value(self) -> int | None:
         if self._should_zero():
             return 0
-        v = self.coordinator.data.get("printLeftTime")
-        try:
-            return int(v) if v is not None else None
-        except (TypeError, ValueError):
-            return None
+        v = self.coordinator.data.numbers.get("printLeftTime")
+        return int(v) if v is not None else None
 
 class RealTimeFlowSensor(KEntity, SensorEntity):
     _attr_name = "Real-Time Flow"
@@ -453,6 +524,8 @@ class RealTimeFlowSensor(KEntity, SensorEntity):
     _attr_native_unit_of_measurement = "mm³/s"
     _attr_state_class = SensorStateClass.MEASUREMENT
 
+    _watch_keys = ("realTimeFlow",)
+
     def __init__(self, coordinator):
         super().__init__(coordinator, self._attr_name, "real_time_flow")
 
@@ -460,12 +533,17 @@ class RealTimeFlowSensor(KEntity, SensorEntity):
     def native_value(self) -> float | None:
         if self._should_zero():
             return 0.0
-        return _safe_float(self.coordinator.data.get("realTimeFlow"))
+        v = self.coordinator.data.numbers.get("realTimeFlow")
+        return float(v) if v is not None else None
 
 
 class CurrentObjectSensor(KEntity, SensorEntity):
     _attr_name = "Current Object"
     _attr_icon = "mdi:cube-outline"
+    _watch_keys = (
+        "current_object", "currentObject", "printFileName",
+        "excluded_objects_list", "excluded_objects",
+    )
 
     def __init__(self, coordinator):
         super().__init__(coordinator, self._attr_name, "current_object")
@@ -501,6 +579,7 @@ class ObjectCountSensor(KEntity, SensorEntity):
     _attr_name = "Object Count"
     _attr_icon = "mdi:format-list-numbered"
     _attr_state_class = SensorStateClass.MEASUREMENT
+    _watch_keys = ("printFileName", "objects_list", "objectsList", "objects")
 
     def __init__(self, coordinator):
         super().__init__(coordinator, self._attr_name, "object_count")
@@ -511,36 +590,7 @@ class ObjectCountSensor(KEntity, SensorEntity):
         if self._should_zero():
             return 0
         
-        d = self.coordinator.data or {}
-        
-        # Check if printer is actually printing
-        fname = d.get("printFileName") or ""
-        if not fname:
-            return 0  # "not printing" equivalent for numeric sensor
-        
-        # Try to get objects data from various possible fields
-        objs = d.get("objects_list") or d.get("objectsList") or d.get("objects")
-        
-        # Handle JSON string format (from diagnostic logs)
-        if isinstance(objs, str):
-            try:
-                parsed_objs = json.loads(objs)
-                if isinstance(parsed_objs, list):
-                    return len(parsed_objs)
-            except (json.JSONDecodeError, TypeError):
-                pass
-        
-        # Handle array format
-        if isinstance(objs, list):
-            return len(objs)
-        
-        # Handle dict format with list inside
-        if isinstance(objs, dict):
-            lst = objs.get("list")
-            if isinstance(lst, list):
-                return len(lst)
-        
-        return None
+        return self.coordinator.derived.object_count
 
 
 class KPrintControlSensor(KEntity, SensorEntity):
@@ -548,14 +598,26 @@ class KPrintControlSensor(KEntity, SensorEntity):
     _attr_name = "Print Control"
     _attr_icon = "mdi:debug-step-over"
     _attr_state_class = None  # not a measurement
+    _watch_keys = ("state", "deviceState", "printFileName", "printProgress", "dProgress", CONTROL_STATE_KEY)
 
     def __init__(self, coordinator):
         super().__init__(coordinator, self._attr_name, "print_control")
 
+    def _state_inputs(self) -> tuple[Any, ...]:
+        # Queue and cadence changes arrive via CONTROL_STATE_KEY; only write
+        # when something shown here moved
+        coord = self.coordinator
+        d = coord.data
+        return (
+            coord.broadcast_count, self.available, coord.available, tuple(coord.queued_commands()),
+            d.get("state"), d.get("deviceState"), d.get("printFileName"), coord.derived.progress,
+            coord.client.cadence_profile, coord.showing_restored(),
+        )
+
     @property
     def native_value(self) -> str | None:
         # Keep state human-readable but stable: "queued" if anything is pending, else "ok".
-        if self.coordinator.pending_pause() or self.coordinator.pending_resume():
+        if self.coordinator.queued_commands():
             return "queued"
         return "ok" if self.coordinator.available else "unknown"
 
@@ -565,14 +627,76 @@ class KPrintControlSensor(KEntity, SensorEntity):
         return {
             "pending_pause": self.coordinator.pending_pause(),
             "pending_resume": self.coordinator.pending_resume(),
+            "queued_commands": self.coordinator.queued_commands(),
             "paused": self.coordinator.paused_flag(),
             # raw hints (useful for debugging UI logic)
             "status_raw_state": d.get("state"),
             "status_raw_deviceState": d.get("deviceState"),
             "print_file": d.get("printFileName") or "",
-            "progress": d.get("printProgress") or d.get("dProgress"),
+            "progress": self.coordinator.derived.progress,
+            "cadence_profile": self.coordinator.client.cadence_profile,
+            "telemetry_restored": self.coordinator.showing_restored(),
         }
 
+
+# Friendly names for the command latency sensors
+_COMMAND_LABELS: dict[str, str] = {
+    "nozzleTempControl": "Nozzle Target",
+    "bedTempControl": "Bed Target",
+    "boxTempControl": "Chamber Target",
+    "setFeedratePct": "Print Speed",
+    "setFlowratePct": "Flow Rate",
+    "lightSw": "Light",
+    "pause": "Pause",
+    "resume": "Resume",
+    "stop": "Stop",
+    "autohome": "Home",
+    "M106": "Fan",
+}
+
+
+class KCommandLatencySensor(KEntity, SensorEntity):
+    """Diagnostic sensor: round trip of one command type until telemetry reflects it.
+
+    Each command gets a median (p50) and a tail (p95) sensor. The
+    confirmed/unconfirmed counters are attributes; a growing unconfirmed
+    count means the firmware is ignoring that command.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = U_MS
+    _attr_icon = "mdi:timer-sync-outline"
+
+    def __init__(self, coordinator, command: str, percentile: int = 50):
+        label = _COMMAND_LABELS.get(command, command)
+        if percentile == 50:
+            name, uid = f"{label} Command Latency", f"cmd_latency_{command.lower()}"
+        else:
+            name, uid = f"{label} Command Latency p{percentile}", f"cmd_latency_p{percentile}_{command.lower()}"
+        super().__init__(coordinator, name, uid)
+        self._command = command
+        self._percentile = percentile
+        # Confirming telemetry, plus the tracker's wake-up when a command times out
+        self._watch_keys = TRACKED_COMMANDS[command] + (command_stats_key(command),)
+
+    def _state_inputs(self) -> tuple[Any, ...]:
+        st = self.coordinator.client.tracker.stats(self._command)
+        return (
+            self.coordinator.broadcast_count, self.available,
+            st.sent, st.confirmed, st.unconfirmed, st.superseded,
+        )
+
+    @property
+    def native_value(self) -> float | None:
+        value = self.coordinator.client.tracker.stats(self._command).percentile(self._percentile)
+        return round(value, 1) if value is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return self.coordinator.client.tracker.stats(self._command).as_dict()
+
 # ----------------- setup -----------------
 
 class KCFSBoxSensor(KEntity, SensorEntity):
@@ -583,6 +707,7 @@ class KCFSBoxSensor(KEntity, SensorEntity):
         name = f"CFS Box {box_id} {sensor_type.capitalize()}"
         super().__init__(coordinator, name, uid)
         self._box_id = box_id
+        self._watch_keys = (cfs_box_key(box_id),)
         self._type = sensor_type  # "temp" or "humidity"
         if sensor_type == "temp":
             self._attr_device_class = SensorDeviceClass.TEMPERATURE
@@ -592,12 +717,12 @@ class KCFSBoxSensor(KEntity, SensorEntity):
             self._attr_native_unit_of_measurement = U_PERCENT
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
-    def _get_box_data(self) -> dict[str, Any] | None:
-        boxes = self.coordinator.data.get("boxsInfo", {}).get("materialBoxs", [])
-        for b in boxes:
-            if b.get("id") == self._box_id:
-                return b
-        return None
+    def _get_box_data(self) -> Mapping[str, Any] | None:
+        return self.coordinator.derived.cfs.box(self._box_id)
+
+    def _state_inputs(self) -> tuple[Any, ...]:
+        # The watch key is synthetic; the box itself is the input
+        return (self.coordinator.broadcast_count, self.available, self._get_box_data())
 
     @property
     def native_value(self) -> float | None:
@@ -619,6 +744,7 @@ class KCFSSlotSensor(KEntity, SensorEntity):
         super().__init__(coordinator, name, uid)
         self._box_id = box_id
         self._slot_id = slot_id
+        self._watch_keys = (cfs_slot_key(box_id, slot_id),)
         self._type = sensor_type  # "filament", "color", "percent"
         
         if sensor_type == "percent":
@@ -627,15 +753,11 @@ class KCFSSlotSensor(KEntity, SensorEntity):
         elif sensor_type == "color":
             self._attr_icon = "mdi:palette"
 
-    def _get_slot_data(self) -> dict[str, Any] | None:
-        boxes = self.coordinator.data.get("boxsInfo", {}).get("materialBoxs", [])
-        for b in boxes:
-            if b.get("id") == self._box_id:
-                materials = b.get("materials", [])
-                for m in materials:
-                    if m.get("id") == self._slot_id:
-                        return m
-        return None
+    def _get_slot_data(self) -> Mapping[str, Any] | None:
+        return self.coordinator.derived.cfs.slot(self._box_id, self._slot_id)
+
+    def _state_inputs(self) -> tuple[Any, ...]:
+        return (self.coordinator.broadcast_count, self.available, self._get_slot_data())
 
     @property
     def native_value(self) -> Any:
@@ -676,6 +798,8 @@ class KCFSSlotSensor(KEntity, SensorEntity):
 class KCFSExtSlotSensor(KEntity, SensorEntity):
     """Sensor for the External Filament slot (Filament type/color/percent)."""
 
+    _watch_keys = (CFS_EXTERNAL_KEY,)
+
     def __init__(self, coordinator, slot_id: int, sensor_type: str):
         uid = f"cfs_external_{sensor_type}"
         type_label = sensor_type.replace("_", " ").capitalize()
@@ -690,22 +814,11 @@ class KCFSExtSlotSensor(KEntity, SensorEntity):
         elif sensor_type == "color":
             self._attr_icon = "mdi:palette"
 
-    def _get_external_box(self) -> dict[str, Any] | None:
-        boxes = self.coordinator.data.get("boxsInfo", {}).get("materialBoxs", [])
-        for b in boxes:
-            if b.get("type") == 1:
-                return b
-        return None
+    def _get_slot_data(self) -> Mapping[str, Any] | None:
+        return self.coordinator.derived.cfs.external_slot(self._slot_id)
 
-    def _get_slot_data(self) -> dict[str, Any] | None:
-        box = self._get_external_box()
-        if not box:
-            return None
-        materials = box.get("materials", [])
-        for m in materials:
-            if m.get("id") == self._slot_id:
-                return m
-        return materials[0] if materials else None
+    def _state_inputs(self) -> tuple[Any, ...]:
+        return (self.coordinator.broadcast_count, self.available, self._get_slot_data())
 
     @property
     def native_value(self) -> Any:
@@ -749,33 +862,35 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     # Track which CFS entities we've already added to avoid duplicates
     added_cfs_uids: set[str] = set()
+    # CFS layout as of the last add_cfs_entities() call; new entities come from its diff
+    seen_cfs: CfsIndex | None = None
+    seen_cfs_box = False
 
     def add_cfs_entities():
-        """Helper to create CFS entities from current data."""
-        new_ents = []
-        cfs_data = coord.data.get("boxsInfo", {})
-        
-        if not cfs_data:
+        """Create entities for the CFS boxes and slots that changed since the last call."""
+        nonlocal seen_cfs, seen_cfs_box
+        cfs = coord.derived.cfs
+        if not cfs.boxes and cfs.external_box is None:
             _LOGGER.debug("add_cfs_entities: No boxsInfo in coordinator data")
             return []
+        has_cfs_box = any(box.get("type") == 0 for box in cfs.boxes.values())
+        # A CFS (dis)appearing changes which boxes are skipped: look at all of them
+        changed = CfsDiff(None if has_cfs_box != seen_cfs_box else seen_cfs, cfs).changed
+        seen_cfs, seen_cfs_box = cfs, has_cfs_box
+        _LOGGER.debug("add_cfs_entities processing %d changed CFS parts", len(changed))
+        if not changed:
+            return []
 
-        material_boxes = cfs_data.get("materialBoxs", [])
-        _LOGGER.debug("add_cfs_entities processing %d materialBoxs", len(material_boxes))
-        
-        has_cfs_box = any(box.get("type") == 0 for box in material_boxes)
-        external_box = next((box for box in material_boxes if box.get("type") == 1), None)
-        
-        for box in material_boxes:
-            box_id = box.get("id")
-            if box_id is None:
-                _LOGGER.debug("Skipping box with no ID: %s", box)
-                continue
-            if has_cfs_box and box.get("type") == 1:
-                _LOGGER.debug("Skipping external box (type 1) because CFS (type 0) is present")
-                continue
+        new_ents = []
 
-            
-            # Box sensors
+        def _skip(box: Mapping[str, Any]) -> bool:
+            # The external holder gets its own sensors when a CFS (type 0) is present
+            return has_cfs_box and box.get("type") == 1
+
+        # Box sensors
+        for box_id, box in cfs.boxes.items():
+            if cfs_box_key(box_id) not in changed or _skip(box):
+                continue
             for s_type in ("temp", "humidity"):
                 if box.get(s_type) is not None:
                     uid = f"cfs_box_{box_id}_{s_type}"
@@ -783,28 +898,20 @@ async def async_setup_entry(hass, entry, async_add_entities):
                         new_ents.append(KCFSBoxSensor(coord, box_id, s_type))
                         added_cfs_uids.add(uid)
                         _LOGGER.debug("Registered new CFS UID: %s", uid)
-                    else:
-                         _LOGGER.debug("Skipping existing CFS UID: %s", uid)
-                
-            # Slots
-            for idx, slot in enumerate(box.get("materials", [])):
-                slot_id = slot.get("id")
-                try:
-                    slot_id = int(slot_id) if slot_id is not None else None
-                except (TypeError, ValueError):
-                    slot_id = None
-                if slot_id is None or slot_id < 0:
-                    slot_id = idx
-                for s_type in ("filament", "color", "percent"):
-                    uid = f"cfs_box_{box_id}_slot_{slot_id}_{s_type}"
-                    if uid not in added_cfs_uids:
-                        new_ents.append(KCFSSlotSensor(coord, box_id, slot_id, s_type))
-                        added_cfs_uids.add(uid)
-                        _LOGGER.debug("Registered new CFS Slot UID: %s", uid)
-                    else:
-                        _LOGGER.debug("Skipping existing CFS Slot UID: %s", uid)
 
-        if external_box:
+        # Slots
+        for box_id, slot_id in cfs.slots:
+            if cfs_slot_key(box_id, slot_id) not in changed or _skip(cfs.boxes[box_id]):
+                continue
+            for s_type in ("filament", "color", "percent"):
+                uid = f"cfs_box_{box_id}_slot_{slot_id}_{s_type}"
+                if uid not in added_cfs_uids:
+                    new_ents.append(KCFSSlotSensor(coord, box_id, slot_id, s_type))
+                    added_cfs_uids.add(uid)
+                    _LOGGER.debug("Registered new CFS Slot UID: %s", uid)
+
+        external_box = cfs.external_box
+        if external_box and CFS_EXTERNAL_KEY in changed:
             materials = external_box.get("materials", [])
             if materials:
                 slot_id = materials[0].get("id", 0)
@@ -814,8 +921,6 @@ async def async_setup_entry(hass, entry, async_add_entities):
                         new_ents.append(KCFSExtSlotSensor(coord, slot_id, s_type))
                         added_cfs_uids.add(uid)
                         _LOGGER.debug("Registered new CFS External UID: %s", uid)
-                    else:
-                        _LOGGER.debug("Skipping existing CFS External UID: %s", uid)
             else:
                 _LOGGER.debug("External box found but has no materials")
 
@@ -823,29 +928,6 @@ async def async_setup_entry(hass, entry, async_add_entities):
         return new_ents
 
 
-    # Dynamic CFS entity handler
-    def _on_new_entities():
-        """Handle signal for new entities (e.g. late CFS discovery)."""
-        _LOGGER.debug("Dynamic entity signal received, checking for new CFS entities...")
-        new_ents = add_cfs_entities()
-        if new_ents:
-            _LOGGER.info("Adding %d dynamic CFS entities", len(new_ents))
-            # Ensure we run on the main loop if we are in a thread
-            from asyncio import run_coroutine_threadsafe
-            async def _schedule_add():
-                await async_add_entities(new_ents)
-            run_coroutine_threadsafe(_schedule_add(), hass.loop)
-    
-    # Listen for the signal fired by coordinator
-    entry.async_on_unload(
-        async_dispatcher_connect(
-            hass, 
-            f"{DOMAIN}_new_entities_{entry.entry_id}", 
-            _on_new_entities
-        )
-    )
-
-    
     # Core sensors
     ents.append(PrintStatusSensor(coord))
     ents.append(UsedMaterialLengthSensor(coord))
@@ -855,6 +937,9 @@ async def async_setup_entry(hass, entry, async_add_entities):
     ents.append(CurrentObjectSensor(coord))
     ents.append(ObjectCountSensor(coord))
     ents.append(KPrintControlSensor(coord))
+    for command in TRACKED_COMMANDS:
+        ents.append(KCommandLatencySensor(coord, command))
+        ents.append(KCommandLatencySensor(coord, command, percentile=95))
     
     # Static model/host sensor
     ents.append(KSimpleFieldSensor(
@@ -869,85 +954,70 @@ async def async_setup_entry(hass, entry, async_add_entities):
             "attrs": lambda d: _attr_dict(
                 ("hostname", d.get("hostname")),
                 ("modelVersion", d.get("modelVersion")),
-            )
+            ),
         }
     ))
 
-
-    # Add chamber temperature if supported by model. Also allow live-telemetry fallback if cache missing.
-    has_box_sensor = entry.data.get("_cached_has_chamber_sensor", entry.data.get("_cached_has_box_sensor", False))
-    live = coord.data or {}
-    if not has_box_sensor:
-        # Heuristics: if boxTemp or targetBoxTemp appears, expose the sensor.
-        if any(k in live for k in ("boxTemp", "targetBoxTemp", "maxBoxTemp")):
-            has_box_sensor = True
-    
+    # Chamber temperature is capability-gated and added below
     for spec in SPECS:
-        if spec.get("uid") == "box_temperature":
-            if has_box_sensor:
-                ents.append(KSimpleFieldSensor(coord, spec))
-        else:
+        if spec.get("uid") != "box_temperature":
             ents.append(KSimpleFieldSensor(coord, spec))
 
     # Mapped sensors
     for spec in MAPPED_SPECS:
         ents.append(KMappedSensor(coord, spec))
 
-    # Additional metrics
-
-    # --- Max temperature sensors (non-editable, from cached/live capability limits) ---
-    # Pull cached values first
-    cached = None
-    try:
-        cached = coord.hass.config_entries.async_get_entry(getattr(coord, "_config_entry_id", None)).data  # type: ignore[assignment]
-    except Exception:  # pylint: disable=broad-except
-        cached = None
-
-    def _cached_or_live(key: str):
-        if cached and (key in cached or f"_cached_{key}" in cached):
-            # keys in entry use _cached_max_* naming; coordinator/live uses max* keys
-            if key == "max_bed_temp":
-                return cached.get("_cached_max_bed_temp")
-            if key == "max_nozzle_temp":
-                return cached.get("_cached_max_nozzle_temp")
-            if key == "max_box_temp":
-                return cached.get("_cached_max_chamber_temp", cached.get("_cached_max_box_temp"))
-        d = coord.data or {}
-        if key == "max_bed_temp":
-            return d.get("maxBedTemp")
-        if key == "max_nozzle_temp":
-            return d.get("maxNozzleTemp")
-        if key == "max_box_temp":
-            return d.get("maxBoxTemp")
-        return None
-
-    max_noz = _cached_or_live("max_nozzle_temp")
-    max_bed = _cached_or_live("max_bed_temp")
-    max_box = _cached_or_live("max_box_temp")
-
-    if max_noz is not None:
-        ents.append(KMaxTempSensor(coord, name="Max Nozzle Temperature", uid="max_nozzle_temp", key="max_nozzle_temp"))
-    if max_bed is not None:
-        ents.append(KMaxTempSensor(coord, name="Max Bed Temperature", uid="max_bed_temp", key="max_bed_temp"))
-    # Only expose chamber max if model supports chamber sensor/control or we detect a value
-    if has_box_sensor and max_box is not None:
-        ents.append(KMaxTempSensor(coord, name="Max Chamber Temperature", uid="max_box_temp", key="max_box_temp"))
-
     # Register static entities immediately
     try:
         async_add_entities(ents)
     except Exception as err:  # pylint: disable=broad-except
         _LOGGER.error("Failed to add static sensors: %s", err)
 
-    # --- CFS Entities (Dynamic Initial Load) ---
-    try:
-        cfs_ents = add_cfs_entities()
-        if cfs_ents:
-            async_add_entities(cfs_ents)
-    except Exception as err:  # pylint: disable=broad-except
-        _LOGGER.error("Failed to add initial CFS sensors: %s", err)
+    # --- Capability-gated sensors (cache at setup, confirmed later by discovery) ---
+    added_capability_uids: set[str] = set()
+
+    def add_capability_entities() -> list[SensorEntity]:
+        new_ents: list[SensorEntity] = []
+        live = coord.data or {}
+        # Add chamber temperature if supported by model. Also allow live-telemetry fallback if cache missing.
+        has_box_sensor = coord.capabilities.has_chamber_sensor
+        if not has_box_sensor:
+            # Heuristics: if boxTemp or targetBoxTemp appears, expose the sensor.
+            has_box_sensor = any(k in live for k in ("boxTemp", "targetBoxTemp", "maxBoxTemp"))
+
+        if has_box_sensor and "box_temperature" not in added_capability_uids:
+            for spec in SPECS:
+                if spec.get("uid") == "box_temperature":
+                    new_ents.append(KSimpleFieldSensor(coord, spec))
+            added_capability_uids.add("box_temperature")
+
+        # --- Max temperature sensors (non-editable, from cached/live capability limits) ---
+        max_sensors = (
+            ("max_nozzle_temp", "Max Nozzle Temperature", True),
+            ("max_bed_temp", "Max Bed Temperature", True),
+            # Only expose chamber max if model supports chamber sensor/control or we detect a value
+            ("max_box_temp", "Max Chamber Temperature", has_box_sensor),
+        )
+        for key, name, allowed in max_sensors:
+            if allowed and key not in added_capability_uids and coord.capabilities.max_temp(key, live) is not None:
+                new_ents.append(KMaxTempSensor(coord, name=name, uid=key, key=key))
+                added_capability_uids.add(key)
+        return new_ents
 
+    def _build() -> list[SensorEntity]:
+        """Entities confirmed so far: capability sensors plus CFS boxes/slots."""
+        new_ents: list[SensorEntity] = []
+        try:
+            new_ents.extend(add_capability_entities())
+            new_ents.extend(add_cfs_entities())
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error("Failed to add dynamic sensors: %s", err)
+        if new_ents:
+            _LOGGER.info("Adding %d dynamic sensors", len(new_ents))
+        return new_ents
 
+    # Runs now and again whenever discovery or late CFS data fires the signal
+    async_track_new_entities(hass, entry, async_add_entities, _build)
 
 
 class KMaxTempSensor(KEntity, SensorEntity):
@@ -962,6 +1032,7 @@ class KMaxTempSensor(KEntity, SensorEntity):
     def __init__(self, coordinator, name: str, uid: str, key: str):
         super().__init__(coordinator, name, uid)
         self._key = key  # one of: max_nozzle_temp, max_bed_temp, max_box_temp
+        self._watch_keys = (MAX_TEMP_FIELDS[key],)
         # Use Celsius unit
         try:
             # Prefer UnitOfTemperature if available
@@ -976,37 +1047,10 @@ class KMaxTempSensor(KEntity, SensorEntity):
         # Max temp sensors are configuration constants, always available
         return True
 
-    def _read_cached_or_live(self) -> float | None:
-        # From entry cache
-        try:
-            entry_id = getattr(self.coordinator, "_config_entry_id", None)
-            if entry_id:
-                entry = self.coordinator.hass.config_entries.async_get_entry(entry_id)
-                if entry and entry.data.get("_device_info_cached"):
-                    if self._key == "max_nozzle_temp":
-                        return entry.data.get("_cached_max_nozzle_temp")
-                    if self._key == "max_bed_temp":
-                        return entry.data.get("_cached_max_bed_temp")
-                    if self._key == "max_box_temp":
-                        # Prefer new chamber cache with legacy fallback
-                        return entry.data.get("_cached_max_chamber_temp", entry.data.get("_cached_max_box_temp"))
-        except (AttributeError, KeyError):
-            # Ignore cache read errors and fall back to live telemetry.
-            pass
-        # Live telemetry fallback
-        d = self.coordinator.data or {}
-        if self._key == "max_nozzle_temp":
-            return d.get("maxNozzleTemp")
-        if self._key == "max_bed_temp":
-            return d.get("maxBedTemp")
-        if self._key == "max_box_temp":
-            return d.get("maxBoxTemp")
-        return None
-
     @property
     def native_value(self) -> float | None:
         # Do NOT zero when printer is off; these are capability constants
-        v = self._read_cached_or_live()
+        v = self.coordinator.capabilities.max_temp(self._key, self.coordinator.data)
         try:
             return float(v) if v is not None else None
         except (TypeError, ValueError):
@@ -15,7 +15,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     coord = hass.data[DOMAIN][entry.entry_id]
     
     # Light switch only if model supports it
-    has_light = entry.data.get("_cached_has_light", True)
+    has_light = coord.capabilities.has_light
     if not has_light:
         # Fallback: if telemetry already exposes lightSw field, allow switch.
         if "lightSw" in (coord.data or {}):
@@ -46,6 +46,7 @@ class KSimpleSwitch(KEntity, SwitchEntity):
     def __init__(self, coordinator, name: str, field: str, unique_id: str):
         super().__init__(coordinator, name, unique_id)
         self._field = field
+        self._watch_keys = (field,)
 
     @property
     def is_on(self) -> bool:
@@ -55,7 +56,7 @@ class KSimpleSwitch(KEntity, SwitchEntity):
         return bool(val) if val is not None else False
 
     async def async_turn_on(self, **kwargs):
-        await self.coordinator.client.send_set_retry(**{self._field: 1})
+        await self.coordinator.request_command(self._field, {self._field: 1})
 
     async def async_turn_off(self, **kwargs):
-        await self.coordinator.client.send_set_retry(**{self._field: 0})
\ No newline at end of file
+        await self.coordinator.request_command(self._field, {self._field: 0})
\ No newline at end of file
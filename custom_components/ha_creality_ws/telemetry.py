@@ -0,0 +1,350 @@
+"""Values derived from raw telemetry, computed once per change of their inputs."""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Iterable, Mapping
+
+from .utils import parse_position
+
+Position = tuple[float | None, float | None, float | None]
+
+_OBJECT_KEYS = ("objects_list", "objectsList", "objects")
+
+
+def _to_number(v: Any) -> int | float | None:
+    # Same int/float rule as NumberCoercer; anything non-numeric reads as None
+    if isinstance(v, (int, float)):
+        return v
+    if isinstance(v, str):
+        try:
+            return float(v) if "." in v else int(v)
+        except ValueError:
+            return None
+    return None
+
+
+# Hot numeric fields with a typed view: temperatures, targets, limits,
+# progress, layers, rates, fans and state codes
+NUMERIC_FIELDS: frozenset[str] = frozenset((
+    "nozzleTemp", "targetNozzleTemp", "maxNozzleTemp",
+    "bedTemp0", "targetBedTemp0", "bedTemp1", "targetBedTemp1", "maxBedTemp",
+    "boxTemp", "targetBoxTemp", "maxBoxTemp",
+    "printProgress", "dProgress", "printJobTime", "printLeftTime",
+    "layer", "TotalLayer", "usedMaterialLength",
+    "realTimeFlow", "realTimeSpeed", "curFeedratePct", "curFlowratePct",
+    "modelFanPct", "caseFanPct", "auxiliaryFanPct",
+    "state", "deviceState", "withSelfTest", "lightSw",
+))
+_NUMBER_TYPES = frozenset((int, float))
+
+
+class TelemetrySnapshot(dict):
+    """Merged printer telemetry, kept exactly as the printer sent it.
+
+    A plain dict, so ``get`` and frame merges run at dict speed. The hot
+    numeric fields also get a typed view in ``numbers`` (int/float, or
+    None when the raw value is not numeric), refreshed only for the keys
+    a merge touches, so entities read them with one dict lookup instead
+    of converting on every read.
+    """
+
+    __slots__ = ("numbers",)
+
+    def __init__(self, data: Mapping[str, Any] | None = None) -> None:
+        super().__init__()
+        self.numbers: dict[str, int | float | None] = {}
+        if data:
+            self.update(data)
+
+    def update(self, other: Any = (), /, **kwargs: Any) -> None:  # type: ignore[override]
+        items = other if isinstance(other, dict) and not kwargs else dict(other, **kwargs)
+        dict.update(self, items)
+        numbers, hot = self.numbers, NUMERIC_FIELDS
+        for key, value in items.items():
+            if key in hot:
+                # NumberCoercer already typed most values; only odd ones need converting
+                numbers[key] = value if value.__class__ in _NUMBER_TYPES else _to_number(value)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        dict.__setitem__(self, key, value)
+        if key in NUMERIC_FIELDS:
+            self.numbers[key] = _to_number(value)
+
+    def __delitem__(self, key: str) -> None:
+        dict.__delitem__(self, key)
+        self.numbers.pop(key, None)
+
+    def pop(self, key: str, *default: Any) -> Any:  # type: ignore[override]
+        self.numbers.pop(key, None)
+        return dict.pop(self, key, *default)
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.numbers.clear()
+
+
+def _progress(d: Mapping[str, Any]) -> Any:
+    # Raw value as reported; K1 firmware uses printProgress, others dProgress
+    return d.get("printProgress") or d.get("dProgress")
+
+
+def _progress_pct(d: Mapping[str, Any]) -> int:
+    value = _progress(d)
+    try:
+        return int(value) if value is not None else -1
+    except (TypeError, ValueError):
+        return -1
+
+
+def _has_job(d: Mapping[str, Any]) -> bool:
+    fname = (d.get("printFileName") or "").strip()
+    return bool(fname) and d.get("printProgress", d.get("dProgress")) is not None
+
+
+def _object_count(d: Mapping[str, Any]) -> int | None:
+    if not d.get("printFileName"):
+        return 0  # "not printing" equivalent for numeric sensor
+    objs = d.get("objects_list") or d.get("objectsList") or d.get("objects")
+    # Handle JSON string format (from diagnostic logs)
+    if isinstance(objs, str):
+        try:
+            objs = json.loads(objs)
+        except (json.JSONDecodeError, TypeError):
+            return None
+    if isinstance(objs, list):
+        return len(objs)
+    # Handle dict format with list inside
+    if isinstance(objs, dict) and isinstance(objs.get("list"), list):
+        return len(objs["list"])
+    return None
+
+
+def _error_code(d: Mapping[str, Any]) -> int:
+    err = d.get("err")
+    if not isinstance(err, Mapping):
+        return 0
+    try:
+        return int(err.get("errcode", 0) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def slot_id_of(slot: Mapping[str, Any], idx: int) -> int:
+    """Return a CFS slot's id, falling back to its list position when missing or invalid."""
+    try:
+        slot_id = int(slot["id"]) if slot.get("id") is not None else -1
+    except (TypeError, ValueError):
+        slot_id = -1
+    return slot_id if slot_id >= 0 else idx
+
+
+class CfsIndex:
+    """O(1) lookups into ``boxsInfo``: boxes by id, slots by (box id, slot id).
+
+    The external spool holder is the box with ``type == 1``; it has one
+    slot, so its lookup falls back to the first material.
+    """
+
+    __slots__ = ("boxes", "slots", "external_box", "_external_slots")
+
+    def __init__(self, boxs_info: Any) -> None:
+        self.boxes: dict[Any, Mapping[str, Any]] = {}
+        self.slots: dict[tuple[Any, int], Mapping[str, Any]] = {}
+        self.external_box: Mapping[str, Any] | None = None
+        self._external_slots: dict[int, Mapping[str, Any]] = {}
+        boxes = boxs_info.get("materialBoxs") if isinstance(boxs_info, Mapping) else None
+        for box in boxes or ():
+            if not isinstance(box, Mapping):
+                continue
+            materials = [m for m in box.get("materials") or () if isinstance(m, Mapping)]
+            if box.get("type") == 1 and self.external_box is None:
+                self.external_box = box
+                self._external_slots = {slot_id_of(m, i): m for i, m in enumerate(materials)}
+            box_id = box.get("id")
+            if box_id is None:
+                continue
+            self.boxes.setdefault(box_id, box)
+            for i, m in enumerate(materials):
+                self.slots.setdefault((box_id, slot_id_of(m, i)), m)
+
+    def box(self, box_id: Any) -> Mapping[str, Any] | None:
+        return self.boxes.get(box_id)
+
+    def slot(self, box_id: Any, slot_id: int) -> Mapping[str, Any] | None:
+        return self.slots.get((box_id, slot_id))
+
+    def external_slot(self, slot_id: int) -> Mapping[str, Any] | None:
+        slot = self._external_slots.get(slot_id)
+        if slot is None and self._external_slots:
+            slot = next(iter(self._external_slots.values()))
+        return slot
+
+
+# Synthetic listener keys for parts of boxsInfo, so a refresh wakes only
+# the CFS entities whose box or slot actually changed
+CFS_EXTERNAL_KEY = "boxsInfo:external"
+
+
+def cfs_box_key(box_id: Any) -> str:
+    return f"boxsInfo:box:{box_id}"
+
+
+def cfs_slot_key(box_id: Any, slot_id: int) -> str:
+    return f"boxsInfo:slot:{box_id}:{slot_id}"
+
+
+def _box_fields(box: Mapping[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in box.items() if k != "materials"}
+
+
+def _box_shape(box: Mapping[str, Any]) -> tuple[Any, ...]:
+    # What entity discovery looks at: box type and which readings exist
+    return (box.get("type"), box.get("temp") is None, box.get("humidity") is None)
+
+
+class CfsDiff:
+    """Changes between two CFS indexes.
+
+    ``changed`` holds the synthetic keys of boxes (own fields) and slots
+    that were added, removed or modified. ``structural`` is True when boxes
+    or slots appeared or disappeared, a box gained or lost a field, changed
+    type or got a first temperature/humidity reading, or the external
+    holder got its first material; that is when new entities may be needed.
+    """
+
+    __slots__ = ("changed", "structural")
+
+    def __init__(self, old: CfsIndex | None, new: CfsIndex) -> None:
+        self.changed: set[str] = set()
+        self.structural = False
+        old_boxes = old.boxes if old is not None else {}
+        old_slots = old.slots if old is not None else {}
+        for box_id in old_boxes.keys() | new.boxes.keys():
+            before, after = old_boxes.get(box_id), new.boxes.get(box_id)
+            if before is None or after is None:
+                self.structural = True
+                self.changed.add(cfs_box_key(box_id))
+                continue
+            before_fields, after_fields = _box_fields(before), _box_fields(after)
+            if before_fields != after_fields:
+                self.changed.add(cfs_box_key(box_id))
+                if before_fields.keys() != after_fields.keys() or _box_shape(before) != _box_shape(after):
+                    self.structural = True
+        for key in old_slots.keys() | new.slots.keys():
+            before, after = old_slots.get(key), new.slots.get(key)
+            if before != after:
+                self.changed.add(cfs_slot_key(*key))
+                if before is None or after is None:
+                    self.structural = True
+        old_external = old.external_box if old is not None else None
+        if old_external != new.external_box:
+            self.changed.add(CFS_EXTERNAL_KEY)
+            had_materials = bool((old_external or {}).get("materials"))
+            if had_materials != bool((new.external_box or {}).get("materials")):
+                self.structural = True
+
+
+def _self_testing(d: Mapping[str, Any]) -> bool:
+    try:
+        return 1 <= int(d.get("withSelfTest") or 0) <= 99
+    except (TypeError, ValueError):
+        return False
+
+
+# name -> (telemetry keys it reads, function of the merged telemetry)
+_DERIVATIONS: dict[str, tuple[frozenset[str], Callable[[Mapping[str, Any]], Any]]] = {
+    "position": (frozenset({"curPosition"}), parse_position),
+    "progress": (frozenset({"printProgress", "dProgress"}), _progress),
+    "progress_pct": (frozenset({"printProgress", "dProgress"}), _progress_pct),
+    "has_job": (frozenset({"printFileName", "printProgress", "dProgress"}), _has_job),
+    "object_count": (frozenset({"printFileName", *_OBJECT_KEYS}), _object_count),
+    "error_code": (frozenset({"err"}), _error_code),
+    "self_testing": (frozenset({"withSelfTest"}), _self_testing),
+    "cfs": (frozenset({"boxsInfo"}), lambda d: CfsIndex(d.get("boxsInfo"))),
+}
+
+# telemetry key -> derived names to drop when it changes
+_DEPENDENTS: dict[str, tuple[str, ...]] = {}
+for _name, (_keys, _) in _DERIVATIONS.items():
+    for _key in _keys:
+        _DEPENDENTS[_key] = _DEPENDENTS.get(_key, ()) + (_name,)
+
+
+class DerivedValues:
+    """Memoized values derived from the coordinator's merged telemetry.
+
+    Values are computed on first read and kept until a delta touches one
+    of their source keys (``invalidate``), so every entity reading, say,
+    the position between two frames shares one regex match. Replacing the
+    telemetry dict itself (rather than updating it) drops everything.
+    """
+
+    __slots__ = ("_data", "_source", "_cache")
+
+    def __init__(self, data: Callable[[], Mapping[str, Any]]) -> None:
+        self._data = data
+        self._source: Mapping[str, Any] | None = None
+        self._cache: dict[str, Any] = {}
+
+    def invalidate(self, keys: Iterable[str] | None = None) -> None:
+        """Forget values that depend on ``keys`` (all values when None)."""
+        if keys is None:
+            self._cache.clear()
+            return
+        cache = self._cache
+        if not cache:
+            return
+        for key in keys:
+            for name in _DEPENDENTS.get(key, ()):
+                cache.pop(name, None)
+
+    def _get(self, name: str) -> Any:
+        d = self._data()
+        if d is not self._source:
+            self._source = d
+            self._cache.clear()
+        cache = self._cache
+        if name in cache:
+            return cache[name]
+        value = cache[name] = _DERIVATIONS[name][1](d or {})
+        return value
+
+    @property
+    def position(self) -> Position:
+        """Toolhead ``(x, y, z)`` parsed from ``curPosition``."""
+        return self._get("position")
+
+    @property
+    def progress(self) -> Any:
+        """Print progress as reported (``printProgress`` or ``dProgress``)."""
+        return self._get("progress")
+
+    @property
+    def progress_pct(self) -> int:
+        """Print progress as an int; -1 when unknown."""
+        return self._get("progress_pct")
+
+    @property
+    def has_job(self) -> bool:
+        """True when a file is loaded and the printer reports its progress."""
+        return self._get("has_job")
+
+    @property
+    def object_count(self) -> int | None:
+        """Objects in the current print; 0 when not printing, None if unknown."""
+        return self._get("object_count")
+
+    @property
+    def error_code(self) -> int:
+        """``err.errcode`` as an int; 0 means no error."""
+        return self._get("error_code")
+
+    @property
+    def self_testing(self) -> bool:
+        """True while the printer runs its self test."""
+        return self._get("self_testing")
+
+    @property
+    def cfs(self) -> CfsIndex:
+        """Index of the CFS boxes and slots in ``boxsInfo``."""
+        return self._get("cfs")
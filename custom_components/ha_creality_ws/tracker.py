@@ -0,0 +1,246 @@
+"""Round-trip tracking for set commands: send -> effect visible in telemetry."""
+from __future__ import annotations
+
+import re
+import time
+from collections import deque
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+from .const import COMMAND_ACK_TIMEOUT, COMMAND_LATENCY_SAMPLES
+
+Predicate = Callable[[Any], bool]
+
+# M106 fan channel -> telemetry percent key
+_FAN_KEYS = {"0": "modelFanPct", "1": "caseFanPct", "2": "auxiliaryFanPct"}
+_M106_RE = re.compile(r"^\s*M106\s+P(\d)\s+S(\d+)", re.IGNORECASE)
+
+# Print state codes as reported in ``state``
+_STATE_PRINTING = 1
+_STATE_PAUSED = 5
+
+
+def _num_eq(expected: Any, tolerance: float = 0.5) -> Predicate:
+    try:
+        want = float(expected)
+    except (TypeError, ValueError):
+        return lambda v: v == expected
+
+    def _check(value: Any) -> bool:
+        try:
+            return abs(float(value) - want) <= tolerance
+        except (TypeError, ValueError):
+            return False
+
+    return _check
+
+
+def expected_effects(key: str, value: Any) -> list[tuple[str, str, Predicate]]:
+    """Map one set param to ``(command type, telemetry key, predicate)`` entries.
+
+    Params without a known telemetry echo return an empty list and are not
+    tracked.
+    """
+    if key in ("nozzleTempControl", "boxTempControl", "setFeedratePct", "setFlowratePct", "lightSw"):
+        field = {
+            "nozzleTempControl": "targetNozzleTemp",
+            "boxTempControl": "targetBoxTemp",
+            "setFeedratePct": "curFeedratePct",
+            "setFlowratePct": "curFlowratePct",
+            "lightSw": "lightSw",
+        }[key]
+        return [(key, field, _num_eq(value))]
+    if key == "bedTempControl" and isinstance(value, Mapping):
+        return [(key, f"targetBedTemp{value.get('num', 0)}", _num_eq(value.get("val")))]
+    if key == "pause":
+        if value == 1:
+            return [("pause", "state", lambda v: v == _STATE_PAUSED)]
+        return [("resume", "state", lambda v: v == _STATE_PRINTING)]
+    if key == "stop":
+        return [("stop", "state", lambda v: v not in (_STATE_PRINTING, _STATE_PAUSED))]
+    if key == "autohome":
+        return [("autohome", "deviceState", lambda v: v == 7)]
+    if key == "gcodeCmd" and isinstance(value, str):
+        m = _M106_RE.match(value)
+        if m and m.group(1) in _FAN_KEYS:
+            pct = round(int(m.group(2)) * 100 / 255)
+            return [("M106", _FAN_KEYS[m.group(1)], _num_eq(pct, 1.0))]
+    return []
+
+
+# Tracked command types -> telemetry keys that can confirm them
+TRACKED_COMMANDS: dict[str, tuple[str, ...]] = {
+    "nozzleTempControl": ("targetNozzleTemp",),
+    "bedTempControl": ("targetBedTemp0", "targetBedTemp1"),
+    "boxTempControl": ("targetBoxTemp",),
+    "setFeedratePct": ("curFeedratePct",),
+    "setFlowratePct": ("curFlowratePct",),
+    "lightSw": ("lightSw",),
+    "pause": ("state",),
+    "resume": ("state",),
+    "stop": ("state",),
+    "autohome": ("deviceState",),
+    "M106": tuple(_FAN_KEYS.values()),
+}
+
+
+def command_stats_key(command: str) -> str:
+    """Return the synthetic listener key woken when ``command``'s stats change off-frame."""
+    return f"tracker:{command}"
+
+
+class _Expectation:
+    __slots__ = ("command", "key", "predicate", "sent_at")
+
+    def __init__(self, command: str, key: str, predicate: Predicate, sent_at: float) -> None:
+        self.command = command
+        self.key = key
+        self.predicate = predicate
+        self.sent_at = sent_at
+
+
+class CommandStats:
+    """Latency samples and outcome counters for one command type."""
+
+    __slots__ = ("sent", "confirmed", "unconfirmed", "superseded", "last_ms", "samples")
+
+    def __init__(self, window: int) -> None:
+        self.sent = 0
+        self.confirmed = 0
+        self.unconfirmed = 0
+        self.superseded = 0
+        self.last_ms: Optional[float] = None
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the ``q`` percentile (0-100) of recent latencies in ms."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def as_dict(self) -> dict[str, Any]:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "sent": self.sent,
+            "confirmed": self.confirmed,
+            "unconfirmed": self.unconfirmed,
+            "superseded": self.superseded,
+            "last_ms": self.last_ms,
+            "p50_ms": round(p50, 1) if p50 is not None else None,
+            "p95_ms": round(p95, 1) if p95 is not None else None,
+        }
+
+
+class CommandTracker:
+    """Correlate sent set commands with the telemetry that reflects them.
+
+    expect() is called once a command is on the socket and registers the
+    telemetry change it should cause; observe() is fed each merged delta
+    and closes matching expectations, recording the round trip. An
+    expectation not met within ``timeout`` counts as unconfirmed, which is
+    how firmware that silently drops commands shows up. A newer command
+    aimed at the same telemetry key supersedes the older one.
+
+    The tracker owns no timer: the owner calls expire() when
+    seconds_to_expiry() runs out, and ``on_expired`` hears which command
+    types gained unconfirmed counts, whichever call expired them.
+    """
+
+    def __init__(
+        self,
+        timeout: float = COMMAND_ACK_TIMEOUT,
+        window: int = COMMAND_LATENCY_SAMPLES,
+        clock: Callable[[], float] = time.monotonic,
+        on_expired: Optional[Callable[[set[str]], None]] = None,
+    ) -> None:
+        self._timeout = timeout
+        self._window = window
+        self._clock = clock
+        self._on_expired = on_expired
+        # Open expectations by telemetry key
+        self._pending: dict[str, _Expectation] = {}
+        self._stats: dict[str, CommandStats] = {}
+
+    @property
+    def pending(self) -> int:
+        """Return the number of commands still waiting for telemetry."""
+        return len(self._pending)
+
+    def stats(self, command: str) -> CommandStats:
+        """Return the stats for ``command``, creating an empty entry if needed."""
+        st = self._stats.get(command)
+        if st is None:
+            st = self._stats[command] = CommandStats(self._window)
+        return st
+
+    def expect(
+        self,
+        params: Mapping[str, Any],
+        state: Mapping[str, Any],
+        sent_at: Optional[float] = None,
+    ) -> None:
+        """Register the telemetry effects of a sent set frame.
+
+        Effects already satisfied by ``state`` are skipped: no change will
+        arrive, so there is no round trip to time.
+        """
+        now = self._clock() if sent_at is None else sent_at
+        self.expire(now)
+        for key, value in params.items():
+            for command, field, predicate in expected_effects(key, value):
+                if field in state and predicate(state[field]):
+                    continue
+                self.stats(command).sent += 1
+                old = self._pending.get(field)
+                if old is not None:
+                    self.stats(old.command).superseded += 1
+                self._pending[field] = _Expectation(command, field, predicate, now)
+
+    def observe(self, delta: Mapping[str, Any]) -> None:
+        """Close expectations met by a merged telemetry delta."""
+        pending = self._pending
+        if not pending:
+            return
+        now = self._clock()
+        for key in [k for k in pending if k in delta]:
+            exp = pending[key]
+            if not exp.predicate(delta[key]):
+                continue
+            del pending[key]
+            if now - exp.sent_at > self._timeout:
+                self.stats(exp.command).unconfirmed += 1
+                continue
+            ms = (now - exp.sent_at) * 1000.0
+            st = self.stats(exp.command)
+            st.confirmed += 1
+            st.last_ms = ms
+            st.samples.append(ms)
+        self.expire(now)
+
+    def seconds_to_expiry(self) -> Optional[float]:
+        """Return seconds until the oldest open expectation times out, None if none."""
+        if not self._pending:
+            return None
+        oldest = min(e.sent_at for e in self._pending.values())
+        return max(0.0, oldest + self._timeout - self._clock())
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Count expectations that reached the timeout as unconfirmed."""
+        pending = self._pending
+        if not pending:
+            return
+        now = self._clock() if now is None else now
+        expired: set[str] = set()
+        for key in [k for k, e in pending.items() if now - e.sent_at >= self._timeout]:
+            command = pending.pop(key).command
+            self.stats(command).unconfirmed += 1
+            expired.add(command)
+        if expired and self._on_expired is not None:
+            self._on_expired(expired)
+
+    def as_dict(self, commands: Iterable[str] | None = None) -> dict[str, dict[str, Any]]:
+        """Return per-command stats for diagnostics."""
+        self.expire()
+        names = self._stats if commands is None else commands
+        return {name: self.stats(name).as_dict() for name in names}
@@ -4,6 +4,7 @@ import re
 from typing import Any, Optional
 
 __all__ = [
+    "NumberCoercer",
     "coerce_numbers",
     "parse_model_version",
     "parse_position",
@@ -26,6 +27,58 @@ def coerce_numbers(d: dict[str, Any]) -> dict[str, Any]:
     return out
 
 
+# First characters that can start a str accepted by int()/float() (ASCII only;
+# non-ASCII digits are rare and simply take the slow path)
+_NUMERIC_START = frozenset("0123456789+-. \t\n\r\f\v")
+
+
+class NumberCoercer:
+    """coerce_numbers() with a learned per-key kind cache.
+
+    Keys are tracked by dotted path ("err.errcode"), so nested dicts are
+    coerced with the same rules as the top level; lists pass through
+    unchanged. Once a key is known to hold numbers its strings convert
+    directly. Strings that cannot start a number, or repeat the key's last
+    non-numeric value, skip the int()/float() exception path entirely.
+    Results match coerce_numbers() for every flat frame.
+    """
+
+    __slots__ = ("_numeric", "_text")
+
+    def __init__(self) -> None:
+        self._numeric: set[str] = set()
+        # key path -> last non-numeric string seen for it
+        self._text: dict[str, str] = {}
+
+    def coerce(self, d: dict[str, Any], prefix: str = "") -> dict[str, Any]:
+        """Return a copy of ``d`` with numeric strings converted."""
+        out: dict[str, Any] = {}
+        for k, v in d.items():
+            if isinstance(v, str):
+                out[k] = self._coerce_str(prefix + k if prefix else k, v)
+            elif isinstance(v, dict):
+                out[k] = self.coerce(v, f"{prefix}{k}.")
+            else:
+                out[k] = v
+        return out
+
+    def _coerce_str(self, path: str, v: str) -> Any:
+        if path not in self._numeric:
+            if self._text.get(path) == v:
+                return v
+            if not v or (v[0] < "\x80" and v[0] not in _NUMERIC_START):
+                self._text[path] = v
+                return v
+        try:
+            num = float(v) if "." in v else int(v)
+        except ValueError:
+            self._numeric.discard(path)
+            self._text[path] = v
+            return v
+        self._numeric.add(path)
+        return num
+
+
 def parse_model_version(s: str | None) -> tuple[str | None, str | None]:
     """Extract HW/SW versions from a semi-structured string (Creality format)."""
     if not s or not isinstance(s, str):
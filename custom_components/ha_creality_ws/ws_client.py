@@ -2,60 +2,116 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import random
-import socket
 import time
-from typing import Any, Awaitable, Callable, Optional
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional
 
 import websockets
 from websockets.exceptions import ConnectionClosedOK, ConnectionClosed
 
 from .const import (
+    CADENCE_PROFILES,
+    DEFAULT_CADENCE,
+    FRAME_QUEUE_MAX,
     RETRY_MIN_BACKOFF,
     RETRY_MAX_BACKOFF,
     RETRY_BACKOFF_MULTIPLIER,
     HEARTBEAT_SECS,
+    JSON_CODEC,
+    POLL_LANE_MAX,
+    SET_COALESCE_WINDOW,
+    SET_MERGEABLE_KEYS,
     PROBE_ON_SILENCE_SECS,
     WS_URL_TEMPLATE,
 )
-from .utils import coerce_numbers
+from .codec import JsonCodec, get_codec
+from .resolver import HostResolver
+from .scheduler import ScheduledJob, get_scheduler
+from .tracker import CommandTracker
+from .utils import NumberCoercer
 
 _LOGGER = logging.getLogger(__name__)
-OnMessage = Callable[[dict[str, Any]], Awaitable[None]]
+# Called with (delta, frame_version): only the keys whose value changed.
+OnMessage = Callable[[dict[str, Any], int], Awaitable[None]]
 
-# Periodic “get” cadences (mirror browser behavior)
-GET_REQPRINTERPARA_SEC = 5.0         # curPosition, autohome, etc.
-GET_PRINT_OBJECTS_SEC = 2.0          # objects/exclusions/current object
-GET_BOXS_INFO_SEC = 300.0             # CFS box info (temp/humidity/filaments) every 5m
+_MISSING = object()
+# Writer lanes: control (user commands) always goes before poll (GETs, probes)
+LANE_CONTROL = "control"
+LANE_POLL = "poll"
 
+# Upper bound on cached frame shapes; odd printers with ever-changing first keys just reset it
+_MAX_FRAME_SHAPES = 64
 
 
-## number coercion handled by utils.coerce_numbers
+## number coercion handled by utils.NumberCoercer
+
+
+class SetBatch:
+    """Set params collected inside KClient.set_batch(); sent when the block exits."""
+
+    __slots__ = ("items",)
+
+    def __init__(self) -> None:
+        self.items: list[dict[str, Any]] = []
+
+    def set(self, **params: Any) -> None:
+        """Add params to the batch."""
+        self.items.append(params)
 
 
 class KClient:
     """Resilient WS client with backoff, heartbeat 'ok', periodic GETs, and staleness tracking."""
 
-    def __init__(self, host: str, on_message: OnMessage):
+    def __init__(self, host: str, on_message: OnMessage, codec: str = JSON_CODEC):
         self._host = host
-        # Resolve host to IPv4 if available and build URL via template
-        self._url = lambda: WS_URL_TEMPLATE.format(host=self._resolve_host())
+        self._codec: JsonCodec = get_codec(codec)
+        # Resolves the host to IPv4 off the event loop, with a TTL cache
+        self._resolver = HostResolver(host)
         self._on_message = on_message
         self._check_power_status: Optional[Callable[[], bool]] = None
         self._state: dict[str, Any] = {}
+        # Bumped once per frame that changed at least one key
+        self._frame_version = 0
+        # Raw-text dedupe: frame shape (text up to the first ':') -> (last text, its keys)
+        self._frame_cache: dict[str, tuple[str, frozenset[str]]] = {}
+        # Learns which keys hold numbers so coercion avoids exception paths
+        self._coercer = NumberCoercer()
+        # Times set commands until their effect shows up in telemetry; the
+        # timer expires ignored ones on time and on_commands_expired (set by
+        # the owner) hears which command types were affected
+        self.tracker = CommandTracker(on_expired=self._commands_expired)
+        self._ack_timer: Optional[asyncio.TimerHandle] = None
+        self.on_commands_expired: Optional[Callable[[set[str]], None]] = None
+        # Reader -> consumer hand-off: (shape, raw text, parsed frame); shape is
+        # None once an entry has absorbed overflow frames
+        self._frame_queue: deque[tuple[Optional[str], Optional[str], dict[str, Any]]] = deque()
+        self._frames_ready = asyncio.Event()
+        self._consumer_task: Optional[asyncio.Task] = None
+        self._consumer_busy = False
 
         self._task: Optional[asyncio.Task] = None
         self._ws: Optional[websockets.client.ClientConnection] = None  # type: ignore[attr-defined]
         self._stop = asyncio.Event()
         self._connected_once = asyncio.Event()
-        self._send_lock = asyncio.Lock()
+        # Outbound writer: control lane is FIFO; poll lane is keyed by frame text
+        # so an identical GET already waiting is shared instead of queued twice
+        self._control_lane: deque[tuple[str, asyncio.Future[None], float]] = deque()
+        self._poll_lane: OrderedDict[str, tuple[asyncio.Future[None], float]] = OrderedDict()
+        self._write_ready = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+        # Open send_set_coalesced() window: collected params and the shared result
+        self._set_window: Optional[tuple[list[dict[str, Any]], asyncio.Future[None]]] = None
         self._last_rx = 0.0
         self._last_mdns_attempt = 0.0
 
         self._hb_task: Optional[asyncio.Task] = None
-        self._tick_task: Optional[asyncio.Task] = None
+        # Periodic GET jobs registered with the shared deadline scheduler
+        self._get_jobs: list[ScheduledJob] = []
+        # Active cadence profile (see const.CADENCE_PROFILES); chosen by the coordinator
+        self.cadence_profile = DEFAULT_CADENCE
 
         # event that indicates a live socket is present
         self._ws_ready = asyncio.Event()
@@ -68,6 +124,17 @@ class KClient:
         self.msg_count = 0
         self.last_error: Optional[str] = None
         self.uptime_start = 0.0
+        self.dedupe_hits = 0
+        self.dedupe_misses = 0
+        self.queue_max_depth = 0
+        self.frames_coalesced = 0
+        self.polls_dropped = 0
+        self.polls_shared = 0
+        # Per-lane queue latency (enqueue -> hand-off to the socket), milliseconds
+        self.lane_latency: dict[str, dict[str, float]] = {
+            lane: {"count": 0, "last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0}
+            for lane in (LANE_CONTROL, LANE_POLL)
+        }
 
     @property
     def host(self) -> str:
@@ -79,9 +146,33 @@ class KClient:
         """Return True if WebSocket is connected."""
         return self._ws is not None and self._ws_ready.is_set()
 
+    @property
+    def frame_version(self) -> int:
+        """Return the version of the last delta handed to on_message."""
+        return self._frame_version
+
     def get_url(self) -> str:
-        """Return the current WebSocket URL."""
-        return self._url() if self._url else "unknown"
+        """Return the current WebSocket URL (last resolved address, no lookup)."""
+        return WS_URL_TEMPLATE.format(host=self.resolved_host)
+
+    @property
+    def codec_name(self) -> str:
+        """Return the name of the JSON codec in use."""
+        return self._codec.name
+
+    @property
+    def resolved_host(self) -> str:
+        """Return the last resolved address (the host itself until resolved)."""
+        return self._resolver.cached()
+
+    def invalidate_host_cache(self) -> None:
+        """Forget the resolved address, e.g. after zeroconf reports a new IP."""
+        self._resolver.invalidate()
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of frames waiting for the consumer."""
+        return len(self._frame_queue)
 
     def has_connected_once(self) -> bool:
         """Return True if we have connected at least once."""
@@ -96,14 +187,22 @@ class KClient:
         if self._task and not self._task.done():
             return
         self._stop.clear()
+        if self._consumer_task is None or self._consumer_task.done():
+            self._consumer_task = asyncio.create_task(
+                self._consume_frames(), name="K-ws-consumer"
+            )
         self._task = asyncio.create_task(self._loop(), name="K-ws-loop")
 
     async def stop(self) -> None:
         """Stop the client and close connections."""
         self._stop.set()
-        for t in (self._hb_task, self._tick_task):
-            if t:
-                t.cancel()
+        if self._hb_task:
+            self._hb_task.cancel()
+        self._stop_periodic_gets()
+        self._stop_writer()
+        if self._ack_timer is not None:
+            self._ack_timer.cancel()
+            self._ack_timer = None
         ws = self._ws
         if ws:
             try:
@@ -117,6 +216,14 @@ class KClient:
             except Exception:
                 pass
             self._task = None
+        if self._consumer_task:
+            self._consumer_task.cancel()
+            try:
+                await self._consumer_task
+            except asyncio.CancelledError:
+                pass
+            self._consumer_task = None
+        self._frame_queue.clear()
             
     def _is_benign_close(self, exc: Exception) -> bool:
         """Return True for expected/normal shutdown / harmless closes."""
@@ -163,12 +270,6 @@ class KClient:
         await self.start()
 
     # ---------- connectivity loop ----------
-    def _resolve_host(self) -> str:
-        try:
-            return socket.gethostbyname(self._host)
-        except Exception:
-            return self._host
-
     async def _loop(self) -> None:
         backoff = RETRY_MIN_BACKOFF
         connect_failures = 0
@@ -204,12 +305,14 @@ class KClient:
                         pass
                     continue
 
+            connected = False
             try:
-                url = self._url()
+                url = WS_URL_TEMPLATE.format(host=await self._resolver.resolve())
                 _LOGGER.debug("K WS connecting host=%s url=%s", self._host, url)
                 # Disable library pings; we do app-level heartbeat + periodic GETs.
                 async with websockets.connect(url, ping_interval=None) as ws:
                     self._ws = ws
+                    connected = True
                     self._ws_ready.set()  # signal connected
                     _LOGGER.info("K WS connected host=%s url=%s", self._host, url)
                     self._connected_once.set()
@@ -218,14 +321,16 @@ class KClient:
                     self._last_rx = time.monotonic()
                     self.uptime_start = time.monotonic()
                     self.reconnect_count += 1
+                    self._frame_cache.clear()
                     
                     # Reset failure counters on successful connection
                     connect_failures = 0
                     backoff = RETRY_MIN_BACKOFF
 
                     # background tasks
+                    self._writer_task = asyncio.create_task(self._write_loop(ws), name="K-ws-writer")
                     self._hb_task = asyncio.create_task(self._heartbeat(), name="K-ws-heartbeat")
-                    self._tick_task = asyncio.create_task(self._periodic_gets(), name="K-ws-ticker")
+                    self._start_periodic_gets()
 
                     async for raw in ws:
                         self._last_rx = time.monotonic()
@@ -239,9 +344,25 @@ class KClient:
                         if text == "ok":
                             continue
 
+                        # Byte-identical resend of a frame that is still fully applied:
+                        # skip parse/coerce/merge. Heartbeats always need their ack.
+                        # The cache is only trusted once every queued frame is applied.
+                        shape = None
+                        if "heart_beat" not in text:
+                            shape = self._frame_shape(text)
+                            if (
+                                not self._frame_queue
+                                and not self._consumer_busy
+                                and self._is_duplicate_frame(shape, text)
+                            ):
+                                self.dedupe_hits += 1
+                                self.msg_count += 1
+                                continue
+                            self.dedupe_misses += 1
+
                         # Try parse JSON
                         try:
-                            payload: Any = json.loads(text)
+                            payload: Any = self._codec.loads(text)
                         except Exception:
                             # Not JSON; ignore
                             continue
@@ -256,13 +377,9 @@ class KClient:
                             continue
 
                         if isinstance(payload, dict):
-                            merged = coerce_numbers(payload)
-                            self._state.update(merged)
                             self.msg_count += 1
-                            try:
-                                await self._on_message(dict(self._state))
-                            except Exception:
-                                _LOGGER.exception("K on_message failed host=%s", self._host)
+                            # Hand off; the reader never waits on the coordinator
+                            self._enqueue_frame(shape, text, payload)
                         else:
                             _LOGGER.debug("K WS unexpected frame type: %r", type(payload))
 
@@ -270,6 +387,9 @@ class KClient:
                 break
             except Exception as exc:
                 connect_failures += 1
+                if not connected:
+                    # The address may be stale (DHCP change); re-resolve next attempt
+                    self._resolver.invalidate(keep_failures=True)
                 
                 # Check power status before logging loud errors.
                 # If power is OFF, we treat it as expected (debug only).
@@ -294,10 +414,11 @@ class KClient:
                 self.last_error = str(exc)
             finally:
                 # cleanup on disconnect
-                for t in (self._hb_task, self._tick_task):
-                    if t:
-                        t.cancel()
-                self._hb_task = self._tick_task = None
+                if self._hb_task:
+                    self._hb_task.cancel()
+                self._hb_task = None
+                self._stop_periodic_gets()
+                self._stop_writer()
 
                 self._ws = None
                 self._ws_ready.clear()
@@ -339,6 +460,115 @@ class KClient:
 
         _LOGGER.debug("K WS loop exited host=%s", self._host)
 
+    def _merge_frame(self, frame: dict[str, Any]) -> dict[str, Any]:
+        """Merge a coerced frame into the accumulated state.
+
+        Returns only the keys whose value differs from what we already had,
+        so consumers never have to copy or re-merge the full state.
+        """
+        state = self._state
+        delta: dict[str, Any] = {}
+        for k, v in frame.items():
+            if state.get(k, _MISSING) != v:
+                state[k] = v
+                delta[k] = v
+        return delta
+
+    # ---------- frame consumer ----------
+    def _enqueue_frame(
+        self, shape: Optional[str], text: Optional[str], payload: dict[str, Any]
+    ) -> None:
+        queue = self._frame_queue
+        if len(queue) >= FRAME_QUEUE_MAX:
+            # Consumer is far behind: fold into the newest entry (latest wins per key)
+            tail = queue[-1][2]
+            tail.update(payload)
+            queue[-1] = (None, None, tail)
+            self.frames_coalesced += 1
+        else:
+            queue.append((shape, text, payload))
+            if len(queue) > self.queue_max_depth:
+                self.queue_max_depth = len(queue)
+        self._frames_ready.set()
+
+    async def _consume_frames(self) -> None:
+        """Apply queued frames and notify on_message; runs for the client lifetime.
+
+        Everything queued since the last pass is coalesced (latest wins per
+        key) into one merge and a single on_message call.
+        """
+        queue = self._frame_queue
+        while True:
+            await self._frames_ready.wait()
+            self._frames_ready.clear()
+            while queue:
+                batch = list(queue)
+                queue.clear()
+                self._consumer_busy = True
+                try:
+                    await self._apply_frames(batch)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("K frame consumer failed host=%s", self._host)
+                finally:
+                    self._consumer_busy = False
+
+    async def _apply_frames(
+        self, batch: list[tuple[Optional[str], Optional[str], dict[str, Any]]]
+    ) -> None:
+        if len(batch) == 1:
+            shape, text, payload = batch[0]
+        else:
+            shape = text = None
+            payload = {}
+            for _, _, frame in batch:
+                payload.update(frame)
+            self.frames_coalesced += len(batch) - 1
+        delta = self._merge_frame(self._coercer.coerce(payload))
+        if shape is not None and text is not None:
+            self._remember_frame(shape, text, payload.keys(), delta)
+        elif delta:
+            self._forget_frame_shapes(delta)
+        if not delta:
+            return
+        self.tracker.observe(delta)
+        self._frame_version += 1
+        try:
+            await self._on_message(delta, self._frame_version)
+        except Exception:
+            _LOGGER.exception("K on_message failed host=%s", self._host)
+
+    @staticmethod
+    def _frame_shape(text: str) -> str:
+        """Return the dedupe bucket of a raw frame: its text up to the first ':'."""
+        idx = text.find(":")
+        return text if idx < 0 else text[:idx]
+
+    def _is_duplicate_frame(self, shape: str, text: str) -> bool:
+        cached = self._frame_cache.get(shape)
+        return cached is not None and cached[0] == text
+
+    def _remember_frame(
+        self, shape: str, text: str, keys: Iterable[str], delta: dict[str, Any]
+    ) -> None:
+        """Cache a processed frame as the dedupe reference for its shape.
+
+        Other shapes whose keys were just changed by this frame are dropped:
+        a later resend of them would move state back and must be applied.
+        """
+        cache = self._frame_cache
+        if delta:
+            self._forget_frame_shapes(delta, keep=shape)
+        if len(cache) >= _MAX_FRAME_SHAPES and shape not in cache:
+            cache.clear()
+        cache[shape] = (text, frozenset(keys))
+
+    def _forget_frame_shapes(self, keys: Iterable[str], keep: Optional[str] = None) -> None:
+        """Drop cached shapes covering any of ``keys`` (except ``keep``)."""
+        cache = self._frame_cache
+        stale = [s for s, (_, ks) in cache.items() if s != keep and not ks.isdisjoint(keys)]
+        for s in stale:
+            del cache[s]
+
     async def _reset_backoff_after_delay(self):
         """Wait 5 seconds after connection; if still connected, reset backoff."""
         try:
@@ -360,7 +590,7 @@ class KClient:
                 return
             if time.monotonic() - self._last_rx > PROBE_ON_SILENCE_SECS:
                 try:
-                    await self._send_json({"method": "get", "params": {"ReqPrinterPara": 1}})
+                    await self._send_json({"method": "get", "params": {"ReqPrinterPara": 1}}, LANE_POLL)
                 except Exception:
                     pass
 
@@ -379,7 +609,7 @@ class KClient:
                 if silence_duration > HEARTBEAT_SECS:
                     _LOGGER.debug("K WS quiet for %.1fs, sending probe", silence_duration)
                     try:
-                        await self._send_json({"method": "get", "params": {"ReqPrinterPara": 1}})
+                        await self._send_json({"method": "get", "params": {"ReqPrinterPara": 1}}, LANE_POLL)
                     except Exception:
                         # Connection may be dead; ignore send errors, rely on staleness detection
                         pass
@@ -395,53 +625,62 @@ class KClient:
         except asyncio.CancelledError:
             return
 
-    async def _periodic_gets(self):
-        """Mirror the web UI's periodic GETs so the printer keeps streaming state."""
-        try:
-            t_para = 0.0
-            t_objs = 0.0
-            t_cfs = 0.0
-            # Staggered loop to avoid bursts
-            while True:
-                now = time.monotonic()
-                ws = self._ws
-                if not ws:
-                    break
-                if self._stop.is_set():
-                    break
-                if now - t_para >= GET_REQPRINTERPARA_SEC:
-                    try:
-                        await self._send_json({"method": "get", "params": {"ReqPrinterPara": 1}})
-                    except Exception:
-                        pass
-                    t_para = now
-
-                if now - t_objs >= GET_PRINT_OBJECTS_SEC:
-                    try:
-                        await self._send_json({"method": "get", "params": {"reqPrintObjects": 1}})
-                    except Exception:
-                        pass
-                    t_objs = now
-
-                # Only request CFS info if we know CFS is connected or haven't checked recently
-                if now - t_cfs >= GET_BOXS_INFO_SEC:
-                    # If we have state, check cfsConnect. If not yet known, poll anyway to discover.
-                    cfs_connected = self._state.get("cfsConnect")
-                    if cfs_connected is None or cfs_connected == 1:
-                        try:
-                            await self.request_boxs_info()
-                        except Exception:
-                            pass
-                    t_cfs = now
+    # ---------- periodic GETs ----------
+    def _start_periodic_gets(self) -> None:
+        """Mirror the web UI's periodic GETs so the printer keeps streaming state.
 
-                await asyncio.sleep(0.2)
-        except asyncio.CancelledError:
+        Jobs are registered with the process-wide deadline scheduler, which
+        sleeps exactly until the next request is due. Enabled jobs fire right
+        after connect, then at the cadence of the active profile.
+        """
+        self._stop_periodic_gets()
+        sched = get_scheduler()
+        cadence = CADENCE_PROFILES[self.cadence_profile]
+        self._get_jobs = [
+            sched.schedule("ReqPrinterPara", cadence["ReqPrinterPara"], self._get_printer_para),
+            sched.schedule("reqPrintObjects", cadence["reqPrintObjects"], self._get_print_objects),
+            sched.schedule("boxsInfo", cadence["boxsInfo"], self._get_boxs_info),
+        ]
+
+    def set_cadence_profile(self, profile: str) -> None:
+        """Switch the periodic GETs to another cadence profile.
+
+        Running jobs are re-timed in place; a request the profile disables
+        is parked and fires right away once a later profile enables it.
+        """
+        if profile == self.cadence_profile or profile not in CADENCE_PROFILES:
             return
+        _LOGGER.debug("Cadence profile %s -> %s", self.cadence_profile, profile)
+        self.cadence_profile = profile
+        cadence = CADENCE_PROFILES[profile]
+        for job in self._get_jobs:
+            job.set_interval(cadence.get(job.name))
+
+    def _stop_periodic_gets(self) -> None:
+        for job in self._get_jobs:
+            job.cancel()
+        self._get_jobs = []
+
+    async def _get_printer_para(self) -> None:
+        if self._ws and not self._stop.is_set():
+            await self._send_json({"method": "get", "params": {"ReqPrinterPara": 1}}, LANE_POLL)
+
+    async def _get_print_objects(self) -> None:
+        if self._ws and not self._stop.is_set():
+            await self._send_json({"method": "get", "params": {"reqPrintObjects": 1}}, LANE_POLL)
+
+    async def _get_boxs_info(self) -> None:
+        if not self._ws or self._stop.is_set():
+            return
+        # If we have state, check cfsConnect. If not yet known, poll anyway to discover.
+        cfs_connected = self._state.get("cfsConnect")
+        if cfs_connected is None or cfs_connected == 1:
+            await self.request_boxs_info()
 
     # ---------- public send ----------
     async def request_boxs_info(self) -> None:
         """Ask the printer to send boxsInfo now."""
-        await self._send_json({"method": "get", "params": {"boxsInfo": 1}})
+        await self._send_json({"method": "get", "params": {"boxsInfo": 1}}, LANE_POLL)
 
     async def send_set(self, **params: Any) -> None:
 
@@ -453,23 +692,200 @@ class KClient:
         Robust sender for user actions: try once; if the link recycled,
         wait for reconnect and retry once.
         """
+        await self._send_set_frames([params], wait_reconnect)
+
+    @asynccontextmanager
+    async def set_batch(self, *, wait_reconnect: float = 6.0) -> AsyncIterator[SetBatch]:
+        """Collect set params and send them together when the block exits.
+
+        Mergeable params (SET_MERGEABLE_KEYS) share one frame, later values
+        winning; the rest are pipelined back-to-back. Nothing is sent if the
+        block raises.
+        """
+        batch = SetBatch()
+        yield batch
+        if batch.items:
+            await self._send_set_frames(self._plan_set_frames(batch.items), wait_reconnect)
+
+    async def send_set_coalesced(self, **params: Any) -> None:
+        """Like send_set_retry, but batched with other sets issued within SET_COALESCE_WINDOW."""
+        window = self._set_window
+        if window is None:
+            loop = asyncio.get_running_loop()
+            window = self._set_window = ([], loop.create_future())
+            loop.call_later(SET_COALESCE_WINDOW, self._start_set_flush)
+        window[0].append(params)
+        await asyncio.shield(window[1])
+
+    def _start_set_flush(self) -> None:
+        window, self._set_window = self._set_window, None
+        if window is not None:
+            asyncio.get_running_loop().create_task(
+                self._flush_set_window(*window), name="K-ws-set-flush"
+            )
+
+    async def _flush_set_window(self, items: list[dict[str, Any]], fut: asyncio.Future[None]) -> None:
         try:
-            await self._send_json({"method": "set", "params": params})
+            await self._send_set_frames(self._plan_set_frames(items), 6.0)
+        except Exception as exc:  # pylint: disable=broad-except
+            if not fut.done():
+                fut.set_exception(exc)
+        else:
+            if not fut.done():
+                fut.set_result(None)
+
+    @staticmethod
+    def _plan_set_frames(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Fold mergeable params into one frame; keep the others as separate frames."""
+        merged: dict[str, Any] = {}
+        frames: list[dict[str, Any]] = []
+        for params in items:
+            for key, value in params.items():
+                if key in SET_MERGEABLE_KEYS:
+                    merged[key] = value
+                else:
+                    frames.append({key: value})
+        if merged:
+            frames.insert(0, merged)
+        return frames
+
+    async def _send_set_frames(self, frames: list[dict[str, Any]], wait_reconnect: float) -> None:
+        """Pipeline set frames; if the link recycled, wait and retry the failed ones once."""
+        results = await asyncio.gather(
+            *(self._send_set_frame(p) for p in frames),
+            return_exceptions=True,
+        )
+        failed = [p for p, r in zip(frames, results) if isinstance(r, BaseException)]
+        if not failed:
+            return
+        first_exc = next(r for r in results if isinstance(r, BaseException))
+        ok = await self.wait_connected(wait_reconnect)
+        if not ok:
+            raise RuntimeError(
+                f"printer link not available after {wait_reconnect}s"
+            ) from first_exc
+        await asyncio.gather(*(self._send_set_frame(p) for p in failed))
+
+    async def _send_set_frame(self, params: dict[str, Any]) -> None:
+        sent_at = time.monotonic()
+        await self._send_json({"method": "set", "params": params})
+        self.tracker.expect(params, self._state, sent_at)
+        if self._ack_timer is None:
+            self._arm_ack_timer()
+
+    def _arm_ack_timer(self) -> None:
+        """Wake when the oldest open expectation times out (none armed if none open)."""
+        self._ack_timer = None
+        delay = self.tracker.seconds_to_expiry()
+        if delay is not None:
+            self._ack_timer = asyncio.get_running_loop().call_later(delay, self._on_ack_timer)
+
+    def _on_ack_timer(self) -> None:
+        self.tracker.expire()
+        self._arm_ack_timer()
+
+    def _commands_expired(self, commands: set[str]) -> None:
+        if self.on_commands_expired is not None:
+            self.on_commands_expired(commands)
+
+    async def _send_json(self, obj: dict[str, Any], lane: str = LANE_CONTROL) -> None:
+        """Queue ``obj`` on a writer lane and wait until it is on the socket.
+
+        Poll-lane sends are best effort: an identical queued GET is shared,
+        and dropped or failed polls simply return.
+
+        Raises:
+            RuntimeError: If not connected, or the link drops before a
+                control-lane send.
+        """
+        if not self._ws:
+            raise RuntimeError("WebSocket not connected")
+        text = self._codec.dumps(obj)
+        now = time.monotonic()
+        loop = asyncio.get_running_loop()
+        if lane == LANE_CONTROL:
+            fut: asyncio.Future[None] = loop.create_future()
+            self._control_lane.append((text, fut, now))
+            self._write_ready.set()
+            await fut
             return
-        except Exception as first_exc:
-            ok = await self.wait_connected(wait_reconnect)
-            if not ok:
-                raise RuntimeError(
-                    f"printer link not available after {wait_reconnect}s"
-                ) from first_exc
-            await self._send_json({"method": "set", "params": params})
-
-    async def _send_json(self, obj: dict[str, Any]) -> None:
-        async with self._send_lock:
-            ws = self._ws
-            if not ws:
-                raise RuntimeError("WebSocket not connected")
-            await ws.send(json.dumps(obj, separators=(",", ":")))
+
+        queued = self._poll_lane.get(text)
+        if queued is not None:
+            self.polls_shared += 1
+            fut = queued[0]
+        else:
+            if len(self._poll_lane) >= POLL_LANE_MAX:
+                _, (oldest, _) = self._poll_lane.popitem(last=False)
+                self.polls_dropped += 1
+                if not oldest.done():
+                    oldest.set_result(None)
+            fut = loop.create_future()
+            self._poll_lane[text] = (fut, now)
+        self._write_ready.set()
+        # Shared between callers; one caller's cancellation must not cancel it
+        await asyncio.shield(fut)
+
+    async def _write_loop(self, ws: Any) -> None:
+        """Single writer for the connection: drain control before poll."""
+        control, poll = self._control_lane, self._poll_lane
+        while True:
+            if not control and not poll:
+                self._write_ready.clear()
+                await self._write_ready.wait()
+                continue
+            if control:
+                lane = LANE_CONTROL
+                text, fut, queued_at = control.popleft()
+            else:
+                lane = LANE_POLL
+                text, (fut, queued_at) = poll.popitem(last=False)
+            if fut.done():
+                continue
+            self._record_lane_latency(lane, time.monotonic() - queued_at)
+            try:
+                await ws.send(text)
+            except asyncio.CancelledError:
+                # Writer stopped mid-send (disconnect, reconnect, unload): the
+                # entry has left its lane, so _stop_writer cannot fail it
+                if not fut.done():
+                    if lane == LANE_CONTROL:
+                        fut.set_exception(RuntimeError("WebSocket disconnected"))
+                    else:
+                        fut.set_result(None)
+                raise
+            except Exception as exc:  # pylint: disable=broad-except
+                if not fut.done():
+                    if lane == LANE_CONTROL:
+                        fut.set_exception(exc)
+                    else:
+                        fut.set_result(None)
+            else:
+                if not fut.done():
+                    fut.set_result(None)
+
+    def _record_lane_latency(self, lane: str, seconds: float) -> None:
+        stats = self.lane_latency[lane]
+        ms = seconds * 1000.0
+        stats["count"] += 1
+        stats["last_ms"] = ms
+        stats["avg_ms"] += (ms - stats["avg_ms"]) / stats["count"]
+        if ms > stats["max_ms"]:
+            stats["max_ms"] = ms
+
+    def _stop_writer(self) -> None:
+        """Cancel the writer and fail every send still waiting in a lane."""
+        if self._writer_task:
+            self._writer_task.cancel()
+            self._writer_task = None
+        for _, fut, _ in self._control_lane:
+            if not fut.done():
+                fut.set_exception(RuntimeError("WebSocket disconnected"))
+        for fut, _ in self._poll_lane.values():
+            if not fut.done():
+                fut.set_result(None)
+        self._control_lane.clear()
+        self._poll_lane.clear()
 
     # ---------- health ----------
     def last_rx_monotonic(self) -> float:
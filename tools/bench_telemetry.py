@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the telemetry hot path using recorded K1/K2 frames.
+
+Loads integration modules straight from their files (no Home Assistant
+needed) and times each stage against representative frames.
+
+Usage:
+    python3 tools/bench_telemetry.py [--number N]
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import sys
+import timeit
+import types
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+COMPONENT = ROOT / "custom_components" / "ha_creality_ws"
+
+
+def _load(name: str) -> Any:
+    """Load a component module by file name as ``ha_creality_ws.<name>``."""
+    full = f"ha_creality_ws.{name}"
+    if full in sys.modules:
+        return sys.modules[full]
+    if "ha_creality_ws" not in sys.modules:
+        # Bare package so relative imports between component modules resolve
+        pkg = types.ModuleType("ha_creality_ws")
+        pkg.__path__ = [str(COMPONENT)]
+        sys.modules["ha_creality_ws"] = pkg
+    spec = importlib.util.spec_from_file_location(full, COMPONENT / f"{name}.py")
+    assert spec is not None and spec.loader is not None
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[full] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+# ---- Recorded frames (trimmed captures; values as the printers send them) ----
+
+K1_TEMPS = {
+    "nozzleTemp": "214.370000", "targetNozzleTemp": 215, "bedTemp0": "59.980000",
+    "targetBedTemp0": 60, "boxTemp": 31, "curPosition": "X:112.40 Y:87.19 Z:4.60",
+}
+
+K1_STATUS = {
+    "model": "K1C", "hostname": "K1C-1A2B", "modelVersion": "printer hw ver:;printer sw ver:;DWIN hw ver:CR4CU220812S11;DWIN sw ver:1.3.3.46;",
+    "state": 1, "deviceState": 0, "printFileName": "/usr/data/printer_data/gcodes/benchy_0.2mm_PLA.gcode",
+    "printProgress": 37, "dProgress": 37, "printJobTime": 1843, "printLeftTime": 3120,
+    "layer": 46, "TotalLayer": 124, "usedMaterialLength": "1423.55", "realTimeFlow": "6.871",
+    "realTimeSpeed": "250.00", "curFeedratePct": 100, "curFlowratePct": 100,
+    "modelFanPct": 100, "caseFanPct": 60, "auxiliaryFanPct": 40, "lightSw": 1,
+    "err": {"errcode": 0, "key": 0, "value": ""}, "maxNozzleTemp": 300, "maxBedTemp": 100,
+    "withSelfTest": 100, "autohome": "X:1 Y:1 Z:1",
+}
+
+K2_OBJECTS = {
+    "objects_list": [
+        {"name": f"Part_{i}.stl_id_{i}_copy_0", "polygon": [[10.0 * i, 20.0], [10.0 * i + 30.5, 20.0],
+                                                         [10.0 * i + 30.5, 55.25], [10.0 * i, 55.25]],
+         "center": [10.0 * i + 15.25, 37.6]}
+        for i in range(12)
+    ],
+    "excluded_objects": ["Part_3.stl_id_3_copy_0"],
+    "current_object": "Part_5.stl_id_5_copy_0",
+}
+
+K2_BOXS = {
+    "cfsConnect": 1,
+    "boxsInfo": {
+        "same_material": [["101001", "0000000", [{"boxId": 1, "materialId": 0}], "PLA"]],
+        "materialBoxs": [
+            {
+                "id": box, "state": 1, "type": 0, "temp": "28.4", "humidity": "41",
+                "materials": [
+                    {"id": slot, "vendor": "Creality", "type": "PLA", "name": "Hyper PLA",
+                     "rfid": "", "color": "#0ffffff", "editStatus": 1, "state": 1,
+                     "selected": int(slot == 0), "percent": 83, "minTemp": 190, "maxTemp": 240}
+                    for slot in range(4)
+                ],
+            }
+            for box in range(1, 5)
+        ],
+    },
+}
+
+FRAMES: dict[str, dict[str, Any]] = {
+    "k1_temps": K1_TEMPS,
+    "k1_status": K1_STATUS,
+    "k2_objects": K2_OBJECTS,
+    "k2_boxs": K2_BOXS,
+}
+RAW_FRAMES: dict[str, str] = {
+    name: json.dumps(frame, separators=(",", ":")) for name, frame in FRAMES.items()
+}
+
+
+def bench(label: str, fn: Callable[[], Any], number: int) -> float:
+    """Time ``fn`` and print microseconds per call."""
+    best = min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+    print(f"  {label:<28} {best:9.2f} us")
+    return best
+
+
+def bench_codecs(number: int) -> None:
+    codec_mod = _load("codec")
+    print("JSON decode (per frame)")
+    for name in codec_mod.available_codecs():
+        codec = codec_mod.get_codec(name)
+        for frame, raw in RAW_FRAMES.items():
+            bench(f"{name}:{frame}", lambda c=codec, r=raw: c.loads(r), number)
+    print("JSON encode (set command)")
+    cmd = {"method": "set", "params": {"setFeedratePct": 110, "setFlowratePct": 98}}
+    for name in codec_mod.available_codecs():
+        codec = codec_mod.get_codec(name)
+        bench(f"{name}:set", lambda c=codec: c.dumps(cmd), number)
+
+
+def bench_coercion(number: int) -> None:
+    utils = _load("utils")
+    print("Number coercion (per frame)")
+    coercer = utils.NumberCoercer()
+    for frame_name, frame in FRAMES.items():
+        coercer.coerce(frame)  # let the coercer learn the keys first
+        bench(f"coerce_numbers:{frame_name}", lambda f=frame: utils.coerce_numbers(f), number)
+        bench(f"NumberCoercer:{frame_name}", lambda f=frame: coercer.coerce(f), number)
+
+
+def bench_snapshot(number: int) -> None:
+    utils = _load("utils")
+    telemetry = _load("telemetry")
+    coercer = utils.NumberCoercer()
+    merged: dict[str, Any] = {}
+    for frame in FRAMES.values():
+        merged.update(coercer.coerce(frame))
+    snap = telemetry.TelemetrySnapshot(merged)
+
+    print("Telemetry snapshot (merged K1+K2 state)")
+
+    def dict_read() -> Any:
+        # What entities did per read: lookup plus a guarded conversion
+        out = []
+        for key in ("nozzleTemp", "bedTemp0", "printJobTime", "modelFanPct", "realTimeFlow"):
+            try:
+                out.append(float(merged.get(key)))
+            except (TypeError, ValueError):
+                out.append(None)
+        return out
+
+    def snap_read() -> Any:
+        n = snap.numbers.get
+        return [n("nozzleTemp"), n("bedTemp0"), n("printJobTime"), n("modelFanPct"), n("realTimeFlow")]
+
+    bench("read 5 numbers dict", dict_read, number)
+    bench("read 5 numbers snapshot", snap_read, number)
+    bench("get() dict", lambda: merged.get("nozzleTemp"), number)
+    bench("get() snapshot", lambda: snap.get("nozzleTemp"), number)
+    temps = coercer.coerce(K1_TEMPS)
+    bench("merge temps frame dict", lambda: merged.update(temps), number)
+    bench("merge temps frame snapshot", lambda: snap.update(temps), number)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing run")
+    args = parser.parse_args()
+    bench_codecs(args.number)
+    bench_coercion(args.number)
+    bench_snapshot(args.number)
+
+
+if __name__ == "__main__":
+    main()
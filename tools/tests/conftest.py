@@ -67,6 +67,9 @@ class KClient:  # type: ignore
         self._on_message = on_message
         self._task = None
         self._last = time.monotonic()
+        self.cadence_profile = "printing"
+        self.reconnect_count = 0
+        self.connected = False
 
     async def start(self):
         # Simulate having a running task
@@ -90,12 +93,18 @@ class KClient:  # type: ignore
         self._last = time.monotonic()
         return None
 
+    async def send_set_coalesced(self, **params):  # noqa: ANN001
+        return await self.send_set_retry(**params)
+
     def last_rx_monotonic(self) -> float:
         return self._last
 
+    def set_cadence_profile(self, profile: str) -> None:
+        self.cadence_profile = profile
+
     @property
     def is_connected(self) -> bool:
-        return False
+        return self.connected
 
 setattr(ws_client_mod, "KClient", KClient)
 sys.modules["custom_components.ha_creality_ws.ws_client"] = ws_client_mod
@@ -0,0 +1,42 @@
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+# Load codec module directly from file to avoid importing package-level __init__
+ROOT = Path(__file__).resolve().parents[2]
+codec_path = ROOT / "custom_components" / "ha_creality_ws" / "codec.py"
+spec = importlib.util.spec_from_file_location("ha_creality_ws.codec", codec_path)
+assert spec is not None
+codec = importlib.util.module_from_spec(spec)
+sys.modules.setdefault("ha_creality_ws.codec", codec)
+assert spec.loader is not None
+spec.loader.exec_module(codec)
+
+
+def test_every_codec_round_trips_text():
+    cmd = {"method": "set", "params": {"setFeedratePct": 110, "lightSw": 0}}
+    for name in codec.available_codecs():
+        c = codec.get_codec(name)
+        text = c.dumps(cmd)
+        assert isinstance(text, str)
+        assert c.loads(text) == cmd
+        assert c.loads(text.encode()) == cmd
+
+
+def test_every_codec_keeps_the_wire_format():
+    cmd = {"method": "set", "params": {"setFeedratePct": 110}}
+    for name in codec.available_codecs():
+        assert codec.get_codec(name).dumps(cmd) == json.dumps(cmd)
+
+
+def test_every_codec_encodes_what_stdlib_accepts():
+    for name in codec.available_codecs():
+        c = codec.get_codec(name)
+        assert c.loads(c.dumps({1: "a"})) == {"1": "a"}
+
+
+def test_unknown_codec_falls_back_to_stdlib():
+    assert codec.get_codec("simdjson").name == "json"
+    assert codec.get_codec("json").name == "json"
+    assert codec.get_codec("auto").name == codec.available_codecs()[0]
@@ -10,16 +10,51 @@ class MockDataUpdateCoordinator:
     def __init__(self, hass, logger, name, update_interval=None, update_method=None, request_refresh_debouncer=None):
         self.hass = hass
     
+        self._listeners = []
+
     async def async_refresh(self):
         pass
 
+    def async_add_listener(self, update_callback, context=None):
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
     def async_update_listeners(self):
-        pass
+        for update_callback in list(self._listeners):
+            update_callback()
 
     def __class_getitem__(cls, item):
         return cls
 
+
+# Entity chain mirroring HA: the catch-all listener is added by BaseCoordinatorEntity
+class MockEntity:
+    async def async_added_to_hass(self):
+        pass
+
+    def async_on_remove(self, func):
+        self._on_remove = getattr(self, "_on_remove", []) + [func]
+
+    def async_write_ha_state(self):
+        self.writes = getattr(self, "writes", 0) + 1
+
+
+class MockBaseCoordinatorEntity(MockEntity):
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.async_add_listener(self._handle_coordinator_update))
+
+
+class MockCoordinatorEntity(MockBaseCoordinatorEntity):
+    pass
+
+
 mock_update_coordinator.DataUpdateCoordinator = MockDataUpdateCoordinator
+mock_update_coordinator.BaseCoordinatorEntity = MockBaseCoordinatorEntity
+mock_update_coordinator.CoordinatorEntity = MockCoordinatorEntity
 sys.modules["homeassistant.helpers.update_coordinator"] = mock_update_coordinator
 
 # Mock homeassistant.helpers.aiohttp_client
@@ -30,7 +65,19 @@ sys.modules["homeassistant.helpers.aiohttp_client"] = mock_aiohttp_client
 mock_dispatcher = MagicMock()
 sys.modules["homeassistant.helpers.dispatcher"] = mock_dispatcher
 
+# Mock homeassistant.helpers.storage
+sys.modules["homeassistant.helpers.storage"] = MagicMock()
+
+# entity.py needs a pass-through @callback and a few helpers
+mock_core = MagicMock()
+mock_core.callback = lambda func: func
+sys.modules["homeassistant.core"] = mock_core
+sys.modules["homeassistant.helpers.debounce"] = MagicMock()
+sys.modules["homeassistant.helpers.entity"] = MagicMock()
+
+from custom_components.ha_creality_ws.const import CONTROL_STATE_KEY
 from custom_components.ha_creality_ws.coordinator import KCoordinator
+from custom_components.ha_creality_ws.entity import DebouncedWrite, KEntity
 
 
 class HassStub:
@@ -103,3 +150,498 @@ def test_power_switch_logic():
         assert coord.power_is_off() is True
     finally:
         loop.close()
+
+
+def test_handle_message_applies_delta_and_version():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        await coord._handle_message({"nozzleTemp": 200, "bedTemp0": 60}, 1)
+        await coord._handle_message({"bedTemp0": 61}, 2)
+        assert coord.data == {"nozzleTemp": 200, "bedTemp0": 61}
+        assert coord.frame_version == 2
+
+    asyncio.run(run())
+
+
+def test_key_listeners_only_wake_on_their_keys():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        woken = []
+        remove = coord.async_add_key_listener(("nozzleTemp",), lambda: woken.append("nozzle"))
+        coord.async_add_key_listener(("bedTemp0",), lambda: woken.append("bed"))
+        await coord._handle_message({"model": "K1C"}, 1)  # first live frame is a broadcast
+        woken.clear()
+
+        await coord._handle_message({"nozzleTemp": 200}, 2)
+        assert woken == ["nozzle"]
+
+        # Broadcasts still reach key-scoped listeners
+        woken.clear()
+        coord.async_update_listeners()
+        assert sorted(woken) == ["bed", "nozzle"]
+
+        woken.clear()
+        remove()
+        await coord._handle_message({"nozzleTemp": 201, "bedTemp0": 60}, 3)
+        assert woken == ["bed"]
+
+    asyncio.run(run())
+
+
+def test_frames_wake_catch_all_listeners_only_when_live_again():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        woken = []
+        coord.async_add_listener(lambda: woken.append("all"))
+
+        await coord._handle_message({"nozzleTemp": 200}, 1)  # first live frame
+        assert woken == ["all"]
+
+        woken.clear()
+        await coord._handle_message({"nozzleTemp": 201}, 2)
+        assert woken == []
+
+        # check_stale saw the link go quiet; the next frame brings everything back
+        coord._last_avail = False
+        await coord._handle_message({"nozzleTemp": 202}, 3)
+        assert woken == ["all"]
+
+    asyncio.run(run())
+
+
+def test_keyed_entity_is_not_woken_by_unwatched_keys():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+
+        class NozzleEntity(KEntity):
+            _watch_keys = ("nozzleTemp",)
+
+            def __init__(self, coordinator):
+                super().__init__(coordinator, "Nozzle", "nozzle")
+                self.updates = 0
+
+            def _handle_coordinator_update(self):
+                self.updates += 1
+
+        ent = NozzleEntity(coord)
+        await ent.async_added_to_hass()
+        await coord._handle_message({"model": "K1C"}, 1)  # first live frame is a broadcast
+        ent.updates = 0
+
+        await coord._handle_message({"bedTemp0": 60}, 2)
+        assert ent.updates == 0
+
+        await coord._handle_message({"nozzleTemp": 200}, 3)
+        assert ent.updates == 1
+
+        # Broadcasts reach it exactly once
+        coord.async_update_listeners()
+        assert ent.updates == 2
+
+    asyncio.run(run())
+
+
+def test_entity_skips_writes_whose_inputs_did_not_change():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+
+        class NozzleEntity(KEntity):
+            _watch_keys = ("nozzleTemp",)
+
+        ent = NozzleEntity(coord, "Nozzle", "nozzle")
+        await ent.async_added_to_hass()
+
+        await coord._handle_message({"nozzleTemp": 200}, 1)
+        await coord._handle_message({"nozzleTemp": 200}, 2)  # e.g. A->B->A while throttled
+        assert ent.writes == 1
+        assert (coord.state_writes, coord.state_writes_skipped) == (1, 1)
+
+        # Broadcasts (availability, power, pause) always write
+        coord.async_update_listeners()
+        assert ent.writes == 2
+
+        # A direct write resets the fingerprint
+        ent.async_write_ha_state()
+        await coord._handle_message({"nozzleTemp": 200}, 3)
+        assert ent.writes == 4
+
+    asyncio.run(run())
+
+
+def test_cadence_profile_follows_printer_state():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        await coord._handle_message({"state": 0, "printFileName": ""}, 1)
+        assert coord.client.cadence_profile == "idle"
+
+        await coord._handle_message({"state": 1, "printFileName": "a.gcode", "printProgress": 3}, 2)
+        assert coord.client.cadence_profile == "printing"
+
+        await coord._handle_message({"state": 5}, 3)
+        assert coord.client.cadence_profile == "paused"
+
+        await coord._handle_message({"state": 1, "printProgress": 100}, 4)
+        assert coord.client.cadence_profile == "idle"
+
+        # Long idle periods drop to standby
+        coord._idle_since -= 3600
+        coord._update_cadence_profile()
+        assert coord.client.cadence_profile == "standby"
+
+    asyncio.run(run())
+
+
+def test_command_queue_waits_for_ready_state_and_dedupes():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        coord.data = {"deviceState": 7}  # homing
+        sent = []
+
+        async def fake_send_set_retry(**params):  # noqa: ANN001
+            sent.append(params)
+
+        coord.client.send_set_retry = fake_send_set_retry
+        control = []
+        coord.async_add_key_listener((CONTROL_STATE_KEY,), lambda: control.append(coord.queued_commands()))
+
+        assert await coord.request_command("nozzleTempControl", {"nozzleTempControl": 200}) is False
+        await coord.request_command("nozzleTempControl", {"nozzleTempControl": 210})
+        await coord.request_command("lightSw", {"lightSw": 1})
+        assert coord.queued_commands() == ["nozzleTempControl", "lightSw"]
+        assert control[-1] == ["nozzleTempControl", "lightSw"]
+
+        # Unrelated keys do not re-evaluate the queue
+        await coord._handle_message({"nozzleTemp": 30}, 1)
+        await asyncio.sleep(0)
+        assert sent == []
+
+        await coord._handle_message({"deviceState": 0}, 2)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert sent == [{"nozzleTempControl": 210}, {"lightSw": 1}]
+        assert coord.queued_commands() == []
+        assert control[-1] == []  # Print Control hears the queue drain
+        await coord.async_stop()
+
+    asyncio.run(run())
+
+
+def test_command_queue_backs_off_after_failed_send():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        coord.data = {"deviceState": 0}
+        calls = []
+
+        async def flaky_send_set_retry(**params):  # noqa: ANN001
+            calls.append(params)
+            if len(calls) == 1:
+                raise RuntimeError("link down")
+
+        coord.client.send_set_retry = flaky_send_set_retry
+        assert await coord.request_command("stop", {"stop": 1}) is False
+        assert coord.queued_commands() == ["stop"]
+        queued = coord._commands._entries["stop"]
+        queued.next_try = hass.loop.time()  # skip the backoff wait
+        coord._commands.kick()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert calls == [{"stop": 1}, {"stop": 1}]
+        assert coord.queued_commands() == []
+
+    asyncio.run(run())
+
+
+def test_stop_and_home_are_never_held_behind_homing():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        await coord._handle_message({"deviceState": 7}, 1)  # homing
+        sent = []
+
+        async def fake_send_set_retry(**params):  # noqa: ANN001
+            sent.append(params)
+
+        coord.client.send_set_retry = fake_send_set_retry
+
+        # Stop goes out even while homing, but is never queued while offline
+        assert await coord.request_stop() is False
+        assert sent == [] and coord.queued_commands() == []
+        coord.client.connected = True
+        assert await coord.request_stop() is True
+        assert sent == [{"stop": 1}]
+
+        # Home waits for the printer, then sends Z as its own queue entry
+        sent.clear()
+        await coord.request_home()
+        assert sent == [] and coord.queued_commands() == ["autohome"]
+        await coord._handle_message({"deviceState": 0}, 2)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert sent == [{"autohome": "X Y"}]
+        assert coord.queued_commands() == ["autohome_z"]
+        coord._commands._entries["autohome_z"].next_try = 0.0  # skip the settle delay
+        await coord._handle_message({"deviceState": 7}, 3)
+        await asyncio.sleep(0)
+        assert sent == [{"autohome": "X Y"}]
+        await coord._handle_message({"deviceState": 0}, 4)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert sent == [{"autohome": "X Y"}, {"autohome": "Z"}]
+
+        # A finished job still names its file; homing goes straight out
+        sent.clear()
+        await coord._handle_message({"printFileName": "demo.gcode", "printProgress": 100, "state": 2}, 5)
+        await coord.request_home()
+        assert sent == [{"autohome": "X Y"}]
+        coord._commands.clear()
+
+        # Never home under a running print
+        sent.clear()
+        await coord._handle_message({"printProgress": 10, "state": 1}, 6)
+        await coord.request_home()
+        assert sent == [] and coord.queued_commands() == ["autohome"]
+        assert coord._commands._entries["autohome"].expires_at - hass.loop.time() <= 30.0
+        await coord.async_stop()
+
+    asyncio.run(run())
+
+
+def test_reconnect_retries_failed_sends_without_backoff():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        await coord._handle_message({"deviceState": 0}, 1)
+        calls = []
+
+        async def flaky_send_set_retry(**params):  # noqa: ANN001
+            calls.append(params)
+            if len(calls) == 1:
+                raise RuntimeError("link down")
+
+        coord.client.send_set_retry = flaky_send_set_retry
+        assert await coord.request_command("lightSw", {"lightSw": 1}) is False
+
+        # First frame from the new connection replays it at once
+        coord.client.reconnect_count += 1
+        await coord._handle_message({"nozzleTemp": 30}, 2)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert calls == [{"lightSw": 1}, {"lightSw": 1}]
+        assert coord.queued_commands() == []
+
+    asyncio.run(run())
+
+
+def test_optimistic_overlay_confirms_and_rolls_back():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        await coord._handle_message({"targetNozzleTemp": 0, "targetBedTemp0": 0}, 1)
+        woken = []
+        coord.async_add_key_listener(("targetNozzleTemp",), lambda: woken.append("nozzle"))
+        coord.async_add_key_listener(("targetBedTemp0",), lambda: woken.append("bed"))
+
+        coord.set_optimistic({"targetNozzleTemp": 210, "targetBedTemp0": 60}, ttl=0.05)
+        assert sorted(woken) == ["bed", "nozzle"]
+        assert coord.get_value("targetNozzleTemp") == 210
+        assert coord.data["targetNozzleTemp"] == 0  # telemetry itself untouched
+
+        # Telemetry confirms the nozzle; the bed never follows and rolls back
+        await coord._handle_message({"targetNozzleTemp": 210.0}, 2)
+        woken.clear()
+        await asyncio.sleep(0.1)
+        assert woken == ["bed"]
+        assert coord.get_value("targetBedTemp0") == 0
+        assert coord.get_value("targetNozzleTemp") == 210.0
+
+    asyncio.run(run())
+
+
+def test_optimistic_value_lives_as_long_as_its_queued_command():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        await coord._handle_message({"targetNozzleTemp": 0, "deviceState": 7}, 1)
+        sent = []
+
+        async def fake_send_set_retry(**params):  # noqa: ANN001
+            sent.append(params)
+
+        coord.client.send_set_retry = fake_send_set_retry
+
+        # Queued while homing: the overlay is held past OPTIMISTIC_TTL
+        await coord.request_command(
+            "nozzleTempControl", {"nozzleTempControl": 210}, optimistic={"targetNozzleTemp": 210}
+        )
+        assert coord._optimistic["targetNozzleTemp"][1] - hass.loop.time() > 60
+        assert coord.get_value("targetNozzleTemp") == 210
+
+        # Sent once ready; the confirm window restarts from the send
+        await coord._handle_message({"deviceState": 0}, 2)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert sent == [{"nozzleTempControl": 210}]
+        assert coord._optimistic["targetNozzleTemp"][1] - hass.loop.time() <= 15.0
+
+        # A command that expires in the queue rolls its overlay back
+        await coord._handle_message({"deviceState": 7}, 3)
+        await coord.request_command(
+            "boxTempControl", {"boxTempControl": 40}, optimistic={"targetBoxTemp": 40}, ttl=0.05
+        )
+        assert coord.get_value("targetBoxTemp") == 40
+        await asyncio.sleep(0.1)
+        assert coord.get_value("targetBoxTemp") is None
+        assert coord.queued_commands() == []
+        await coord.async_stop()
+
+    asyncio.run(run())
+
+
+def test_wait_for_fields_wakes_on_the_delivering_frame():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        waiter = asyncio.create_task(coord.wait_for_fields(["model", "hostname"], timeout=5.0))
+        await asyncio.sleep(0)
+        await coord._handle_message({"model": "K1C"}, 1)
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        start = hass.loop.time()
+        await coord._handle_message({"hostname": "K1C-1A2B"}, 2)
+        assert await waiter is True
+        assert hass.loop.time() - start < 0.1
+        assert coord._field_waiters == []
+
+    asyncio.run(run())
+
+
+class _FakeStore:
+    def __init__(self, saved):
+        self.saved = saved
+        self.delayed = []
+
+    async def async_load(self):
+        return self.saved
+
+    def async_delay_save(self, data_func, delay):
+        self.delayed.append(data_func)
+
+
+def test_snapshot_restores_until_live_telemetry_arrives():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+        store = _FakeStore({"saved_at": 1.0, "data": {"model": "K1C", "nozzleTemp": 205.0}})
+        coord._snapshot_store = store
+
+        assert await coord.async_restore_snapshot() is True
+        assert coord.data["model"] == "K1C"
+        assert coord.showing_restored() is True
+
+        await coord._handle_message({"nozzleTemp": 30.0, "curPosition": "X:1"}, 1)
+        await coord._handle_message({"nozzleTemp": 31.0}, 2)
+        assert coord.showing_restored() is False
+        assert len(store.delayed) == 1  # one pending write, not one per frame
+
+        snapshot = store.delayed[0]()
+        assert snapshot["data"]["nozzleTemp"] == 31.0
+        assert "curPosition" not in snapshot["data"]
+        await coord._handle_message({"nozzleTemp": 32.0}, 3)
+        assert len(store.delayed) == 2
+
+    asyncio.run(run())
+
+
+def test_capabilities_move_out_of_legacy_entry_data():
+    async def run():
+        hass = HassStub()
+        updates = []
+        hass.config_entries = SimpleNamespace(
+            async_update_entry=lambda entry, data: updates.append(data)
+        )
+        entry = SimpleNamespace(data={
+            "host": "10.0.0.5",
+            "_cached_mac": "AA:BB",
+            "_device_info_cached": True,
+            "_cached_model": "K2 Plus",
+            "_cached_has_box_control": True,
+            "_cached_max_box_temp": 60,
+            "_cached_max_bed_temp": 110,
+        })
+        coord = KCoordinator(hass, host="dummy")
+        store = _FakeStore(None)
+        saved = []
+
+        async def _save(data):
+            saved.append(data)
+
+        store.async_save = _save
+        coord.capabilities._store = store
+
+        await coord.capabilities.async_load(hass, entry)
+        caps = coord.capabilities
+        assert caps.cached and caps.model == "K2 Plus"
+        assert caps.has_chamber_control is True
+        assert caps.max_temp("max_box_temp") == 60
+        assert caps.max_temp("max_nozzle_temp", {"maxNozzleTemp": 300}) == 300
+        assert saved and saved[0]["max_bed_temp"] == 110
+        assert updates == [{"host": "10.0.0.5", "_cached_mac": "AA:BB"}]
+
+    asyncio.run(run())
+
+
+def test_boxs_info_refresh_wakes_only_changed_slots():
+    async def run():
+        hass = HassStub()
+        coord = KCoordinator(hass, host="dummy")
+
+        def boxs(percent_a, percent_b, slots=2):
+            materials = [{"id": 0, "percent": percent_a}, {"id": 1, "percent": percent_b}]
+            return {"materialBoxs": [
+                {"id": 1, "type": 0, "temp": 25, "materials": materials[:slots]},
+            ]}
+
+        send = mock_dispatcher.async_dispatcher_send
+        calls = send.call_count
+        await coord._handle_message({"boxsInfo": boxs(80, 50)}, 1)
+        assert send.call_count == calls + 1  # first layout triggers discovery
+
+        woken = []
+        coord.async_add_key_listener(("boxsInfo:slot:1:0",), lambda: woken.append("slot0"))
+        coord.async_add_key_listener(("boxsInfo:slot:1:1",), lambda: woken.append("slot1"))
+        coord.async_add_key_listener(("boxsInfo:box:1",), lambda: woken.append("box"))
+
+        await coord._handle_message({"boxsInfo": boxs(80, 45)}, 2)
+        assert woken == ["slot1"]
+        assert send.call_count == calls + 1  # same layout, no discovery
+
+        woken.clear()
+        await coord._handle_message({"boxsInfo": boxs(80, 45, slots=1)}, 3)
+        assert woken == ["slot1"]
+        assert send.call_count == calls + 2  # a slot disappeared
+
+    asyncio.run(run())
+
+
+def test_failed_debounced_write_stops_being_pending():
+    async def run():
+        failed = []
+
+        async def write(value):
+            raise RuntimeError("link down")
+
+        writer = DebouncedWrite(None, 0, write, lambda: failed.append(True))
+        await writer.async_write(40)
+        assert writer.pending is None
+        assert failed == [True]
+
+    asyncio.run(run())
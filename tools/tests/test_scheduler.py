@@ -0,0 +1,107 @@
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+
+# Load scheduler module directly from file to avoid importing package-level __init__
+ROOT = Path(__file__).resolve().parents[2]
+sched_path = ROOT / "custom_components" / "ha_creality_ws" / "scheduler.py"
+spec = importlib.util.spec_from_file_location("ha_creality_ws.scheduler", sched_path)
+assert spec is not None
+scheduler = importlib.util.module_from_spec(spec)
+sys.modules["ha_creality_ws.scheduler"] = scheduler
+assert spec.loader is not None
+spec.loader.exec_module(scheduler)
+
+DeadlineScheduler = scheduler.DeadlineScheduler
+get_scheduler = scheduler.get_scheduler
+
+
+def test_jobs_fire_at_their_own_cadence():
+    async def run():
+        sched = DeadlineScheduler(asyncio.get_running_loop())
+        hits = {"fast": 0, "slow": 0}
+
+        async def fast():
+            hits["fast"] += 1
+
+        async def slow():
+            hits["slow"] += 1
+
+        sched.schedule("fast", 0.05, fast)
+        sched.schedule("slow", 10.0, slow)
+        await asyncio.sleep(0.23)
+        # Immediate first run plus ~4 periodic runs; slow only ran once
+        assert 3 <= hits["fast"] <= 6
+        assert hits["slow"] == 1
+        # No idle polling: wakeups track due jobs, not a fixed tick
+        assert sched.wakeups <= hits["fast"] + 1
+
+    asyncio.run(run())
+
+
+def test_cancelled_job_stops_firing():
+    async def run():
+        sched = DeadlineScheduler(asyncio.get_running_loop())
+        hits = []
+
+        async def cb():
+            hits.append(1)
+
+        job = sched.schedule("job", 0.02, cb)
+        await asyncio.sleep(0.05)
+        job.cancel()
+        seen = len(hits)
+        await asyncio.sleep(0.06)
+        assert len(hits) == seen
+        assert len(sched) == 0
+
+    asyncio.run(run())
+
+
+def test_shared_per_loop():
+    async def run():
+        assert get_scheduler() is get_scheduler()
+
+    asyncio.run(run())
+
+
+def test_set_interval_parks_and_resumes_job():
+    async def run():
+        sched = DeadlineScheduler(asyncio.get_running_loop())
+        hits = []
+
+        async def cb():
+            hits.append(1)
+
+        job = sched.schedule("job", None, cb)
+        await asyncio.sleep(0.03)
+        assert hits == []  # parked jobs never fire
+
+        job.set_interval(0.02)
+        await asyncio.sleep(0.01)
+        assert len(hits) == 1  # resuming a parked job fires right away
+
+        job.set_interval(None)
+        seen = len(hits)
+        await asyncio.sleep(0.05)
+        assert len(hits) == seen
+
+    asyncio.run(run())
+
+
+def test_failed_job_is_logged_and_released(caplog):
+    async def run():
+        sched = DeadlineScheduler(asyncio.get_running_loop())
+
+        async def boom():
+            raise RuntimeError("not connected")
+
+        job = sched.schedule("boom", 10.0, boom)
+        await asyncio.sleep(0.01)
+        job.cancel()
+        assert sched.failed == 1
+        assert not sched._tasks  # reference dropped once the task finished
+
+    asyncio.run(run())
+    assert "K-sched-boom failed: not connected" in caplog.text
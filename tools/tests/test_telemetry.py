@@ -0,0 +1,109 @@
+from custom_components.ha_creality_ws import telemetry
+from custom_components.ha_creality_ws.telemetry import DerivedValues
+
+
+def test_derived_values_recompute_only_when_sources_change(monkeypatch):
+    calls = []
+    keys, func = telemetry._DERIVATIONS["position"]
+
+    def counting(d):
+        calls.append(1)
+        return func(d)
+
+    monkeypatch.setitem(telemetry._DERIVATIONS, "position", (keys, counting))
+    data = {"curPosition": "X:1.00 Y:2.00 Z:3.00", "nozzleTemp": 200}
+    derived = DerivedValues(lambda: data)
+
+    assert derived.position == (1.0, 2.0, 3.0)
+    assert derived.position == (1.0, 2.0, 3.0)
+    assert len(calls) == 1
+
+    # Unrelated delta keeps the cached value
+    data["nozzleTemp"] = 201
+    derived.invalidate({"nozzleTemp": 201})
+    derived.position
+    assert len(calls) == 1
+
+    data["curPosition"] = "X:4.00 Y:5.00 Z:6.00"
+    derived.invalidate({"curPosition": data["curPosition"]})
+    assert derived.position == (4.0, 5.0, 6.0)
+    assert len(calls) == 2
+
+
+def test_derived_values_progress_objects_and_errors():
+    data = {
+        "printFileName": "cube.gcode",
+        "printProgress": 0,
+        "dProgress": "42",
+        "objects_list": '[{"name": "a"}, {"name": "b"}]',
+        "err": {"errcode": 2001, "key": 5},
+        "withSelfTest": 0,
+    }
+    derived = DerivedValues(lambda: data)
+    assert derived.progress == "42"
+    assert derived.progress_pct == 42
+    assert derived.has_job is True
+    assert derived.object_count == 2
+    assert derived.error_code == 2001
+    assert derived.self_testing is False
+
+    # A replaced telemetry dict drops every cached value
+    data = {}
+    assert derived.progress_pct == -1
+    assert derived.has_job is False
+    assert derived.object_count == 0
+    assert derived.error_code == 0
+
+
+def test_cfs_index_resolves_boxes_slots_and_external():
+    data = {"boxsInfo": {"materialBoxs": [
+        {"id": 1, "type": 0, "temp": 25, "materials": [
+            {"id": 0, "percent": 80},
+            {"id": None, "percent": 40},  # falls back to its position
+        ]},
+        {"id": 0, "type": 1, "materials": [{"id": 7, "color": "#ff0000"}]},
+    ]}}
+    derived = DerivedValues(lambda: data)
+    cfs = derived.cfs
+    assert cfs.box(1)["temp"] == 25
+    assert cfs.slot(1, 0)["percent"] == 80
+    assert cfs.slot(1, 1)["percent"] == 40
+    assert cfs.slot(2, 0) is None
+    assert cfs.external_slot(7)["color"] == "#ff0000"
+    assert cfs.external_slot(0)["color"] == "#ff0000"  # single external slot
+    assert derived.cfs is cfs  # built once until boxsInfo changes
+    derived.invalidate({"boxsInfo": data["boxsInfo"]})
+    assert derived.cfs is not cfs
+
+
+def test_cfs_diff_flags_first_readings_as_structural():
+    def index(temp, humidity, materials):
+        return telemetry.CfsIndex({"materialBoxs": [
+            {"id": 1, "type": 0, "temp": temp, "humidity": humidity, "materials": [{"id": 0}]},
+            {"id": 0, "type": 1, "materials": materials},
+        ]})
+
+    start = index(None, None, [])
+    # Value updates in a known layout only wake entities
+    diff = telemetry.CfsDiff(index(24, 40, [{"id": 0}]), index(25, 41, [{"id": 0}]))
+    assert diff.changed == {telemetry.cfs_box_key(1)} and not diff.structural
+    # A first humidity reading or external material can need new sensors
+    assert telemetry.CfsDiff(start, index(None, 40, [])).structural
+    assert telemetry.CfsDiff(start, index(None, None, [{"id": 0}])).structural
+
+
+def test_snapshot_keeps_raw_values_and_types_hot_numbers():
+    from custom_components.ha_creality_ws.telemetry import TelemetrySnapshot
+
+    snap = TelemetrySnapshot({"nozzleTemp": 214.5, "state": "1", "bedTemp0": "bad"})
+    snap.update({"printJobTime": 12, "curPosition": "X:1 Y:2 Z:3"})
+    # Stored values stay exactly as the printer sent them
+    assert snap["bedTemp0"] == "bad" and snap["state"] == "1"
+    assert snap.numbers == {"nozzleTemp": 214.5, "state": 1, "bedTemp0": None, "printJobTime": 12}
+
+    snap["bedTemp0"] = 60
+    assert snap.numbers["bedTemp0"] == 60
+    del snap["state"]
+    assert "state" not in snap.numbers
+    assert snap.pop("nozzleTemp") == 214.5 and "nozzleTemp" not in snap.numbers
+    assert type(snap.copy()) is dict
@@ -14,6 +14,7 @@ assert spec.loader is not None
 spec.loader.exec_module(utils)
 
 coerce_numbers = utils.coerce_numbers
+NumberCoercer = utils.NumberCoercer
 parse_model_version = utils.parse_model_version
 parse_position = utils.parse_position
 safe_float = utils.safe_float
@@ -29,6 +30,28 @@ def test_coerce_numbers():
     assert out["d"] == 3
 
 
+def test_number_coercer_matches_coerce_numbers():
+    coercer = NumberCoercer()
+    frames = [
+        {"a": "1", "b": "2.5", "c": "x", "d": 3, "pos": "X:1 Y:2 Z:3", "e": ""},
+        {"a": "oops", "b": " 7", "c": "12", "pos": "X:1 Y:2 Z:3", "e": "-4"},
+        {"a": "3", "b": "1e5", "c": "x", "pos": "10", "e": "nan"},
+    ]
+    for frame in frames:
+        expected = coerce_numbers(frame)
+        out = coercer.coerce(frame)
+        assert out == expected
+        assert [type(v) for v in out.values()] == [type(v) for v in expected.values()]
+
+
+def test_number_coercer_handles_nested_dicts():
+    coercer = NumberCoercer()
+    out = coercer.coerce({"err": {"errcode": "2000", "value": ""}, "boxsInfo": {"list": ["1", "2"]}})
+    assert out["err"] == {"errcode": 2000, "value": ""}
+    # Lists pass through untouched
+    assert out["boxsInfo"] == {"list": ["1", "2"]}
+
+
 def test_parse_model_version_printer_and_dwin():
     s = "Printer HW Ver: 1.0; Printer SW Ver: 2.0; DWIN HW Ver: 3"
     hw, sw = parse_model_version(s)
@@ -0,0 +1,331 @@
+"""Tests for KClient frame handling in ws_client.py (real module, no HA)."""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+
+from test_ws_client_reconnect import KClient
+
+HostResolver = sys.modules["ha_creality_ws.resolver"].HostResolver
+CommandTracker = sys.modules["ha_creality_ws.tracker"].CommandTracker
+
+
+async def _noop(payload, version):
+    """No-op message handler used for testing."""
+
+
+def test_merge_frame_returns_only_changed_keys():
+    client = KClient("192.168.1.99", _noop)
+    first = client._merge_frame({"nozzleTemp": 200, "bedTemp0": 60})
+    assert first == {"nozzleTemp": 200, "bedTemp0": 60}
+
+    # Unchanged keys are dropped from the delta
+    second = client._merge_frame({"nozzleTemp": 200, "bedTemp0": 61})
+    assert second == {"bedTemp0": 61}
+
+    # Identical frame produces an empty delta, but state stays complete
+    assert client._merge_frame({"nozzleTemp": 200}) == {}
+    assert client._state == {"nozzleTemp": 200, "bedTemp0": 61}
+
+
+def test_merge_frame_detects_nested_changes():
+    client = KClient("192.168.1.99", _noop)
+    client._merge_frame({"boxsInfo": {"materialBoxs": [{"id": 1, "temp": 25}]}})
+    assert client._merge_frame({"boxsInfo": {"materialBoxs": [{"id": 1, "temp": 25}]}}) == {}
+    delta = client._merge_frame({"boxsInfo": {"materialBoxs": [{"id": 1, "temp": 26}]}})
+    assert list(delta) == ["boxsInfo"]
+
+
+def test_resolver_skips_ip_literals_and_caches_results():
+    async def run():
+        loop = asyncio.get_running_loop()
+        calls = []
+
+        async def fake_getaddrinfo(host, *args, **kwargs):
+            calls.append(host)
+            return [(None, None, None, "", ("10.0.0.7", 0))]
+
+        loop.getaddrinfo = fake_getaddrinfo  # type: ignore[method-assign]
+
+        literal = HostResolver("192.168.1.99")
+        assert await literal.resolve() == "192.168.1.99"
+        assert calls == []
+
+        named = HostResolver("k1.local")
+        assert named.cached() == "k1.local"
+        assert await named.resolve() == "10.0.0.7"
+        assert await named.resolve() == "10.0.0.7"
+        assert calls == ["k1.local"]  # second call served from cache
+
+        named.invalidate()
+        await named.resolve()
+        assert calls == ["k1.local", "k1.local"]
+
+    asyncio.run(run())
+
+
+def test_resolver_caches_failures_and_falls_back_to_host():
+    async def run():
+        loop = asyncio.get_running_loop()
+        calls = []
+
+        async def failing_getaddrinfo(host, *args, **kwargs):
+            calls.append(host)
+            raise OSError("no such host")
+
+        loop.getaddrinfo = failing_getaddrinfo  # type: ignore[method-assign]
+
+        resolver = HostResolver("k1.local")
+        assert await resolver.resolve() == "k1.local"
+        # Connect failures keep the negative entry instead of re-querying
+        resolver.invalidate(keep_failures=True)
+        assert await resolver.resolve() == "k1.local"
+        assert calls == ["k1.local"]
+        assert resolver.failures == 1
+
+    asyncio.run(run())
+
+
+def _feed(client, text):
+    """Run one raw frame through the dedupe + merge steps of the reader."""
+    shape = client._frame_shape(text)
+    if client._is_duplicate_frame(shape, text):
+        return None
+    payload = json.loads(text)
+    delta = client._merge_frame(payload)
+    client._remember_frame(shape, text, payload.keys(), delta)
+    return delta
+
+
+def test_identical_frames_are_deduped_until_their_keys_change():
+    client = KClient("192.168.1.99", _noop)
+    a = '{"nozzleTemp":200,"bedTemp0":60}'
+    b = '{"nozzleTemp":201}'
+    assert _feed(client, a) == {"nozzleTemp": 200, "bedTemp0": 60}
+    assert _feed(client, a) is None
+
+    # Another shape changed nozzleTemp, so a resend of ``a`` must apply again
+    assert _feed(client, b) == {"nozzleTemp": 201}
+    assert _feed(client, a) == {"nozzleTemp": 200}
+    assert _feed(client, b) == {"nozzleTemp": 201}
+
+
+def test_unrelated_shapes_stay_cached():
+    client = KClient("192.168.1.99", _noop)
+    temps = '{"nozzleTemp":200}'
+    pos = '{"curPosition":"X:1 Y:2 Z:3"}'
+    _feed(client, temps)
+    _feed(client, pos)
+    _feed(client, '{"curPosition":"X:4 Y:5 Z:6"}')
+    assert _feed(client, temps) is None
+
+
+def test_consumer_coalesces_frames_queued_while_busy():
+    async def run():
+        calls = []
+
+        async def on_message(delta, version):
+            calls.append((delta, version))
+
+        client = KClient("192.168.1.99", on_message)
+        consumer = asyncio.create_task(client._consume_frames())
+        client._enqueue_frame(None, None, {"nozzleTemp": "200", "bedTemp0": "60"})
+        client._enqueue_frame(None, None, {"nozzleTemp": "201"})
+        client._enqueue_frame(None, None, {"nozzleTemp": "202", "layer": "3"})
+        assert client.queue_depth == 3
+        await asyncio.sleep(0)
+
+        # One merge, one callback, latest value per key
+        assert calls == [({"nozzleTemp": 202, "bedTemp0": 60, "layer": 3}, 1)]
+        assert client.frames_coalesced == 2
+        assert client.queue_depth == 0
+        assert client.queue_max_depth == 3
+        consumer.cancel()
+
+    asyncio.run(run())
+
+
+class _RecordingWS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, text):
+        self.sent.append(text)
+
+
+def test_writer_sends_control_before_queued_polls():
+    async def run():
+        client = KClient("192.168.1.99", _noop)
+        ws = client._ws = _RecordingWS()
+        get = {"method": "get", "params": {"reqPrintObjects": 1}}
+        polls = [asyncio.create_task(client._send_json(get, "poll")) for _ in range(3)]
+        stop = asyncio.create_task(client.send_set(stop=1))
+        await asyncio.sleep(0)  # everything queued before the writer starts
+
+        writer = asyncio.create_task(client._write_loop(ws))
+        await asyncio.gather(stop, *polls)
+        # Control jumps the queue; identical polls are sent once
+        assert ws.sent == [
+            '{"method": "set", "params": {"stop": 1}}',
+            '{"method": "get", "params": {"reqPrintObjects": 1}}',
+        ]
+        assert client.polls_shared == 2
+        assert client.lane_latency["control"]["count"] == 1
+        writer.cancel()
+
+    asyncio.run(run())
+
+
+def test_disconnect_fails_waiting_commands():
+    async def run():
+        client = KClient("192.168.1.99", _noop)
+        client._ws = _RecordingWS()
+        cmd = asyncio.create_task(client.send_set(pause=1))
+        poll = asyncio.create_task(client._send_json({"method": "get"}, "poll"))
+        await asyncio.sleep(0)
+        client._stop_writer()
+        await poll  # polls are best effort
+        try:
+            await cmd
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("queued command should fail on disconnect")
+
+    asyncio.run(run())
+
+
+def test_plan_set_frames_merges_only_allowlisted_keys():
+    frames = KClient._plan_set_frames(
+        [{"setFeedratePct": 90}, {"nozzleTempControl": 210}, {"setFlowratePct": 95, "setFeedratePct": 100}]
+    )
+    assert frames == [{"setFeedratePct": 100, "setFlowratePct": 95}, {"nozzleTempControl": 210}]
+
+
+def test_set_batch_and_window_send_one_pass():
+    async def run():
+        client = KClient("192.168.1.99", _noop)
+        ws = client._ws = _RecordingWS()
+        writer = asyncio.create_task(client._write_loop(ws))
+
+        async with client.set_batch() as batch:
+            batch.set(setFeedratePct=120)
+            batch.set(setFlowratePct=120)
+        assert ws.sent == ['{"method": "set", "params": {"setFeedratePct": 120, "setFlowratePct": 120}}']
+
+        ws.sent.clear()
+        await asyncio.gather(
+            client.send_set_coalesced(nozzleTempControl=200),
+            client.send_set_coalesced(setFeedratePct=80),
+        )
+        assert ws.sent == [
+            '{"method": "set", "params": {"setFeedratePct": 80}}',
+            '{"method": "set", "params": {"nozzleTempControl": 200}}',
+        ]
+        writer.cancel()
+
+    asyncio.run(run())
+
+
+def test_tracker_times_confirmations_and_flags_ignored_commands():
+    now = [100.0]
+    tracker = CommandTracker(timeout=5.0, clock=lambda: now[0])
+    state = {"targetNozzleTemp": 0, "lightSw": 1, "modelFanPct": 0}
+
+    tracker.expect({"nozzleTempControl": 210}, state)
+    tracker.expect({"lightSw": 1}, state)  # already on: nothing to time
+    tracker.expect({"gcodeCmd": "M106 P0 S128"}, state)
+    assert tracker.pending == 2
+
+    now[0] = 100.25
+    tracker.observe({"targetNozzleTemp": 210, "modelFanPct": 50})
+    nozzle = tracker.stats("nozzleTempControl")
+    assert nozzle.confirmed == 1 and nozzle.percentile(50) == 250.0
+    assert tracker.stats("M106").confirmed == 1
+    assert tracker.stats("lightSw").sent == 0
+
+    tracker.expect({"bedTempControl": {"num": 0, "val": 60}}, state)
+    now[0] = 106.0
+    tracker.observe({"nozzleTemp": 30})
+    assert tracker.stats("bedTempControl").unconfirmed == 1
+    assert tracker.pending == 0
+
+
+def test_set_commands_are_tracked_until_telemetry_reflects_them():
+    async def run():
+        client = KClient("192.168.1.99", _noop)
+        ws = client._ws = _RecordingWS()
+        writer = asyncio.create_task(client._write_loop(ws))
+
+        await client.send_set_retry(setFeedratePct=120)
+        assert client.tracker.pending == 1
+        await client._apply_frames([(None, None, {"curFeedratePct": 120})])
+        stats = client.tracker.as_dict()["setFeedratePct"]
+        assert stats["confirmed"] == 1 and stats["p50_ms"] is not None
+        assert client.tracker.pending == 0
+        writer.cancel()
+
+    asyncio.run(run())
+
+
+def test_ignored_commands_expire_on_time_without_new_frames():
+    async def run():
+        client = KClient("192.168.1.99", _noop)
+        client.tracker._timeout = 0.05
+        expired = []
+        client.on_commands_expired = expired.append
+        ws = client._ws = _RecordingWS()
+        writer = asyncio.create_task(client._write_loop(ws))
+
+        await client.send_set_retry(lightSw=1)
+        assert client.tracker.pending == 1
+        await asyncio.sleep(0.1)  # the printer never echoes it
+        assert expired == [{"lightSw"}]
+        assert client.tracker.stats("lightSw").unconfirmed == 1
+        assert client._ack_timer is None
+        writer.cancel()
+
+    asyncio.run(run())
+
+
+def test_cancelling_the_writer_mid_send_fails_the_in_flight_command():
+    class _SlowWS:
+        async def send(self, text):
+            await asyncio.sleep(10)
+
+    async def run():
+        client = KClient("192.168.1.99", _noop)
+        ws = client._ws = _SlowWS()
+        client._writer_task = asyncio.create_task(client._write_loop(ws))
+        stop = asyncio.create_task(client.send_set(stop=1))
+        await asyncio.sleep(0.01)  # writer is inside ws.send
+        assert not client._control_lane
+
+        client._stop_writer()
+        try:
+            await asyncio.wait_for(stop, timeout=1.0)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("in-flight send should fail")
+
+    asyncio.run(run())
+
+
+def test_standby_profile_parks_periodic_gets():
+    async def run():
+        client = KClient("192.168.1.99", _noop)
+        client.cadence_profile = "idle"
+        client._start_periodic_gets()
+        try:
+            client.set_cadence_profile("standby")
+            intervals = {job.name: job.interval for job in client._get_jobs}
+            assert intervals == {"ReqPrinterPara": None, "reqPrintObjects": None, "boxsInfo": 3600.0}
+
+            client.set_cadence_profile("printing")
+            assert all(job.interval for job in client._get_jobs)
+        finally:
+            client._stop_periodic_gets()
+
+    asyncio.run(run())
@@ -68,6 +68,18 @@ if "websockets" not in sys.modules:
 # Now import the real module
 import importlib.util
 
+# Load the sibling modules ws_client imports relatively, so this file does not
+# depend on other test modules having registered them first.
+for _dep in ("const", "utils", "codec", "resolver", "scheduler", "tracker"):
+    _name = f"ha_creality_ws.{_dep}"
+    if _name not in sys.modules:
+        _dep_spec = importlib.util.spec_from_file_location(
+            _name, ROOT / "custom_components" / "ha_creality_ws" / f"{_dep}.py"
+        )
+        _dep_mod = importlib.util.module_from_spec(_dep_spec)
+        sys.modules[_name] = _dep_mod
+        _dep_spec.loader.exec_module(_dep_mod)  # type: ignore[union-attr]
+
 spec = importlib.util.spec_from_file_location(
     "ha_creality_ws.ws_client",
     ROOT / "custom_components" / "ha_creality_ws" / "ws_client.py",